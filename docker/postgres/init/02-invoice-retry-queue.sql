@@ -0,0 +1,15 @@
+CREATE TABLE IF NOT EXISTS invoice_retry_queue (
+    id BIGSERIAL PRIMARY KEY,
+    batch_id TEXT NOT NULL,
+    external_id TEXT NOT NULL,
+    issued_at TIMESTAMPTZ NOT NULL,
+    invoice JSONB NOT NULL,
+    factus_payload JSONB NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    due_at TIMESTAMPTZ NOT NULL,
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    UNIQUE (external_id, issued_at)
+);
+
+CREATE INDEX IF NOT EXISTS idx_invoice_retry_queue_due_at ON invoice_retry_queue (due_at);
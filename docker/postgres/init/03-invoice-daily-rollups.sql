@@ -0,0 +1,26 @@
+CREATE TABLE IF NOT EXISTS invoice_daily_rollups (
+    customer_id TEXT NOT NULL,
+    day DATE NOT NULL,
+    currency TEXT NOT NULL,
+    status TEXT NOT NULL,
+    invoice_count BIGINT NOT NULL DEFAULT 0,
+    total NUMERIC(20, 2) NOT NULL DEFAULT 0,
+    tax_amount NUMERIC(20, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (customer_id, day, currency, status)
+);
+
+CREATE INDEX IF NOT EXISTS idx_invoice_daily_rollups_day ON invoice_daily_rollups (day);
+
+-- Seeds the rollups from invoices written before the table existed.
+INSERT INTO invoice_daily_rollups (customer_id, day, currency, status, invoice_count, total, tax_amount)
+SELECT
+    COALESCE(customer_id, ''),
+    (issued_at AT TIME ZONE 'UTC')::date,
+    COALESCE(currency, ''),
+    COALESCE(status, ''),
+    count(*),
+    COALESCE(sum(total), 0),
+    COALESCE(sum(tax_amount), 0)
+FROM invoices
+WHERE NOT EXISTS (SELECT 1 FROM invoice_daily_rollups)
+GROUP BY 1, 2, 3, 4;
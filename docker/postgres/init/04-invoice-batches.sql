@@ -0,0 +1,12 @@
+CREATE TABLE IF NOT EXISTS invoice_batches (
+    batch_id TEXT PRIMARY KEY,
+    stage TEXT NOT NULL,
+    invoice_count INTEGER NOT NULL DEFAULT 0,
+    transformed_count INTEGER,
+    succeeded_count INTEGER NOT NULL DEFAULT 0,
+    failed_count INTEGER NOT NULL DEFAULT 0,
+    pending_retry_count INTEGER NOT NULL DEFAULT 0,
+    error_message TEXT,
+    received_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
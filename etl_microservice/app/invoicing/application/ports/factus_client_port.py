@@ -2,10 +2,14 @@ from typing import Any, Protocol
 
 
 class FactusClientPort(Protocol):
-    async def authenticate(self, force_refresh: bool = False) -> str: ...
+    async def authenticate(
+        self, force_refresh: bool = False, stale_token: str | None = None
+    ) -> str: ...
 
     async def get_active_numbering_range_id(self) -> int: ...
 
     async def create_invoice(
         self, invoice_data: dict[str, Any], numbering_range_id: int
     ) -> dict[str, Any]: ...
+
+    async def create_encoded_invoice(self, body: bytes) -> dict[str, Any]: ...
@@ -0,0 +1,20 @@
+from typing import Protocol
+
+from app.invoicing.domain.entities.invoice_batch_status import InvoiceBatchStatus
+
+
+class InvoiceBatchTrackerPort(Protocol):
+    async def mark_stage(
+        self,
+        batch_id: str,
+        stage: str,
+        invoice_count: int | None = None,
+        transformed_count: int | None = None,
+        error: str | None = None,
+    ) -> InvoiceBatchStatus | None: ...
+
+    async def record_results(
+        self, batch_id: str, succeeded: int, failed: int, pending_retry: int
+    ) -> InvoiceBatchStatus | None: ...
+
+    async def fetch_batch_status(self, batch_id: str) -> InvoiceBatchStatus | None: ...
@@ -1,5 +1,9 @@
 from typing import Any, Protocol
 
+import polars as pl
+
 
 class InvoiceEventPublisherPort(Protocol):
     async def publish_invoice_processed(self, invoice_data: dict[str, Any]) -> None: ...
+
+    async def publish_invoices_processed(self, invoices: pl.DataFrame) -> None: ...
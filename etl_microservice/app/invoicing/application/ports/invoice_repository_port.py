@@ -1,11 +1,31 @@
+from datetime import date, datetime
 from typing import Protocol
 
 import polars as pl
 
-from app.invoicing.domain.entities.invoice import Invoice
+from app.invoicing.domain.entities.invoice_page import InvoiceCursor, InvoicePage
+from app.invoicing.domain.entities.invoice_stats import InvoiceStats
 
 
 class InvoiceRepositoryPort(Protocol):
     async def save_dataframe(self, df: pl.DataFrame) -> None: ...
 
-    async def fetch_invoices(self, customer_id: str | None = None) -> list[Invoice]: ...
+    async def upsert_dataframe(self, df: pl.DataFrame) -> None: ...
+
+    async def fetch_succeeded_external_ids(self, df: pl.DataFrame) -> set[str]: ...
+
+    async def fetch_invoices(
+        self,
+        customer_id: str | None = None,
+        issued_from: datetime | None = None,
+        issued_to: datetime | None = None,
+        after: InvoiceCursor | None = None,
+        limit: int = 50,
+    ) -> InvoicePage: ...
+
+    async def fetch_invoice_stats(
+        self,
+        customer_id: str | None = None,
+        issued_from: date | None = None,
+        issued_to: date | None = None,
+    ) -> list[InvoiceStats]: ...
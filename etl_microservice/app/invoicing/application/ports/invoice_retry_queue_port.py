@@ -0,0 +1,14 @@
+from collections.abc import Sequence
+from typing import Protocol
+
+from app.invoicing.domain.entities.invoice_retry import InvoiceRetry
+
+
+class InvoiceRetryQueuePort(Protocol):
+    async def schedule(self, retries: Sequence[InvoiceRetry], delay_seconds: float) -> None: ...
+
+    async def claim_due(self, limit: int, lease_seconds: float) -> list[InvoiceRetry]: ...
+
+    async def reschedule(self, retry_id: int, delay_seconds: float, error: str) -> None: ...
+
+    async def complete(self, retry_ids: Sequence[int]) -> None: ...
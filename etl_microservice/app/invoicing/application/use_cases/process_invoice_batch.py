@@ -1,22 +1,58 @@
 import asyncio
 import logging
+from collections.abc import Awaitable, Callable, Iterator
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Any, Mapping
+from time import perf_counter
+from typing import Any, Literal, Mapping
 
 import httpx
 from opentelemetry import trace
 import polars as pl
 
 from app.invoicing.application.ports.factus_client_port import FactusClientPort
+from app.invoicing.application.ports.invoice_batch_tracker_port import InvoiceBatchTrackerPort
 from app.invoicing.application.ports.invoice_event_publisher_port import InvoiceEventPublisherPort
 from app.invoicing.application.ports.invoice_repository_port import InvoiceRepositoryPort
+from app.invoicing.application.ports.invoice_retry_queue_port import InvoiceRetryQueuePort
 from app.invoicing.domain.entities.invoice_batch import InvoiceBatch
-from app.invoicing.infrastructure.etl.polars_transformer import transform_invoices
+from app.invoicing.domain.entities.invoice_batch_status import (
+    BATCH_STAGE_FAILED,
+    BATCH_STAGE_PERSISTED,
+    BATCH_STAGE_RECEIVED,
+    BATCH_STAGE_SENT,
+    BATCH_STAGE_TRANSFORMED,
+)
+from app.invoicing.domain.entities.invoice_retry import InvoiceRetry
+from app.invoicing.infrastructure.api.factus.factus_invoice_payloads import (
+    build_factus_invoice_payloads,
+    encode_factus_invoice_bodies,
+)
+from app.invoicing.infrastructure.etl.polars_decoder import DecodedInvoiceBatch
+from app.invoicing.infrastructure.etl.polars_transformer import (
+    transform_invoice_frame,
+    transform_invoices,
+)
+from app.shared.infrastructure.metrics.prometheus_metrics import (
+    FACTUS_RETRIES,
+    INVOICE_BATCH_SECONDS,
+    INVOICE_BATCHES_IN_FLIGHT,
+    INVOICE_PIPELINE_STAGE_SECONDS,
+)
+from app.shared.infrastructure.resilience.adaptive_concurrency_limiter import (
+    AdaptiveConcurrencyLimiter,
+)
+from app.shared.infrastructure.resilience.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+)
 
 logger = logging.getLogger(__name__)
 tracer = trace.get_tracer(__name__)
 
+INVOICE_STATUS_SUCCESS = "success"
+INVOICE_STATUS_ERROR = "error"
+INVOICE_STATUS_PENDING_RETRY = "pending_retry"
+
 
 @dataclass(frozen=True, slots=True)
 class FactusInvoiceResult:
@@ -28,6 +64,37 @@ class FactusInvoiceResult:
     error: str | None = None
 
 
+def is_factus_overload(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.TimeoutException):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        status_code = exc.response.status_code
+        return status_code == httpx.codes.TOO_MANY_REQUESTS or status_code >= 500
+    return False
+
+
+def is_retryable_factus_error(exc: BaseException) -> bool:
+    """Transient Factus failures worth another attempt later; 4xx rejections are final."""
+    if isinstance(exc, (CircuitOpenError, httpx.TransportError)):
+        return True
+    return is_factus_overload(exc)
+
+
+def factus_result_from_response(
+    external_id: str, response: Mapping[str, Any]
+) -> FactusInvoiceResult:
+    data = response.get("data", response)
+    if not isinstance(data, dict):
+        data = {}
+    return FactusInvoiceResult(
+        external_id=external_id,
+        factus_invoice_id=str(data.get("id")) if data.get("id") is not None else None,
+        qr_url=data.get("qr"),
+        pdf_url=data.get("pdf"),
+        status=INVOICE_STATUS_SUCCESS,
+    )
+
+
 class ProcessInvoiceBatchUseCase:
     _FACTUS_CONCURRENCY_LIMIT = 50
     _FACTUS_MAX_RETRIES = 3
@@ -38,50 +105,332 @@ class ProcessInvoiceBatchUseCase:
         factus_client: FactusClientPort,
         event_publisher: InvoiceEventPublisherPort | None = None,
         retry_base_delay_seconds: float = 1.0,
+        stream_flush_size: int | None = None,
+        stream_flush_interval_seconds: float = 2.0,
+        concurrency_limiter: AdaptiveConcurrencyLimiter | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        retry_queue: InvoiceRetryQueuePort | None = None,
+        retry_queue_delay_seconds: float = 30.0,
+        batch_tracker: InvoiceBatchTrackerPort | None = None,
     ) -> None:
+        if stream_flush_size is not None and stream_flush_size < 1:
+            raise ValueError("stream_flush_size must be at least 1")
         self._invoice_repository = invoice_repository
         self._factus_client = factus_client
         self._event_publisher = event_publisher
         self._retry_base_delay_seconds = retry_base_delay_seconds
+        self._stream_flush_size = stream_flush_size
+        self._stream_flush_interval_seconds = stream_flush_interval_seconds
+        self._concurrency_limiter = concurrency_limiter or AdaptiveConcurrencyLimiter(
+            initial_limit=self._FACTUS_CONCURRENCY_LIMIT,
+            is_overload=is_factus_overload,
+        )
+        self._circuit_breaker = circuit_breaker
+        self._retry_queue = retry_queue
+        self._retry_queue_delay_seconds = retry_queue_delay_seconds
+        self._batch_tracker = batch_tracker
 
     async def execute(self, payload: Mapping[str, Any]) -> str:
-        batch = InvoiceBatch.from_message(payload)
-        with tracer.start_as_current_span("process_invoice_batch.polars_transform"):
-            df = await asyncio.to_thread(transform_invoices, batch.invoices, batch.batch_id)
+        with INVOICE_PIPELINE_STAGE_SECONDS.labels("decode").time():
+            batch = InvoiceBatch.from_message(payload)
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.raise_if_open()
+        await self._transform_and_process(
+            batch.batch_id,
+            len(batch.invoices),
+            lambda: transform_invoices(batch.invoices, batch.batch_id),
+        )
+        return batch.batch_id
+
+    async def execute_decoded(self, batch: DecodedInvoiceBatch) -> str:
+        """Processes a batch already decoded into a frame by ``decode_invoice_batch``."""
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.raise_if_open()
+        await self._transform_and_process(
+            batch.batch_id,
+            batch.invoices.height,
+            lambda: transform_invoice_frame(batch.invoices, batch.batch_id),
+        )
+        return batch.batch_id
+
+    async def _transform_and_process(
+        self, batch_id: str, invoice_count: int, transform: Callable[[], pl.DataFrame]
+    ) -> None:
+        started_at = perf_counter()
+        transformed_count: int | None = None
+        with INVOICE_BATCHES_IN_FLIGHT.track_inprogress():
+            await self._track_stage(batch_id, BATCH_STAGE_RECEIVED, invoice_count=invoice_count)
+            try:
+                with (
+                    tracer.start_as_current_span("process_invoice_batch.polars_transform"),
+                    INVOICE_PIPELINE_STAGE_SECONDS.labels("transform").time(),
+                ):
+                    df = await asyncio.to_thread(transform)
+                transformed_count = df.height
+                await self._process_frame(df, batch_id)
+            except CircuitOpenError:
+                # The consumer parks the batch and runs it again once the circuit closes,
+                # so it has neither failed nor finished.
+                raise
+            except Exception as exc:
+                INVOICE_BATCH_SECONDS.labels("failed").observe(perf_counter() - started_at)
+                await self._track_stage(
+                    batch_id,
+                    BATCH_STAGE_FAILED,
+                    transformed_count=transformed_count,
+                    error=str(exc),
+                )
+                raise
+            INVOICE_BATCH_SECONDS.labels("success").observe(perf_counter() - started_at)
+            await self._track_stage(
+                batch_id, BATCH_STAGE_PERSISTED, transformed_count=transformed_count
+            )
+
+    async def _process_frame(self, df: pl.DataFrame, batch_id: str) -> None:
+        if df.is_empty():
+            return
+        transformed_count = df.height
+        df = await self._skip_already_succeeded(df, batch_id)
         if df.is_empty():
-            return batch.batch_id
+            return
 
         numbering_range_id = await self._factus_client.get_active_numbering_range_id()
-        semaphore = asyncio.Semaphore(self._FACTUS_CONCURRENCY_LIMIT)
-        with tracer.start_as_current_span("process_invoice_batch.factus_gather"):
+        with (
+            tracer.start_as_current_span("process_invoice_batch.factus_payloads"),
+            INVOICE_PIPELINE_STAGE_SECONDS.labels("factus_payloads").time(),
+        ):
+            bodies = await asyncio.to_thread(
+                encode_factus_invoice_bodies, df, batch_id, numbering_range_id
+            )
+        await self._track_stage(
+            batch_id, BATCH_STAGE_TRANSFORMED, transformed_count=transformed_count
+        )
+        external_ids = df.get_column("external_id").to_list()
+        if self._stream_flush_size is not None:
+            # Includes the micro-batch flushes, which overlap with the Factus calls.
+            with (
+                tracer.start_as_current_span("process_invoice_batch.factus_stream"),
+                INVOICE_PIPELINE_STAGE_SECONDS.labels("factus_stream").time(),
+            ):
+                await self._send_and_flush_streaming(
+                    df=df,
+                    requests=enumerate(zip(external_ids, bodies, strict=True)),
+                    batch_id=batch_id,
+                    flush_size=self._stream_flush_size,
+                )
+            await self._track_stage(batch_id, BATCH_STAGE_SENT)
+            return
+
+        with (
+            tracer.start_as_current_span("process_invoice_batch.factus_gather"),
+            INVOICE_PIPELINE_STAGE_SECONDS.labels("factus").time(),
+        ):
             results = await asyncio.gather(
                 *[
                     self._send_invoice_to_factus(
-                        invoice_row=invoice_row,
-                        numbering_range_id=numbering_range_id,
-                        semaphore=semaphore,
-                        batch_id=batch.batch_id,
+                        external_id=external_id,
+                        body=body,
+                        batch_id=batch_id,
                     )
-                    for invoice_row in df.rows(named=True)
+                    for external_id, body in zip(external_ids, bodies, strict=True)
                 ]
             )
         logger.info(
             "factus_batch_sync_completed sent=%s success=%s failed=%s",
             len(results),
-            sum(result.status == "success" for result in results),
-            sum(result.status == "error" for result in results),
-            extra={"batch_id": batch.batch_id},
+            sum(result.status == INVOICE_STATUS_SUCCESS for result in results),
+            sum(result.status == INVOICE_STATUS_ERROR for result in results),
+            extra={"batch_id": batch_id},
         )
+        await self._track_stage(batch_id, BATCH_STAGE_SENT)
         result_df = self._attach_factus_results(df=df, results=results)
-        await self._invoice_repository.save_dataframe(result_df)
+        await self._persist_and_publish(result_df, batch_id)
+
+    async def _send_and_flush_streaming(
+        self,
+        df: pl.DataFrame,
+        requests: Iterator[tuple[int, tuple[str, bytes]]],
+        batch_id: str,
+        flush_size: int,
+    ) -> None:
+        """Persists Factus results in micro-batches as they complete.
+
+        At most ``flush_size`` (or the current concurrency limit, if larger) invoices are
+        in flight, and buffered results are flushed once ``flush_size`` accumulate or the
+        flush interval elapses, so memory stays bounded by the flush size. Each request
+        carries its row index in ``df``, so a flush only gathers its own rows.
+        """
+        loop = asyncio.get_running_loop()
+        pending: dict[asyncio.Task[FactusInvoiceResult], int] = {}
+        buffered: list[tuple[int, FactusInvoiceResult]] = []
+        sent = succeeded = 0
+
+        def fill_window() -> None:
+            while len(pending) < max(flush_size, self._concurrency_limiter.limit):
+                request = next(requests, None)
+                if request is None:
+                    return
+                row_index, (external_id, body) = request
+                task = asyncio.create_task(
+                    self._send_invoice_to_factus(
+                        external_id=external_id,
+                        body=body,
+                        batch_id=batch_id,
+                    )
+                )
+                pending[task] = row_index
+
+        fill_window()
+        flush_deadline = loop.time() + self._stream_flush_interval_seconds
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=max(flush_deadline - loop.time(), 0.0),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                buffered.extend((pending.pop(task), task.result()) for task in done)
+                fill_window()
+                deadline_reached = loop.time() >= flush_deadline
+                flush_all = deadline_reached or not pending
+                flushed = False
+                while len(buffered) >= flush_size or (buffered and flush_all):
+                    chunk, buffered = buffered[:flush_size], buffered[flush_size:]
+                    results = [result for _, result in chunk]
+                    await self._persist_and_publish(
+                        self._attach_factus_results(
+                            df=df[[row_index for row_index, _ in chunk]],
+                            results=results,
+                            how="inner",
+                        ),
+                        batch_id,
+                    )
+                    sent += len(chunk)
+                    succeeded += sum(
+                        result.status == INVOICE_STATUS_SUCCESS for result in results
+                    )
+                    flushed = True
+                if flushed or deadline_reached:
+                    flush_deadline = loop.time() + self._stream_flush_interval_seconds
+        finally:
+            for task in pending:
+                task.cancel()
+
+        logger.info(
+            "factus_batch_sync_completed sent=%s success=%s failed=%s",
+            sent,
+            succeeded,
+            sent - succeeded,
+            extra={"batch_id": batch_id},
+        )
+
+    async def _persist_and_publish(self, result_df: pl.DataFrame, batch_id: str) -> None:
+        with INVOICE_PIPELINE_STAGE_SECONDS.labels("persist").time():
+            await self._invoice_repository.save_dataframe(result_df)
+        # Scheduled only once the invoices exist, so the queue never points at rows a
+        # failed save left out. If scheduling fails the batch fails and is redelivered,
+        # and pending_retry invoices are sent again then.
+        if self._retry_queue is not None:
+            await self._schedule_retries(result_df, batch_id)
+        if self._batch_tracker is not None:
+            statuses = result_df.get_column("status")
+            await self._track(
+                batch_id,
+                "results",
+                self._batch_tracker.record_results(
+                    batch_id,
+                    succeeded=int((statuses == INVOICE_STATUS_SUCCESS).sum()),
+                    failed=int((statuses == INVOICE_STATUS_ERROR).sum()),
+                    pending_retry=int((statuses == INVOICE_STATUS_PENDING_RETRY).sum()),
+                ),
+            )
         if self._event_publisher is not None:
-            for row in result_df.rows(named=True):
-                await self._event_publisher.publish_invoice_processed(row)
-        return batch.batch_id
+            await self._event_publisher.publish_invoices_processed(result_df)
+
+    async def _skip_already_succeeded(self, df: pl.DataFrame, batch_id: str) -> pl.DataFrame:
+        """Drops invoices a previous delivery of the batch already got accepted by Factus.
+
+        Sending them again would only earn a duplicate rejection from Factus.
+        """
+        succeeded = await self._invoice_repository.fetch_succeeded_external_ids(df)
+        if not succeeded:
+            return df
+        logger.info(
+            "invoice_batch_skipped_already_succeeded count=%s",
+            len(succeeded),
+            extra={"batch_id": batch_id},
+        )
+        return df.filter(~pl.col("external_id").is_in(list(succeeded)))
+
+    async def _track_stage(
+        self,
+        batch_id: str,
+        stage: str,
+        invoice_count: int | None = None,
+        transformed_count: int | None = None,
+        error: str | None = None,
+    ) -> None:
+        if self._batch_tracker is not None:
+            await self._track(
+                batch_id,
+                stage,
+                self._batch_tracker.mark_stage(
+                    batch_id,
+                    stage,
+                    invoice_count=invoice_count,
+                    transformed_count=transformed_count,
+                    error=error,
+                ),
+            )
+
+    @staticmethod
+    async def _track(batch_id: str, step: str, update: Awaitable[Any]) -> None:
+        """Batch tracking is informational, so a failed update never fails the batch."""
+        try:
+            await update
+        except Exception:
+            logger.warning(
+                "invoice_batch_tracking_failed step=%s",
+                step,
+                exc_info=True,
+                extra={"batch_id": batch_id},
+            )
+
+    async def _schedule_retries(self, result_df: pl.DataFrame, batch_id: str) -> None:
+        assert self._retry_queue is not None
+        pending_df = result_df.filter(pl.col("status") == INVOICE_STATUS_PENDING_RETRY)
+        if pending_df.is_empty():
+            return
+        retries = [
+            InvoiceRetry(
+                external_id=str(invoice_row["external_id"]),
+                issued_at=invoice_row["issued_at"],
+                batch_id=batch_id,
+                invoice={
+                    column: invoice_row.get(column)
+                    for column in ("customer_id", "total", "currency", "tax_amount")
+                },
+                factus_payload=factus_payload,
+            )
+            for invoice_row, factus_payload in zip(
+                pending_df.iter_rows(named=True),
+                build_factus_invoice_payloads(pending_df, batch_id),
+                strict=True,
+            )
+        ]
+        await self._retry_queue.schedule(retries, delay_seconds=self._retry_queue_delay_seconds)
+        logger.info(
+            "factus_invoice_retries_scheduled count=%s delay=%.2fs",
+            len(retries),
+            self._retry_queue_delay_seconds,
+            extra={"batch_id": batch_id},
+        )
 
     @staticmethod
     def _attach_factus_results(
-        df: pl.DataFrame, results: list[FactusInvoiceResult]
+        df: pl.DataFrame,
+        results: list[FactusInvoiceResult],
+        how: Literal["left", "inner"] = "left",
     ) -> pl.DataFrame:
         results_df = pl.DataFrame(
             {
@@ -93,40 +442,26 @@ class ProcessInvoiceBatchUseCase:
                 "error_message": [result.error for result in results],
             }
         )
-        return df.join(results_df, on="external_id", how="left")
+        return df.join(results_df, on="external_id", how=how)
 
     async def _send_invoice_to_factus(
         self,
-        invoice_row: dict[str, Any],
-        numbering_range_id: int,
-        semaphore: asyncio.Semaphore,
+        external_id: str,
+        body: bytes,
         batch_id: str,
     ) -> FactusInvoiceResult:
-        external_id = str(invoice_row.get("external_id", ""))
-        payload = self._build_factus_invoice_payload(invoice_row, batch_id)
+        # With a retry queue, transient failures are parked there instead of being retried
+        # in-coroutine, so the batch never waits on backoff sleeps.
+        max_retries = 0 if self._retry_queue is not None else self._FACTUS_MAX_RETRIES
         last_exc: Exception | None = None
-        for attempt in range(self._FACTUS_MAX_RETRIES + 1):
+        for attempt in range(max_retries + 1):
             try:
-                async with semaphore:
-                    response = await self._factus_client.create_invoice(
-                        payload,
-                        numbering_range_id=numbering_range_id,
-                    )
-                data = response.get("data", response)
-                if not isinstance(data, dict):
-                    data = {}
-                return FactusInvoiceResult(
-                    external_id=external_id,
-                    factus_invoice_id=(
-                        str(data.get("id")) if data.get("id") is not None else None
-                    ),
-                    qr_url=data.get("qr"),
-                    pdf_url=data.get("pdf"),
-                    status="success",
-                )
+                async with self._concurrency_limiter.acquire():
+                    response = await self._factus_client.create_encoded_invoice(body)
+                return factus_result_from_response(external_id, response)
             except httpx.TimeoutException as exc:
                 last_exc = exc
-                if attempt < self._FACTUS_MAX_RETRIES:
+                if attempt < max_retries:
                     delay = self._retry_base_delay_seconds * (2**attempt)
                     logger.warning(
                         "factus_invoice_timeout_retry external_id=%s attempt=%s delay=%.2fs error=%s",
@@ -137,6 +472,7 @@ class ProcessInvoiceBatchUseCase:
                         extra={"batch_id": batch_id},
                     )
                     await asyncio.sleep(delay)
+                    FACTUS_RETRIES.labels("timeout").inc()
                     continue
                 logger.warning(
                     "factus_invoice_timeout external_id=%s error=%s",
@@ -144,6 +480,14 @@ class ProcessInvoiceBatchUseCase:
                     str(exc),
                     extra={"batch_id": batch_id},
                 )
+            except CircuitOpenError as exc:
+                logger.warning(
+                    "factus_invoice_circuit_open external_id=%s error=%s",
+                    external_id,
+                    str(exc),
+                    extra={"batch_id": batch_id},
+                )
+                return self._failed_result(external_id, exc)
             except httpx.HTTPError as exc:
                 logger.warning(
                     "factus_invoice_http_error external_id=%s error=%s",
@@ -151,48 +495,17 @@ class ProcessInvoiceBatchUseCase:
                     str(exc),
                     extra={"batch_id": batch_id},
                 )
-                return FactusInvoiceResult(
-                    external_id=external_id,
-                    factus_invoice_id=None,
-                    qr_url=None,
-                    pdf_url=None,
-                    status="error",
-                    error=str(exc),
-                )
+                return self._failed_result(external_id, exc)
+        assert last_exc is not None
+        return self._failed_result(external_id, last_exc)
+
+    def _failed_result(self, external_id: str, exc: Exception) -> FactusInvoiceResult:
+        retryable = self._retry_queue is not None and is_retryable_factus_error(exc)
         return FactusInvoiceResult(
             external_id=external_id,
             factus_invoice_id=None,
             qr_url=None,
             pdf_url=None,
-            status="error",
-            error=str(last_exc),
+            status=INVOICE_STATUS_PENDING_RETRY if retryable else INVOICE_STATUS_ERROR,
+            error=str(exc),
         )
-
-    @staticmethod
-    def _build_factus_invoice_payload(
-        invoice_row: dict[str, Any], batch_id: str
-    ) -> dict[str, Any]:
-        external_id = str(invoice_row.get("external_id", ""))
-        issued_at = invoice_row.get("issued_at")
-        if isinstance(issued_at, datetime):
-            issue_date = issued_at.date().isoformat()
-        else:
-            issue_date = None
-        total = invoice_row.get("total")
-        price = float(total) if total is not None else 0.0
-        return {
-            "reference_code": external_id,
-            "observation": f"batch:{batch_id}",
-            "issue_date": issue_date,
-            "customer": {
-                "identification": str(invoice_row.get("customer_id") or "UNKNOWN"),
-            },
-            "items": [
-                {
-                    "code": external_id or "ITEM-1",
-                    "description": f"Invoice {external_id}" if external_id else "Invoice",
-                    "quantity": 1,
-                    "price": price,
-                }
-            ],
-        }
@@ -0,0 +1,250 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Any
+
+import httpx
+import polars as pl
+
+from app.invoicing.application.ports.factus_client_port import FactusClientPort
+from app.invoicing.application.ports.invoice_batch_tracker_port import (
+    InvoiceBatchTrackerPort,
+)
+from app.invoicing.application.ports.invoice_event_publisher_port import (
+    InvoiceEventPublisherPort,
+)
+from app.invoicing.application.ports.invoice_repository_port import (
+    InvoiceRepositoryPort,
+)
+from app.invoicing.application.ports.invoice_retry_queue_port import (
+    InvoiceRetryQueuePort,
+)
+from app.invoicing.application.use_cases.process_invoice_batch import (
+    INVOICE_STATUS_ERROR,
+    INVOICE_STATUS_SUCCESS,
+    FactusInvoiceResult,
+    factus_result_from_response,
+    is_factus_overload,
+    is_retryable_factus_error,
+)
+from app.invoicing.domain.entities.invoice_retry import InvoiceRetry
+from app.shared.infrastructure.metrics.prometheus_metrics import FACTUS_RETRIES
+from app.shared.infrastructure.resilience.adaptive_concurrency_limiter import (
+    AdaptiveConcurrencyLimiter,
+)
+from app.shared.infrastructure.resilience.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+)
+
+logger = logging.getLogger(__name__)
+
+_RESULT_SCHEMA: dict[str, Any] = {
+    "external_id": pl.Utf8,
+    "customer_id": pl.Utf8,
+    "issued_at": pl.Datetime(time_zone="UTC"),
+    "total": pl.Float64,
+    "currency": pl.Utf8,
+    "tax_amount": pl.Float64,
+    "factus_invoice_id": pl.Utf8,
+    "qr_url": pl.Utf8,
+    "pdf_url": pl.Utf8,
+    "status": pl.Utf8,
+    "error_message": pl.Utf8,
+}
+
+
+class RetryFailedInvoicesUseCase:
+    """Re-sends invoices parked in the retry queue once they are due.
+
+    Each claimed item counts as one attempt. Transient failures are rescheduled with
+    exponential backoff until ``max_attempts``; the final outcome is upserted into
+    ``invoices`` and published like a freshly processed invoice. An item claimed again
+    after its last attempt was lost, say to a crash, is settled as an error unsent.
+    """
+
+    def __init__(
+        self,
+        retry_queue: InvoiceRetryQueuePort,
+        invoice_repository: InvoiceRepositoryPort,
+        factus_client: FactusClientPort,
+        event_publisher: InvoiceEventPublisherPort | None = None,
+        concurrency_limiter: AdaptiveConcurrencyLimiter | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        max_attempts: int = 5,
+        base_delay_seconds: float = 30.0,
+        max_delay_seconds: float = 900.0,
+        lease_seconds: float = 120.0,
+        batch_tracker: InvoiceBatchTrackerPort | None = None,
+    ) -> None:
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self._retry_queue = retry_queue
+        self._invoice_repository = invoice_repository
+        self._factus_client = factus_client
+        self._event_publisher = event_publisher
+        self._concurrency_limiter = concurrency_limiter or AdaptiveConcurrencyLimiter(
+            is_overload=is_factus_overload,
+            name="factus_retry",
+        )
+        self._circuit_breaker = circuit_breaker
+        self._max_attempts = max_attempts
+        self._base_delay_seconds = base_delay_seconds
+        self._max_delay_seconds = max_delay_seconds
+        self._lease_seconds = lease_seconds
+        self._batch_tracker = batch_tracker
+
+    async def execute(self, limit: int) -> int:
+        """Processes up to ``limit`` due retries and returns how many were claimed."""
+        if self._circuit_breaker is not None:
+            try:
+                self._circuit_breaker.raise_if_open()
+            except CircuitOpenError:
+                return 0
+
+        retries = await self._retry_queue.claim_due(
+            limit=limit, lease_seconds=self._lease_seconds
+        )
+        if not retries:
+            return 0
+
+        exhausted = [retry for retry in retries if retry.attempts > self._max_attempts]
+        sendable = [retry for retry in retries if retry.attempts <= self._max_attempts]
+        outcomes: list[FactusInvoiceResult | Exception] = [
+            RuntimeError(f"Retry attempts exhausted after {retry.attempts - 1} attempts")
+            for retry in exhausted
+        ]
+        # Failing to resolve the range says nothing about the invoices themselves, so
+        # they are rescheduled like a transient Factus failure.
+        range_error: Exception | None = None
+        if sendable:
+            try:
+                numbering_range_id = await self._factus_client.get_active_numbering_range_id()
+            except Exception as exc:
+                logger.exception("factus_invoice_retries_numbering_range_failed")
+                range_error = exc
+                outcomes.extend(exc for _ in sendable)
+            else:
+                FACTUS_RETRIES.labels("retry_queue").inc(len(sendable))
+                outcomes.extend(
+                    await asyncio.gather(
+                        *[self._send_retry(retry, numbering_range_id) for retry in sendable]
+                    )
+                )
+
+        completed_ids: list[int] = []
+        rows: list[dict[str, Any]] = []
+        finished: Counter[tuple[str, str]] = Counter()
+        for retry, outcome in zip(exhausted + sendable, outcomes, strict=True):
+            if isinstance(outcome, Exception):
+                retryable = outcome is range_error or is_retryable_factus_error(outcome)
+                if retryable and retry.attempts < self._max_attempts:
+                    await self._retry_queue.reschedule(
+                        self._retry_id(retry),
+                        delay_seconds=self._backoff_delay(retry.attempts),
+                        error=str(outcome),
+                    )
+                    continue
+                outcome = FactusInvoiceResult(
+                    external_id=retry.external_id,
+                    factus_invoice_id=None,
+                    qr_url=None,
+                    pdf_url=None,
+                    status=INVOICE_STATUS_ERROR,
+                    error=str(outcome),
+                )
+            completed_ids.append(self._retry_id(retry))
+            rows.append(self._invoice_row(retry, outcome))
+            finished[(retry.batch_id, outcome.status)] += 1
+
+        if rows:
+            result_df = pl.DataFrame(rows, schema=_RESULT_SCHEMA)
+            await self._invoice_repository.upsert_dataframe(result_df)
+            if self._event_publisher is not None:
+                await self._event_publisher.publish_invoices_processed(result_df)
+        await self._retry_queue.complete(completed_ids)
+        await self._record_batch_results(finished)
+
+        logger.info(
+            "factus_invoice_retries_processed claimed=%s finished=%s rescheduled=%s",
+            len(retries),
+            len(completed_ids),
+            len(retries) - len(completed_ids),
+        )
+        return len(retries)
+
+    async def _record_batch_results(self, finished: Counter[tuple[str, str]]) -> None:
+        """Moves finished retries out of their batch's pending count."""
+        if self._batch_tracker is None:
+            return
+        for batch_id in {batch_id for batch_id, _ in finished}:
+            succeeded = finished[(batch_id, INVOICE_STATUS_SUCCESS)]
+            failed = finished[(batch_id, INVOICE_STATUS_ERROR)]
+            try:
+                await self._batch_tracker.record_results(
+                    batch_id,
+                    succeeded=succeeded,
+                    failed=failed,
+                    pending_retry=-(succeeded + failed),
+                )
+            except Exception:
+                logger.warning(
+                    "invoice_batch_tracking_failed step=retry_results",
+                    exc_info=True,
+                    extra={"batch_id": batch_id},
+                )
+
+    async def _send_retry(
+        self, retry: InvoiceRetry, numbering_range_id: int
+    ) -> FactusInvoiceResult | Exception:
+        try:
+            async with self._concurrency_limiter.acquire():
+                response = await self._factus_client.create_invoice(
+                    retry.factus_payload,
+                    numbering_range_id=numbering_range_id,
+                )
+        except (CircuitOpenError, httpx.HTTPError) as exc:
+            logger.warning(
+                "factus_invoice_retry_failed external_id=%s attempt=%s error=%s",
+                retry.external_id,
+                retry.attempts,
+                str(exc),
+                extra={"batch_id": retry.batch_id},
+            )
+            return exc
+        except Exception as exc:
+            # Anything else, an invalid Factus response for instance, settles this item
+            # alone instead of abandoning the whole claimed batch.
+            logger.exception(
+                "factus_invoice_retry_unexpected_error external_id=%s attempt=%s",
+                retry.external_id,
+                retry.attempts,
+                extra={"batch_id": retry.batch_id},
+            )
+            return exc
+        return factus_result_from_response(retry.external_id, response)
+
+    def _backoff_delay(self, attempts: int) -> float:
+        return min(self._base_delay_seconds * 2 ** max(attempts - 1, 0), self._max_delay_seconds)
+
+    @staticmethod
+    def _retry_id(retry: InvoiceRetry) -> int:
+        if retry.retry_id is None:
+            raise ValueError(f"Retry for {retry.external_id} has not been claimed")
+        return retry.retry_id
+
+    @staticmethod
+    def _invoice_row(retry: InvoiceRetry, result: FactusInvoiceResult) -> dict[str, Any]:
+        return {
+            "external_id": retry.external_id,
+            "customer_id": retry.invoice.get("customer_id"),
+            "issued_at": retry.issued_at,
+            "total": retry.invoice.get("total"),
+            "currency": retry.invoice.get("currency"),
+            "tax_amount": retry.invoice.get("tax_amount"),
+            "factus_invoice_id": result.factus_invoice_id,
+            "qr_url": result.qr_url,
+            "pdf_url": result.pdf_url,
+            "status": result.status,
+            "error_message": result.error,
+        }
@@ -0,0 +1,23 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+BATCH_STAGE_RECEIVED = "received"
+BATCH_STAGE_TRANSFORMED = "transformed"
+BATCH_STAGE_SENT = "sent"
+BATCH_STAGE_PERSISTED = "persisted"
+BATCH_STAGE_FAILED = "failed"
+BATCH_FINAL_STAGES = (BATCH_STAGE_PERSISTED, BATCH_STAGE_FAILED)
+
+
+@dataclass(frozen=True, slots=True)
+class InvoiceBatchStatus:
+    batch_id: str
+    stage: str
+    invoice_count: int
+    transformed_count: int | None
+    succeeded_count: int
+    failed_count: int
+    pending_retry_count: int
+    error_message: str | None
+    received_at: datetime
+    updated_at: datetime
@@ -0,0 +1,48 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.invoicing.domain.entities.invoice import Invoice
+
+
+@dataclass(frozen=True, slots=True)
+class InvoiceCursor:
+    """Keyset position in the ``(issued_at DESC, external_id DESC)`` invoice ordering."""
+
+    issued_at: datetime
+    external_id: str
+
+    @classmethod
+    def from_invoice(cls, invoice: Invoice) -> "InvoiceCursor":
+        if invoice.issued_at is None:
+            raise ValueError("Cannot build a cursor for an invoice without issued_at")
+        return cls(issued_at=invoice.issued_at, external_id=invoice.external_id)
+
+    def encode(self) -> str:
+        raw = json.dumps([self.issued_at.isoformat(), self.external_id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    @classmethod
+    def decode(cls, cursor: str) -> "InvoiceCursor":
+        try:
+            issued_at, external_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            parsed_issued_at = datetime.fromisoformat(issued_at)
+        except (binascii.Error, UnicodeError, TypeError, ValueError) as exc:
+            raise ValueError("Invalid invoice cursor") from exc
+        if parsed_issued_at.tzinfo is None or not isinstance(external_id, str):
+            raise ValueError("Invalid invoice cursor")
+        return cls(issued_at=parsed_issued_at, external_id=external_id)
+
+
+@dataclass(frozen=True, slots=True)
+class InvoicePage:
+    invoices: tuple[Invoice, ...]
+    has_next_page: bool
+
+    @property
+    def end_cursor(self) -> InvoiceCursor | None:
+        if not self.invoices:
+            return None
+        return InvoiceCursor.from_invoice(self.invoices[-1])
@@ -0,0 +1,14 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+
+@dataclass(frozen=True, slots=True)
+class InvoiceRetry:
+    external_id: str
+    issued_at: datetime
+    batch_id: str
+    invoice: dict[str, Any] = field(default_factory=dict)
+    factus_payload: dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+    retry_id: int | None = None
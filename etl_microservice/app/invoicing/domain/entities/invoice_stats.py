@@ -0,0 +1,11 @@
+from dataclasses import dataclass
+from decimal import Decimal
+
+
+@dataclass(frozen=True, slots=True)
+class InvoiceStats:
+    currency: str | None
+    status: str | None
+    invoice_count: int
+    total: Decimal
+    tax_amount: Decimal
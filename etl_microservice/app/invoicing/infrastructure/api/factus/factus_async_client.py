@@ -1,12 +1,61 @@
+import asyncio
+import contextlib
+import json
+import logging
 from datetime import UTC, datetime, timedelta
+from email.utils import parsedate_to_datetime
+from time import monotonic
 from typing import Any
 
 import httpx
 
+from app.shared.infrastructure.metrics.prometheus_metrics import (
+    FACTUS_HTTP_POOL_MAX_CONNECTIONS,
+    FACTUS_HTTP_REQUEST_SECONDS,
+    FACTUS_HTTP_REQUESTS_IN_FLIGHT,
+    FACTUS_RETRIES,
+)
+from app.shared.infrastructure.resilience.circuit_breaker import CircuitBreaker
+from app.shared.infrastructure.resilience.token_bucket import TokenBucketRateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=UTC)
+    return max((retry_at - datetime.now(UTC)).total_seconds(), 0.0)
+
+
+def _response_outcome(status_code: int) -> str:
+    if status_code == httpx.codes.TOO_MANY_REQUESTS:
+        return "rate_limited"
+    if status_code >= httpx.codes.INTERNAL_SERVER_ERROR:
+        return "server_error"
+    if status_code >= httpx.codes.BAD_REQUEST:
+        return "client_error"
+    return "success"
+
 
 class FactusAsyncClient:
     _DEFAULT_TOKEN_EXPIRY_SECONDS = 3600
     _TOKEN_EXPIRY_SAFETY_MARGIN_SECONDS = 30
+    _TOKEN_PROACTIVE_REFRESH_SECONDS = 120
+    _DEFAULT_RETRY_AFTER_SECONDS = 1.0
+    _MAX_RETRY_AFTER_SECONDS = 60.0
+    _NUMBERING_RANGE_REFRESH_AHEAD_RATIO = 0.2
+    _NUMBERING_RANGE_ERROR_STATUSES = frozenset({400, 409, 422})
+    _NUMBERING_RANGE_ERROR_MARKERS = ("numbering", "numeración", "numeracion")
 
     def __init__(
         self,
@@ -17,25 +66,96 @@ class FactusAsyncClient:
         client_secret: str,
         timeout: float = 10.0,
         transport: httpx.AsyncBaseTransport | None = None,
+        connect_timeout: float | None = None,
+        read_timeout: float | None = None,
+        write_timeout: float | None = None,
+        pool_timeout: float | None = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 5.0,
+        http2: bool = False,
+        requests_per_second: float | None = None,
+        rate_limit_burst: int | None = None,
+        max_rate_limit_retries: int = 3,
+        numbering_range_ttl_seconds: float | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
     ) -> None:
         self._email = email
         self._password = password
         self._client_id = client_id
         self._client_secret = client_secret
         self._http_client = httpx.AsyncClient(
-            base_url=base_url.rstrip("/"), timeout=timeout, transport=transport
+            base_url=base_url.rstrip("/"),
+            timeout=httpx.Timeout(
+                timeout,
+                connect=timeout if connect_timeout is None else connect_timeout,
+                read=timeout if read_timeout is None else read_timeout,
+                write=timeout if write_timeout is None else write_timeout,
+                pool=timeout if pool_timeout is None else pool_timeout,
+            ),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            http2=http2,
+            transport=transport,
+        )
+        FACTUS_HTTP_POOL_MAX_CONNECTIONS.set(max_connections)
+        self._rate_limiter = TokenBucketRateLimiter(
+            rate_per_second=requests_per_second, burst=rate_limit_burst
         )
+        self._max_rate_limit_retries = max_rate_limit_retries
+        self._circuit_breaker = circuit_breaker
         self._access_token: str | None = None
         self._token_expires_at: datetime | None = None
+        self._token_refresh: asyncio.Task[str] | None = None
+        self._numbering_range_ttl_seconds = numbering_range_ttl_seconds
+        self._numbering_range_id: int | None = None
+        self._numbering_range_loaded_at = 0.0
+        self._numbering_range_refresh: asyncio.Task[int] | None = None
 
     async def close(self) -> None:
+        for refresh in (self._token_refresh, self._numbering_range_refresh):
+            if refresh is None:
+                continue
+            refresh.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await refresh
         await self._http_client.aclose()
 
-    async def authenticate(self, force_refresh: bool = False) -> str:
-        if not force_refresh and self._access_token and self._token_expires_at:
-            if datetime.now(UTC) < self._token_expires_at:
-                return self._access_token
+    async def authenticate(
+        self, force_refresh: bool = False, stale_token: str | None = None
+    ) -> str:
+        """Returns a valid access token, sharing one OAuth request among concurrent callers.
+
+        ``stale_token`` is the token a caller saw rejected; a forced refresh is skipped
+        when another caller already replaced it. Tokens close to expiry are renewed in
+        the background while the current one keeps being served.
+        """
+        token = self._access_token
+        if token and self._token_expires_at:
+            remaining = (self._token_expires_at - datetime.now(UTC)).total_seconds()
+            if remaining > 0:
+                if not force_refresh:
+                    if remaining <= self._TOKEN_PROACTIVE_REFRESH_SECONDS:
+                        self._start_token_refresh()
+                    return token
+                if stale_token is not None and stale_token != token:
+                    return token
+        return await asyncio.shield(self._start_token_refresh())
 
+    def _start_token_refresh(self) -> asyncio.Task[str]:
+        refresh = self._token_refresh
+        if refresh is None or refresh.done():
+            refresh = asyncio.create_task(
+                self._request_access_token(), name="factus_token_refresh"
+            )
+            refresh.add_done_callback(self._log_background_refresh_failure)
+            self._token_refresh = refresh
+        return refresh
+
+    async def _request_access_token(self) -> str:
         missing_credentials = [
             name
             for name, value in (
@@ -52,7 +172,8 @@ class FactusAsyncClient:
                 + ", ".join(missing_credentials)
             )
 
-        response = await self._http_client.post(
+        response = await self._send(
+            "POST",
             "/oauth/token",
             data={
                 "email": self._email,
@@ -80,11 +201,51 @@ class FactusAsyncClient:
         return token
 
     async def get_active_numbering_range_id(self) -> int:
+        ttl = self._numbering_range_ttl_seconds
+        if ttl is None:
+            return await self._fetch_active_numbering_range_id()
+
+        age = monotonic() - self._numbering_range_loaded_at
+        if self._numbering_range_id is not None and age < ttl:
+            if age >= ttl * (1 - self._NUMBERING_RANGE_REFRESH_AHEAD_RATIO):
+                self._start_numbering_range_refresh()
+            return self._numbering_range_id
+        return await asyncio.shield(self._start_numbering_range_refresh())
+
+    def invalidate_numbering_range(self) -> None:
+        self._numbering_range_id = None
+
+    def _start_numbering_range_refresh(self) -> asyncio.Task[int]:
+        """Starts a numbering range reload unless one is already in flight."""
+        refresh = self._numbering_range_refresh
+        if refresh is None or refresh.done():
+            refresh = asyncio.create_task(
+                self._reload_numbering_range(), name="factus_numbering_range_refresh"
+            )
+            refresh.add_done_callback(self._log_background_refresh_failure)
+            self._numbering_range_refresh = refresh
+        return refresh
+
+    async def _reload_numbering_range(self) -> int:
+        range_id = await self._fetch_active_numbering_range_id()
+        self._numbering_range_id = range_id
+        self._numbering_range_loaded_at = monotonic()
+        return range_id
+
+    @staticmethod
+    def _log_background_refresh_failure(task: asyncio.Task[Any]) -> None:
+        if task.cancelled() or task.exception() is None:
+            return
+        logger.warning(
+            "factus_refresh_failed task=%s error=%s", task.get_name(), str(task.exception())
+        )
+
+    async def _fetch_active_numbering_range_id(self) -> int:
         token = await self.authenticate()
         response = await self._request_numbering_ranges(token)
 
         if response.status_code == httpx.codes.UNAUTHORIZED:
-            token = await self.authenticate(force_refresh=True)
+            token = await self.authenticate(force_refresh=True, stale_token=token)
             response = await self._request_numbering_ranges(token)
 
         response.raise_for_status()
@@ -113,7 +274,8 @@ class FactusAsyncClient:
         )
 
     async def _request_numbering_ranges(self, token: str) -> httpx.Response:
-        return await self._http_client.get(
+        return await self._send(
+            "GET",
             "/v1/numbering-ranges",
             headers={"Authorization": f"Bearer {token}"},
         )
@@ -121,19 +283,23 @@ class FactusAsyncClient:
     async def create_invoice(
         self, invoice_data: dict[str, Any], numbering_range_id: int
     ) -> dict[str, Any]:
-        token = await self.authenticate()
-        response = await self._request_create_invoice(
-            token=token,
-            payload={**invoice_data, "numbering_range_id": numbering_range_id},
+        return await self.create_encoded_invoice(
+            json.dumps({**invoice_data, "numbering_range_id": numbering_range_id}).encode(
+                "utf-8"
+            )
         )
 
+    async def create_encoded_invoice(self, body: bytes) -> dict[str, Any]:
+        """Creates an invoice from a JSON body that already carries ``numbering_range_id``."""
+        token = await self.authenticate()
+        response = await self._request_create_invoice(token=token, body=body)
+
         if response.status_code == httpx.codes.UNAUTHORIZED:
-            token = await self.authenticate(force_refresh=True)
-            response = await self._request_create_invoice(
-                token=token,
-                payload={**invoice_data, "numbering_range_id": numbering_range_id},
-            )
+            token = await self.authenticate(force_refresh=True, stale_token=token)
+            response = await self._request_create_invoice(token=token, body=body)
 
+        if self._is_numbering_range_rejection(response):
+            response = await self._resend_with_fresh_numbering_range(token, body, response)
         response.raise_for_status()
         payload = response.json()
         if not isinstance(payload, dict):
@@ -143,11 +309,97 @@ class FactusAsyncClient:
             )
         return payload
 
-    async def _request_create_invoice(
-        self, token: str, payload: dict[str, Any]
+    async def _resend_with_fresh_numbering_range(
+        self, token: str, body: bytes, rejection: httpx.Response
     ) -> httpx.Response:
-        return await self._http_client.post(
+        """Re-resolves the active range and resends once if it differs from the body's.
+
+        The body was encoded with the rejected range, so only re-encoding it can help.
+        """
+        invoice_data = json.loads(body)
+        stale_range_id = invoice_data.get("numbering_range_id")
+        # Concurrent rejections of the same range share one reload.
+        if self._numbering_range_id in (None, stale_range_id):
+            self.invalidate_numbering_range()
+        numbering_range_id = await self.get_active_numbering_range_id()
+        if numbering_range_id == stale_range_id:
+            return rejection
+        logger.warning(
+            "factus_numbering_range_rejected stale_range_id=%s numbering_range_id=%s",
+            stale_range_id,
+            numbering_range_id,
+        )
+        invoice_data["numbering_range_id"] = numbering_range_id
+        return await self._request_create_invoice(
+            token=token, body=json.dumps(invoice_data).encode("utf-8")
+        )
+
+    def _is_numbering_range_rejection(self, response: httpx.Response) -> bool:
+        if response.status_code not in self._NUMBERING_RANGE_ERROR_STATUSES:
+            return False
+        body = response.text.lower()
+        return any(marker in body for marker in self._NUMBERING_RANGE_ERROR_MARKERS)
+
+    async def _request_create_invoice(self, token: str, body: bytes) -> httpx.Response:
+        return await self._send(
+            "POST",
             "/v1/bills/validate",
-            headers={"Authorization": f"Bearer {token}"},
-            json=payload,
+            headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+            content=body,
+        )
+
+    async def _send(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Sends a rate-limited request, pausing every caller while Factus answers 429."""
+        attempt = 0
+        while True:
+            await self._rate_limiter.acquire()
+            response = await self._send_through_circuit_breaker(method, url, **kwargs)
+            if (
+                response.status_code != httpx.codes.TOO_MANY_REQUESTS
+                or attempt >= self._max_rate_limit_retries
+            ):
+                return response
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is None:
+                retry_after = self._DEFAULT_RETRY_AFTER_SECONDS * (2**attempt)
+            retry_after = min(retry_after, self._MAX_RETRY_AFTER_SECONDS)
+            logger.warning(
+                "factus_rate_limited url=%s attempt=%s retry_after=%.2fs",
+                url,
+                attempt + 1,
+                retry_after,
+            )
+            self._rate_limiter.pause_for(retry_after)
+            FACTUS_RETRIES.labels("rate_limited").inc()
+            attempt += 1
+
+    async def _send_through_circuit_breaker(
+        self, method: str, url: str, **kwargs: Any
+    ) -> httpx.Response:
+        breaker = self._circuit_breaker
+        if breaker is not None:
+            await breaker.before_call()
+        started_at = monotonic()
+        try:
+            with FACTUS_HTTP_REQUESTS_IN_FLIGHT.track_inprogress():
+                response = await self._http_client.request(method, url, **kwargs)
+        except httpx.TransportError as exc:
+            FACTUS_HTTP_REQUEST_SECONDS.labels(
+                url, "timeout" if isinstance(exc, httpx.TimeoutException) else "transport_error"
+            ).observe(monotonic() - started_at)
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        except BaseException:
+            if breaker is not None:
+                breaker.record_ignored()
+            raise
+        FACTUS_HTTP_REQUEST_SECONDS.labels(url, _response_outcome(response.status_code)).observe(
+            monotonic() - started_at
         )
+        if breaker is not None:
+            if response.status_code >= httpx.codes.INTERNAL_SERVER_ERROR:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        return response
@@ -0,0 +1,53 @@
+from typing import Any
+
+import polars as pl
+
+_DEFAULT_CUSTOMER_IDENTIFICATION = "UNKNOWN"
+_DEFAULT_ITEM_CODE = "ITEM-1"
+_DEFAULT_ITEM_DESCRIPTION = "Invoice"
+
+
+def factus_invoice_payload_expr(batch_id: str) -> pl.Expr:
+    """Builds the Factus ``/v1/bills/validate`` body of every invoice row as a struct."""
+    external_id = pl.col("external_id").cast(pl.Utf8).fill_null("")
+    customer_id = pl.col("customer_id").cast(pl.Utf8).fill_null("")
+    has_external_id = external_id != ""
+    return pl.struct(
+        external_id.alias("reference_code"),
+        pl.lit(f"batch:{batch_id}").alias("observation"),
+        pl.col("issued_at").dt.strftime("%Y-%m-%d").alias("issue_date"),
+        pl.struct(
+            pl.when(customer_id != "")
+            .then(customer_id)
+            .otherwise(pl.lit(_DEFAULT_CUSTOMER_IDENTIFICATION))
+            .alias("identification")
+        ).alias("customer"),
+        pl.concat_list(
+            pl.struct(
+                pl.when(has_external_id)
+                .then(external_id)
+                .otherwise(pl.lit(_DEFAULT_ITEM_CODE))
+                .alias("code"),
+                pl.when(has_external_id)
+                .then(pl.lit(f"{_DEFAULT_ITEM_DESCRIPTION} ") + external_id)
+                .otherwise(pl.lit(_DEFAULT_ITEM_DESCRIPTION))
+                .alias("description"),
+                pl.lit(1).alias("quantity"),
+                pl.col("total").cast(pl.Float64).fill_null(0.0).alias("price"),
+            )
+        ).alias("items"),
+    )
+
+
+def encode_factus_invoice_bodies(
+    df: pl.DataFrame, batch_id: str, numbering_range_id: int
+) -> list[bytes]:
+    """Serializes every row's Factus request body, numbering range included, in bulk."""
+    payload = factus_invoice_payload_expr(batch_id).struct.with_fields(
+        pl.lit(numbering_range_id).alias("numbering_range_id")
+    )
+    return df.select(payload.struct.json_encode().cast(pl.Binary)).to_series().to_list()
+
+
+def build_factus_invoice_payloads(df: pl.DataFrame, batch_id: str) -> list[dict[str, Any]]:
+    return df.select(factus_invoice_payload_expr(batch_id)).to_series().to_list()
@@ -0,0 +1,97 @@
+import io
+import json
+from dataclasses import dataclass
+from uuid import uuid4
+
+import polars as pl
+
+from app.invoicing.domain.entities.invoice_batch import InvoiceBatch
+from app.invoicing.infrastructure.etl.polars_transformer import (
+    SOURCE_COLUMNS,
+    invoices_to_frame,
+)
+
+# Every field is read as text so mixed JSON types never break the schema; the typed
+# columns are parsed afterwards with vectorized casts.
+_MESSAGE_SCHEMA: dict[str, pl.DataType] = {
+    "batch_id": pl.Utf8(),
+    "payload": pl.Struct(
+        {
+            "invoices": pl.List(
+                pl.Struct({column: pl.Utf8 for column in SOURCE_COLUMNS})
+            )
+        }
+    ),
+}
+_ISSUED_AT_FORMATS = ("%Y-%m-%dT%H:%M:%S%.f%:z", "%Y-%m-%dT%H:%M:%S%.f", "%Y-%m-%d")
+
+
+@dataclass(frozen=True, slots=True)
+class DecodedInvoiceBatch:
+    batch_id: str
+    invoices: pl.DataFrame
+
+
+def decode_invoice_batch(message: bytes) -> DecodedInvoiceBatch:
+    """Parses a Kafka message straight into a frame of source invoice columns.
+
+    Messages that do not fit the canonical ``{"batch_id", "payload": {"invoices": [...]}}``
+    shape go through ``InvoiceBatch.from_message`` instead, which accepts the legacy
+    shapes and raises the same validation errors as before.
+    """
+    try:
+        message_df = pl.read_json(io.BytesIO(message), schema=_MESSAGE_SCHEMA)
+    except pl.exceptions.PolarsError:
+        return _decode_via_entities(message)
+
+    payload = message_df.get_column("payload")
+    if message_df.height != 1 or payload.is_null().any():
+        return _decode_via_entities(message)
+    invoices = payload.struct.field("invoices")
+    if invoices.is_null().any():
+        return _decode_via_entities(message)
+
+    batch_id = message_df.get_column("batch_id").item() or str(uuid4())
+    if invoices.list.len().item() == 0:
+        return DecodedInvoiceBatch(batch_id=batch_id, invoices=pl.DataFrame())
+    invoice_structs = invoices.explode()
+    if invoice_structs.is_null().any():
+        return _decode_via_entities(message)
+
+    invoices_df = invoice_structs.struct.unnest()
+    issued_at = _parse_issued_at(invoices_df.get_column("issued_at"))
+    # Reading as text erases the JSON types the entity path depends on: a missing id
+    # becomes "" but a null one "None", and a numeric issued_at is dropped while a bad
+    # string raises. Messages with null ids or unparsed dates are decoded like before.
+    if issued_at is None or invoices_df.get_column("external_id").has_nulls():
+        return _decode_via_entities(message)
+    return DecodedInvoiceBatch(
+        batch_id=batch_id,
+        invoices=invoices_df.with_columns(
+            issued_at,
+            pl.col("total").cast(pl.Float64, strict=False),
+        ),
+    )
+
+
+def _parse_issued_at(raw: pl.Series) -> pl.Series | None:
+    """Parses the common ISO formats, or returns ``None`` if any value needs the entity path."""
+    normalized = raw.str.replace(r"Z$", "+00:00")
+    parsed = pl.select(
+        pl.coalesce(
+            normalized.str.to_datetime(
+                issued_at_format, strict=False, time_zone="UTC", time_unit="us"
+            )
+            for issued_at_format in _ISSUED_AT_FORMATS
+        )
+    ).to_series()
+    if (parsed.is_null() & raw.is_not_null()).any():
+        return None
+    return parsed.alias("issued_at")
+
+
+def _decode_via_entities(message: bytes) -> DecodedInvoiceBatch:
+    batch = InvoiceBatch.from_message(json.loads(message.decode("utf-8")))
+    return DecodedInvoiceBatch(
+        batch_id=batch.batch_id, invoices=invoices_to_frame(batch.invoices)
+    )
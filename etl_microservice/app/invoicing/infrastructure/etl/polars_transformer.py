@@ -6,6 +6,8 @@ import polars as pl
 from app.invoicing.domain.entities.invoice import Invoice
 
 TAX_RATE = 0.19
+# invoices.total is NUMERIC(18, 2), so larger totals could never be stored.
+MAX_ABS_TOTAL = 10.0**16
 INVOICE_COLUMNS = [
     "external_id",
     "customer_id",
@@ -19,11 +21,15 @@ INVOICE_COLUMNS = [
     "status",
     "error_message",
 ]
+SOURCE_COLUMNS = ("external_id", "customer_id", "issued_at", "total", "currency")
 logger = logging.getLogger(__name__)
 
 
 def transform_invoices(invoices: tuple[Invoice, ...], batch_id: str = "unknown") -> pl.DataFrame:
-    started_at = perf_counter()
+    return transform_invoice_frame(invoices_to_frame(invoices), batch_id)
+
+
+def invoices_to_frame(invoices: tuple[Invoice, ...]) -> pl.DataFrame:
     rows = [
         {
             "external_id": invoice.external_id,
@@ -34,13 +40,24 @@ def transform_invoices(invoices: tuple[Invoice, ...], batch_id: str = "unknown")
         }
         for invoice in invoices
     ]
+    return pl.DataFrame(rows)
 
-    df = pl.DataFrame(rows)
-    for column in ("external_id", "customer_id", "issued_at", "total", "currency"):
+
+def transform_invoice_frame(df: pl.DataFrame, batch_id: str = "unknown") -> pl.DataFrame:
+    started_at = perf_counter()
+    rows_in = df.height
+    for column in SOURCE_COLUMNS:
         if column not in df.columns:
             df = df.with_columns(pl.lit(None).alias(column))
 
     total_column = pl.col("total").cast(pl.Float64, strict=False)
+    # Totals that cannot be stored are dropped here with the other invalid rows, before
+    # anything is sent to Factus, rather than failing the whole batch once it is persisted.
+    total_column = (
+        pl.when(total_column.is_finite() & (total_column.abs() < MAX_ABS_TOTAL))
+        .then(total_column)
+        .otherwise(None)
+    )
     df = df.with_columns(
         pl.col("issued_at").cast(pl.Datetime(time_zone="UTC"), strict=False),
         total_column.alias("total"),
@@ -50,7 +67,7 @@ def transform_invoices(invoices: tuple[Invoice, ...], batch_id: str = "unknown")
     elapsed_ms = (perf_counter() - started_at) * 1000
     logger.info(
         "etl_transform_completed rows_in=%s rows_out=%s elapsed_ms=%.2f",
-        len(invoices),
+        rows_in,
         df.height,
         elapsed_ms,
         extra={"batch_id": batch_id},
@@ -0,0 +1,135 @@
+from collections.abc import Awaitable
+from datetime import date, datetime
+from time import monotonic
+from typing import NamedTuple
+
+import polars as pl
+
+from app.invoicing.application.ports.invoice_repository_port import (
+    InvoiceRepositoryPort,
+)
+from app.invoicing.domain.entities.invoice_page import InvoiceCursor, InvoicePage
+from app.invoicing.domain.entities.invoice_stats import InvoiceStats
+from app.shared.infrastructure.caching.async_lru_cache import AsyncLruTtlCache
+
+
+class _InvoiceQueryKey(NamedTuple):
+    customer_id: str | None
+    issued_from: datetime | None
+    issued_to: datetime | None
+    after: InvoiceCursor | None
+    limit: int
+
+
+class CachedInvoiceRepository:
+    """Read-through cache in front of an invoice repository.
+
+    Pages are cached per query arguments. Every write through this repository drops the
+    pages of the customers it touched, plus the unfiltered pages, once the write is done.
+
+    Reads may be served by a replica that lags behind the primary the writes go to. For
+    ``replica_lag_seconds`` after a write, the pages it invalidated are read straight from
+    the repository and not cached, so a lagging replica cannot refill the cache with the
+    page the write replaced for a whole TTL.
+    """
+
+    def __init__(
+        self,
+        repository: InvoiceRepositoryPort,
+        max_entries: int = 1024,
+        ttl_seconds: float = 5.0,
+        replica_lag_seconds: float = 0.0,
+    ) -> None:
+        if replica_lag_seconds < 0:
+            raise ValueError("replica_lag_seconds must not be negative")
+        self._repository = repository
+        self._cache: AsyncLruTtlCache[_InvoiceQueryKey, InvoicePage] = AsyncLruTtlCache(
+            max_entries=max_entries, ttl_seconds=ttl_seconds, name="invoice_queries"
+        )
+        self._replica_lag_seconds = replica_lag_seconds
+        # Monotonic deadlines until which pages must bypass the cache, per customer and
+        # for the unfiltered pages, which every write touches.
+        self._uncached_customers_until: dict[str | None, float] = {}
+        self._uncached_until = 0.0
+
+    async def save_dataframe(self, df: pl.DataFrame) -> None:
+        try:
+            await self._repository.save_dataframe(df)
+        finally:
+            self._invalidate_customers(df)
+
+    async def upsert_dataframe(self, df: pl.DataFrame) -> None:
+        try:
+            await self._repository.upsert_dataframe(df)
+        finally:
+            self._invalidate_customers(df)
+
+    async def fetch_succeeded_external_ids(self, df: pl.DataFrame) -> set[str]:
+        return await self._repository.fetch_succeeded_external_ids(df)
+
+    async def fetch_invoices(
+        self,
+        customer_id: str | None = None,
+        issued_from: datetime | None = None,
+        issued_to: datetime | None = None,
+        after: InvoiceCursor | None = None,
+        limit: int = 50,
+    ) -> InvoicePage:
+        key = _InvoiceQueryKey(customer_id or None, issued_from, issued_to, after, limit)
+
+        def load() -> Awaitable[InvoicePage]:
+            return self._repository.fetch_invoices(
+                customer_id=key.customer_id,
+                issued_from=issued_from,
+                issued_to=issued_to,
+                after=after,
+                limit=limit,
+            )
+
+        if self._is_recently_written(key.customer_id):
+            return await load()
+        return await self._cache.get_or_load(key, load)
+
+    async def fetch_invoice_stats(
+        self,
+        customer_id: str | None = None,
+        issued_from: date | None = None,
+        issued_to: date | None = None,
+    ) -> list[InvoiceStats]:
+        # Rollups are already a constant-size read, so they bypass the page cache.
+        return await self._repository.fetch_invoice_stats(
+            customer_id=customer_id, issued_from=issued_from, issued_to=issued_to
+        )
+
+    def _invalidate_customers(self, df: pl.DataFrame) -> None:
+        if df.is_empty():
+            return
+        if "customer_id" not in df.columns:
+            customers: set[str | None] = set()
+        else:
+            customers = set(df.get_column("customer_id").cast(pl.Utf8).unique().to_list())
+        self._cache.invalidate(
+            lambda key: key.customer_id is None or key.customer_id in customers
+        )
+        if self._replica_lag_seconds > 0:
+            self._hold_off_caching(customers)
+
+    def _hold_off_caching(self, customers: set[str | None]) -> None:
+        now = monotonic()
+        uncached_until = now + self._replica_lag_seconds
+        self._uncached_until = uncached_until
+        # Expired deadlines are dropped here, so the map only holds recent writers.
+        self._uncached_customers_until = {
+            customer_id: deadline
+            for customer_id, deadline in self._uncached_customers_until.items()
+            if deadline > now
+        }
+        for customer_id in customers:
+            self._uncached_customers_until[customer_id] = uncached_until
+
+    def _is_recently_written(self, customer_id: str | None) -> bool:
+        if customer_id is None:
+            deadline = self._uncached_until
+        else:
+            deadline = self._uncached_customers_until.get(customer_id, 0.0)
+        return monotonic() < deadline
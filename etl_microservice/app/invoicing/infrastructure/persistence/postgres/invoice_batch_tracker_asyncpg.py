@@ -0,0 +1,88 @@
+from typing import Any
+
+import asyncpg  # type: ignore[import-untyped]
+
+from app.invoicing.domain.entities.invoice_batch_status import (
+    BATCH_STAGE_RECEIVED,
+    InvoiceBatchStatus,
+)
+
+_BATCH_COLUMNS = (
+    "batch_id, stage, invoice_count, transformed_count, succeeded_count, failed_count, "
+    "pending_retry_count, error_message, received_at, updated_at"
+)
+# A redelivered batch starts over, so its counters describe the latest attempt only.
+_MARK_RECEIVED_SQL = (
+    "INSERT INTO invoice_batches (batch_id, stage, invoice_count) VALUES ($1, $2, $3) "
+    "ON CONFLICT (batch_id) DO UPDATE SET stage = EXCLUDED.stage, "
+    "invoice_count = EXCLUDED.invoice_count, transformed_count = NULL, succeeded_count = 0, "
+    "failed_count = 0, pending_retry_count = 0, error_message = NULL, "
+    "received_at = now(), updated_at = now() "
+    f"RETURNING {_BATCH_COLUMNS}"
+)
+_MARK_STAGE_SQL = (
+    "UPDATE invoice_batches SET stage = $2, "
+    "transformed_count = COALESCE($3, transformed_count), "
+    "error_message = COALESCE($4, error_message), updated_at = now() "
+    f"WHERE batch_id = $1 RETURNING {_BATCH_COLUMNS}"
+)
+_RECORD_RESULTS_SQL = (
+    "UPDATE invoice_batches SET succeeded_count = succeeded_count + $2, "
+    "failed_count = failed_count + $3, "
+    "pending_retry_count = GREATEST(pending_retry_count + $4, 0), updated_at = now() "
+    f"WHERE batch_id = $1 RETURNING {_BATCH_COLUMNS}"
+)
+_FETCH_SQL = f"SELECT {_BATCH_COLUMNS} FROM invoice_batches WHERE batch_id = $1"
+
+
+class InvoiceBatchTrackerAsyncpg:
+    def __init__(self, db_pool: asyncpg.Pool, read_pool: asyncpg.Pool | None = None) -> None:
+        self._db_pool = db_pool
+        self._read_pool = read_pool or db_pool
+
+    async def mark_stage(
+        self,
+        batch_id: str,
+        stage: str,
+        invoice_count: int | None = None,
+        transformed_count: int | None = None,
+        error: str | None = None,
+    ) -> InvoiceBatchStatus | None:
+        if stage == BATCH_STAGE_RECEIVED:
+            return await self._fetch_one(
+                self._db_pool, _MARK_RECEIVED_SQL, batch_id, stage, invoice_count or 0
+            )
+        return await self._fetch_one(
+            self._db_pool, _MARK_STAGE_SQL, batch_id, stage, transformed_count, error
+        )
+
+    async def record_results(
+        self, batch_id: str, succeeded: int, failed: int, pending_retry: int
+    ) -> InvoiceBatchStatus | None:
+        return await self._fetch_one(
+            self._db_pool, _RECORD_RESULTS_SQL, batch_id, succeeded, failed, pending_retry
+        )
+
+    async def fetch_batch_status(self, batch_id: str) -> InvoiceBatchStatus | None:
+        return await self._fetch_one(self._read_pool, _FETCH_SQL, batch_id)
+
+    @staticmethod
+    async def _fetch_one(
+        pool: asyncpg.Pool, query: str, *args: Any
+    ) -> InvoiceBatchStatus | None:
+        async with pool.acquire() as connection:
+            row = await connection.fetchrow(query, *args)
+        if row is None:
+            return None
+        return InvoiceBatchStatus(
+            batch_id=row["batch_id"],
+            stage=row["stage"],
+            invoice_count=row["invoice_count"],
+            transformed_count=row["transformed_count"],
+            succeeded_count=row["succeeded_count"],
+            failed_count=row["failed_count"],
+            pending_retry_count=row["pending_retry_count"],
+            error_message=row["error_message"],
+            received_at=row["received_at"],
+            updated_at=row["updated_at"],
+        )
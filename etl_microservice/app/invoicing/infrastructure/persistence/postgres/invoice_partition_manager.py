@@ -0,0 +1,141 @@
+import logging
+from datetime import UTC, date, datetime
+
+import asyncpg  # type: ignore[import-untyped]
+
+from app.shared.infrastructure.metrics.prometheus_metrics import (
+    INVOICE_PARTITION_DEFAULT_ROWS,
+    INVOICE_PARTITION_MONTHS_AHEAD,
+)
+
+logger = logging.getLogger(__name__)
+
+_PARENT_TABLE = "invoices"
+_DEFAULT_PARTITION = "invoices_default"
+# Arbitrary application-wide key, so only one ETL replica maintains partitions at a time.
+_ADVISORY_LOCK_KEY = 0x1A7E_2026
+
+_LIST_PARTITIONS_SQL = (
+    "SELECT child.relname FROM pg_inherits "
+    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+    f"WHERE pg_inherits.inhparent = '{_PARENT_TABLE}'::regclass"
+)
+_DEFAULT_MONTHS_SQL = (
+    "SELECT DISTINCT date_trunc('month', issued_at AT TIME ZONE 'UTC')::date AS month "
+    f"FROM {_DEFAULT_PARTITION}"
+)
+_COUNT_DEFAULT_ROWS_SQL = f"SELECT count(*) FROM {_DEFAULT_PARTITION}"
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{_PARENT_TABLE}_{month:%Y_%m}"
+
+
+def _bound_literal(month: date) -> str:
+    # Bounds come from date objects only, so formatting them into DDL is safe.
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+class InvoicePartitionManagerAsyncpg:
+    """Keeps monthly ``invoices`` partitions ahead of the data.
+
+    Each run creates the partitions for the current month and ``months_ahead`` more,
+    then moves any rows parked in ``invoices_default`` into their own monthly partition.
+    A month found in the default partition is built as a plain table, filled from the
+    default partition and attached in one transaction, with a matching CHECK constraint
+    so the attach does not rescan it.
+    """
+
+    def __init__(self, db_pool: asyncpg.Pool, months_ahead: int = 3) -> None:
+        if months_ahead < 0:
+            raise ValueError("months_ahead must not be negative")
+        self._db_pool = db_pool
+        self._months_ahead = months_ahead
+
+    async def maintain(self, today: date | None = None) -> list[str]:
+        """Runs one maintenance pass and returns the partitions it created."""
+        current_month = _month_start(today or datetime.now(UTC).date())
+        async with self._db_pool.acquire() as connection:
+            if not await connection.fetchval("SELECT pg_try_advisory_lock($1)", _ADVISORY_LOCK_KEY):
+                logger.info("invoice_partition_maintenance_skipped reason=locked")
+                return []
+            try:
+                return await self._maintain(connection, current_month)
+            finally:
+                await connection.execute("SELECT pg_advisory_unlock($1)", _ADVISORY_LOCK_KEY)
+
+    async def _maintain(self, connection: asyncpg.Connection, current_month: date) -> list[str]:
+        existing = {row["relname"] for row in await connection.fetch(_LIST_PARTITIONS_SQL)}
+        created: list[str] = []
+
+        for row in await connection.fetch(_DEFAULT_MONTHS_SQL):
+            month = row["month"]
+            if partition_name(month) not in existing:
+                moved = await self._move_default_rows(connection, month)
+                existing.add(partition_name(month))
+                created.append(partition_name(month))
+                logger.info(
+                    "invoice_partition_backfilled partition=%s rows_moved=%s",
+                    partition_name(month),
+                    moved,
+                )
+
+        for offset in range(self._months_ahead + 1):
+            month = _add_months(current_month, offset)
+            if partition_name(month) not in existing:
+                await self._create_partition(connection, month)
+                existing.add(partition_name(month))
+                created.append(partition_name(month))
+                logger.info("invoice_partition_created partition=%s", partition_name(month))
+
+        months_ahead = 0
+        while partition_name(_add_months(current_month, months_ahead + 1)) in existing:
+            months_ahead += 1
+        INVOICE_PARTITION_MONTHS_AHEAD.set(
+            months_ahead if partition_name(current_month) in existing else -1
+        )
+        INVOICE_PARTITION_DEFAULT_ROWS.set(await connection.fetchval(_COUNT_DEFAULT_ROWS_SQL))
+        return created
+
+    @staticmethod
+    async def _create_partition(connection: asyncpg.Connection, month: date) -> None:
+        await connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {_PARENT_TABLE} "
+            f"FOR VALUES FROM ({_bound_literal(month)}) "
+            f"TO ({_bound_literal(_add_months(month, 1))})"
+        )
+
+    @staticmethod
+    async def _move_default_rows(connection: asyncpg.Connection, month: date) -> int:
+        name = partition_name(month)
+        lower, upper = _bound_literal(month), _bound_literal(_add_months(month, 1))
+        bounds_check = f"issued_at >= {lower} AND issued_at < {upper}"
+        async with connection.transaction():
+            # Blocks inserts into the default partition until the month is attached, so no
+            # new row for it can land there between the move and the attach.
+            await connection.execute(f"LOCK TABLE {_DEFAULT_PARTITION} IN SHARE MODE")
+            await connection.execute(
+                f"CREATE TABLE {name} (LIKE {_PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+            await connection.execute(
+                f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds CHECK ({bounds_check})"
+            )
+            status = await connection.execute(
+                f"WITH moved AS (DELETE FROM {_DEFAULT_PARTITION} WHERE {bounds_check} "
+                f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+            )
+            await connection.execute(
+                f"ALTER TABLE {_PARENT_TABLE} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ({lower}) TO ({upper})"
+            )
+            await connection.execute(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds")
+        return int(status.rsplit(" ", 1)[-1])
@@ -1,47 +1,271 @@
+import asyncio
+from datetime import date, datetime
+from decimal import Decimal
+from time import perf_counter
+from typing import Any
+
 import asyncpg  # type: ignore[import-untyped]
+import numpy as np
 import polars as pl
 
 from app.invoicing.domain.entities.invoice import Invoice
+from app.invoicing.domain.entities.invoice_page import InvoiceCursor, InvoicePage
+from app.invoicing.domain.entities.invoice_stats import InvoiceStats
 from app.invoicing.infrastructure.etl.polars_transformer import INVOICE_COLUMNS
+from app.invoicing.infrastructure.persistence.postgres.binary_copy import (
+    PgCopyType,
+    encode_binary_copy,
+    iter_copy_chunks,
+    to_cents,
+)
+from app.shared.infrastructure.metrics.prometheus_metrics import (
+    INVOICE_COPY_ROWS,
+    INVOICE_COPY_SECONDS,
+    INVOICE_PIPELINE_STAGE_SECONDS,
+)
+
+WRITE_MODE_COPY = "copy"
+WRITE_MODE_UPSERT = "upsert"
+
+_STAGING_TABLE = "invoices_staging"
+_INVOICE_NON_TEXT_COPY_TYPES: dict[str, PgCopyType] = {
+    "issued_at": "timestamptz",
+    "total": "numeric",
+    "tax_amount": "numeric",
+}
+INVOICE_COPY_TYPES: dict[str, PgCopyType] = {
+    column: _INVOICE_NON_TEXT_COPY_TYPES.get(column, "text") for column in INVOICE_COLUMNS
+}
+_INVOICE_KEY_COLUMNS = ("external_id", "issued_at")
+_INVOICE_VALUE_COLUMNS = [
+    column for column in INVOICE_COLUMNS if column not in _INVOICE_KEY_COLUMNS
+]
+
+# Invoices Factus accepted are final: a redelivered batch must not overwrite them with the
+# duplicate rejection Factus answers on the second attempt.
+_FINAL_STATUS = "success"
+_CREATE_STAGING_TABLE_SQL = (
+    f"CREATE TEMP TABLE IF NOT EXISTS {_STAGING_TABLE} "
+    "(LIKE invoices INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+)
+# Later duplicates of the same key inside one batch win, as they would with sequential writes.
+_MERGE_STAGING_SQL = (
+    f"INSERT INTO invoices ({', '.join(INVOICE_COLUMNS)}) "
+    f"SELECT DISTINCT ON ({', '.join(_INVOICE_KEY_COLUMNS)}) {', '.join(INVOICE_COLUMNS)} "
+    f"FROM {_STAGING_TABLE} "
+    f"ORDER BY {', '.join(_INVOICE_KEY_COLUMNS)}, ctid DESC "
+    f"ON CONFLICT ({', '.join(_INVOICE_KEY_COLUMNS)}) DO UPDATE SET "
+    + ", ".join(f"{column} = EXCLUDED.{column}" for column in _INVOICE_VALUE_COLUMNS)
+    + " WHERE ("
+    + ", ".join(f"invoices.{column}" for column in _INVOICE_VALUE_COLUMNS)
+    + ") IS DISTINCT FROM ("
+    + ", ".join(f"EXCLUDED.{column}" for column in _INVOICE_VALUE_COLUMNS)
+    + f") AND invoices.status IS DISTINCT FROM '{_FINAL_STATUS}'"
+)
+_FETCH_SUCCEEDED_SQL = (
+    f"SELECT external_id FROM invoices WHERE status = '{_FINAL_STATUS}' "
+    f"AND ({', '.join(_INVOICE_KEY_COLUMNS)}) IN "
+    "(SELECT * FROM unnest($1::text[], $2::timestamptz[]))"
+)
+
+_ROLLUP_TABLE = "invoice_daily_rollups"
+_ROLLUP_KEY_COLUMNS = ("customer_id", "day", "currency", "status")
+# Rollup key columns are NOT NULL, so missing values are bucketed under ''.
+_ROLLUP_KEY_SQL = (
+    "COALESCE(customer_id, ''), (issued_at AT TIME ZONE 'UTC')::date, "
+    "COALESCE(currency, ''), COALESCE(status, '')"
+)
+_ROLLUP_ON_CONFLICT_SQL = (
+    f"ON CONFLICT ({', '.join(_ROLLUP_KEY_COLUMNS)}) DO UPDATE SET "
+    f"invoice_count = {_ROLLUP_TABLE}.invoice_count + EXCLUDED.invoice_count, "
+    f"total = {_ROLLUP_TABLE}.total + EXCLUDED.total, "
+    f"tax_amount = {_ROLLUP_TABLE}.tax_amount + EXCLUDED.tax_amount"
+)
+_ROLLUP_INSERT_SQL = (
+    f"INSERT INTO {_ROLLUP_TABLE} "
+    f"({', '.join(_ROLLUP_KEY_COLUMNS)}, invoice_count, total, tax_amount) "
+)
+# Serialises merges of the same invoice across transactions. Row locks cannot cover a key
+# that does not exist yet, so without this two batches inserting the same new invoice
+# would both count it as new in the rollups. Keys are hashed into a fixed number of
+# buckets, so a batch of any size holds at most that many locks and cannot exhaust the
+# shared lock table. Buckets are locked in order, so concurrent batches cannot deadlock
+# on them, and are released at commit.
+_INVOICE_KEY_LOCK_CLASS = 0x1A7E_2027
+_INVOICE_KEY_LOCK_BUCKETS = 1024
+_LOCK_STAGED_KEYS_SQL = (
+    f"SELECT pg_advisory_xact_lock({_INVOICE_KEY_LOCK_CLASS}, bucket) FROM ("
+    f"SELECT DISTINCT hashtext(external_id) & {_INVOICE_KEY_LOCK_BUCKETS - 1} AS bucket "
+    f"FROM {_STAGING_TABLE} ORDER BY bucket"
+    ") AS buckets"
+)
+# Runs after the key locks and before the merge: every staged row adds itself to its
+# rollup and every row it is about to replace is taken back out. Keys whose stored row
+# already succeeded are left alone on both sides, as the merge will not touch them.
+# Deltas are applied in key order so concurrent batches lock rollup rows in the same order.
+_APPLY_STAGING_ROLLUP_SQL = (
+    "WITH incoming AS ("
+    f"SELECT DISTINCT ON ({', '.join(_INVOICE_KEY_COLUMNS)}) * FROM {_STAGING_TABLE} "
+    f"ORDER BY {', '.join(_INVOICE_KEY_COLUMNS)}, ctid DESC"
+    "), previous AS ("
+    "SELECT invoices.external_id, invoices.customer_id, invoices.issued_at, "
+    "invoices.currency, invoices.status, invoices.total, invoices.tax_amount "
+    f"FROM invoices JOIN incoming USING ({', '.join(_INVOICE_KEY_COLUMNS)}) "
+    "FOR UPDATE OF invoices"
+    "), deltas AS ("
+    "SELECT customer_id, issued_at, currency, status, 1 AS invoice_count, total, tax_amount "
+    "FROM incoming WHERE NOT EXISTS (SELECT 1 FROM previous "
+    "WHERE previous.external_id = incoming.external_id "
+    f"AND previous.issued_at = incoming.issued_at AND previous.status = '{_FINAL_STATUS}') "
+    "UNION ALL "
+    "SELECT customer_id, issued_at, currency, status, -1, -total, -tax_amount FROM previous "
+    f"WHERE status IS DISTINCT FROM '{_FINAL_STATUS}'"
+    ") "
+    + _ROLLUP_INSERT_SQL
+    + f"SELECT {_ROLLUP_KEY_SQL}, sum(invoice_count), "
+    "COALESCE(sum(total), 0), COALESCE(sum(tax_amount), 0) "
+    "FROM deltas GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4 "
+    + _ROLLUP_ON_CONFLICT_SQL
+)
+_APPLY_ROLLUP_DELTAS_SQL = (
+    _ROLLUP_INSERT_SQL
+    + "SELECT * FROM unnest($1::text[], $2::date[], $3::text[], $4::text[], "
+    "$5::bigint[], $6::numeric[], $7::numeric[]) "
+    + _ROLLUP_ON_CONFLICT_SQL
+)
 
 
 class InvoiceRepositoryAsyncpg:
-    def __init__(self, db_pool: asyncpg.Pool) -> None:
+    def __init__(
+        self,
+        db_pool: asyncpg.Pool,
+        write_mode: str = WRITE_MODE_UPSERT,
+        read_pool: asyncpg.Pool | None = None,
+    ) -> None:
+        if write_mode not in (WRITE_MODE_COPY, WRITE_MODE_UPSERT):
+            raise ValueError(f"Unsupported invoice write mode: {write_mode}")
         self._db_pool = db_pool
+        self._read_pool = read_pool or db_pool
+        self._write_mode = write_mode
 
     async def save_dataframe(self, df: pl.DataFrame) -> None:
         if df.is_empty():
             return
+        if self._write_mode == WRITE_MODE_UPSERT:
+            await self.upsert_dataframe(df)
+            return
+
+        copy_buffer = await self._encode_invoices(df)
+        rollup_deltas = _rollup_deltas(df)
+        async with self._db_pool.acquire() as connection:
+            started_at = perf_counter()
+            async with connection.transaction():
+                await self._copy_invoices(connection, "invoices", copy_buffer)
+                await connection.execute(_APPLY_ROLLUP_DELTAS_SQL, *rollup_deltas)
+            self._observe_copy(WRITE_MODE_COPY, df.height, started_at)
+
+    async def upsert_dataframe(self, df: pl.DataFrame) -> None:
+        """Merges rows into ``invoices`` regardless of the configured write mode."""
+        if df.is_empty():
+            return
+
+        copy_buffer = await self._encode_invoices(df)
+        async with self._db_pool.acquire() as connection:
+            started_at = perf_counter()
+            async with connection.transaction():
+                await connection.execute(_CREATE_STAGING_TABLE_SQL)
+                await self._copy_invoices(connection, _STAGING_TABLE, copy_buffer)
+                await connection.execute(_LOCK_STAGED_KEYS_SQL)
+                await connection.execute(_APPLY_STAGING_ROLLUP_SQL)
+                await connection.execute(_MERGE_STAGING_SQL)
+            self._observe_copy(WRITE_MODE_UPSERT, df.height, started_at)
 
+    @staticmethod
+    def _observe_copy(mode: str, rows: int, started_at: float) -> None:
+        """Records a committed write; time spent waiting for the pool is not included."""
+        INVOICE_COPY_SECONDS.labels(mode).observe(perf_counter() - started_at)
+        INVOICE_COPY_ROWS.labels(mode).inc(rows)
+
+    @staticmethod
+    async def _encode_invoices(df: pl.DataFrame) -> np.ndarray:
         df_to_save = df
         for column in INVOICE_COLUMNS:
             if column not in df_to_save.columns:
                 df_to_save = df_to_save.with_columns(pl.lit(None).alias(column))
+        with INVOICE_PIPELINE_STAGE_SECONDS.labels("copy_encode").time():
+            return await asyncio.to_thread(encode_binary_copy, df_to_save, INVOICE_COPY_TYPES)
+
+    @staticmethod
+    async def _copy_invoices(
+        connection: asyncpg.Connection, table_name: str, copy_buffer: np.ndarray
+    ) -> None:
+        await connection.copy_to_table(
+            table_name,
+            source=iter_copy_chunks(copy_buffer),
+            columns=INVOICE_COLUMNS,
+            format="binary",
+        )
 
-        records = df_to_save.select(INVOICE_COLUMNS).rows()
+    async def fetch_succeeded_external_ids(self, df: pl.DataFrame) -> set[str]:
+        """Returns the invoices of ``df`` already stored as accepted by Factus."""
+        if df.is_empty():
+            return set()
+        # Read from the primary: a lagging replica could miss a success just written.
         async with self._db_pool.acquire() as connection:
-            await connection.copy_records_to_table(
-                "invoices",
-                records=records,
-                columns=INVOICE_COLUMNS,
+            rows = await connection.fetch(
+                _FETCH_SUCCEEDED_SQL,
+                df.get_column("external_id").to_list(),
+                df.get_column("issued_at").to_list(),
             )
+        return {row["external_id"] for row in rows}
+
+    async def fetch_invoices(
+        self,
+        customer_id: str | None = None,
+        issued_from: datetime | None = None,
+        issued_to: datetime | None = None,
+        after: InvoiceCursor | None = None,
+        limit: int = 50,
+    ) -> InvoicePage:
+        """Returns one page in ``(issued_at DESC, external_id DESC)`` order.
+
+        ``issued_from`` is inclusive and ``issued_to`` exclusive. Both bounds and the
+        cursor constrain ``issued_at`` directly, so PostgreSQL can prune monthly
+        partitions and walk ``idx_invoices_customer_issued_at`` instead of sorting.
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+
+        conditions: list[str] = []
+        params: list[Any] = []
+
+        def bind(value: Any) -> str:
+            params.append(value)
+            return f"${len(params)}"
 
-    async def fetch_invoices(self, customer_id: str | None = None) -> list[Invoice]:
-        query = (
-            "SELECT external_id, customer_id, issued_at, total, currency, tax_amount, "
-            "factus_invoice_id, qr_url, pdf_url, status, error_message "
-            "FROM invoices"
-        )
-        params: tuple[str, ...] = ()
         if customer_id:
-            query += " WHERE customer_id = $1"
-            params = (customer_id,)
-        query += " ORDER BY issued_at DESC NULLS LAST"
+            conditions.append(f"customer_id = {bind(customer_id)}")
+        if issued_from is not None:
+            conditions.append(f"issued_at >= {bind(issued_from)}")
+        if issued_to is not None:
+            conditions.append(f"issued_at < {bind(issued_to)}")
+        if after is not None:
+            # Spelled out rather than as a row comparison so the issued_at bound is an index condition.
+            issued_at_param = bind(after.issued_at)
+            conditions.append(
+                f"issued_at <= {issued_at_param} AND (issued_at < {issued_at_param} "
+                f"OR external_id < {bind(after.external_id)})"
+            )
 
-        async with self._db_pool.acquire() as connection:
+        query = f"SELECT {', '.join(INVOICE_COLUMNS)} FROM invoices"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY issued_at DESC, external_id DESC LIMIT {bind(limit + 1)}"
+
+        async with self._read_pool.acquire() as connection:
             rows = await connection.fetch(query, *params)
 
-        return [
+        invoices = tuple(
             Invoice(
                 external_id=row["external_id"],
                 customer_id=row["customer_id"],
@@ -55,5 +279,90 @@ class InvoiceRepositoryAsyncpg:
                 status=row["status"],
                 error_message=row["error_message"],
             )
+            for row in rows[:limit]
+        )
+        return InvoicePage(invoices=invoices, has_next_page=len(rows) > limit)
+
+    async def fetch_invoice_stats(
+        self,
+        customer_id: str | None = None,
+        issued_from: date | None = None,
+        issued_to: date | None = None,
+    ) -> list[InvoiceStats]:
+        """Totals per currency and status from the daily rollups, days in ``[from, to)``."""
+        conditions: list[str] = []
+        params: list[Any] = []
+        if customer_id:
+            params.append(customer_id)
+            conditions.append(f"customer_id = ${len(params)}")
+        if issued_from is not None:
+            params.append(issued_from)
+            conditions.append(f"day >= ${len(params)}")
+        if issued_to is not None:
+            params.append(issued_to)
+            conditions.append(f"day < ${len(params)}")
+
+        query = (
+            "SELECT NULLIF(currency, '') AS currency, NULLIF(status, '') AS status, "
+            "sum(invoice_count) AS invoice_count, sum(total) AS total, "
+            f"sum(tax_amount) AS tax_amount FROM {_ROLLUP_TABLE}"
+        )
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " GROUP BY currency, status HAVING sum(invoice_count) > 0 ORDER BY currency, status"
+
+        async with self._read_pool.acquire() as connection:
+            rows = await connection.fetch(query, *params)
+
+        return [
+            InvoiceStats(
+                currency=row["currency"],
+                status=row["status"],
+                invoice_count=int(row["invoice_count"]),
+                total=row["total"],
+                tax_amount=row["tax_amount"],
+            )
             for row in rows
         ]
+
+
+def _rollup_deltas(df: pl.DataFrame) -> tuple[list[Any], ...]:
+    """Aggregates a batch of new invoices into rollup deltas, as unnest() arrays."""
+    issued_at = df.get_column("issued_at")
+    if isinstance(issued_at.dtype, pl.Datetime) and issued_at.dtype.time_zone is not None:
+        issued_at = issued_at.dt.convert_time_zone("UTC")
+    frame = pl.DataFrame(
+        {
+            "customer_id": _text_or_empty(df, "customer_id"),
+            "day": issued_at.cast(pl.Datetime(time_zone=None), strict=False).dt.date(),
+            "currency": _text_or_empty(df, "currency"),
+            "status": _text_or_empty(df, "status"),
+            "total_cents": to_cents(_column_or_null(df, "total")),
+            "tax_cents": to_cents(_column_or_null(df, "tax_amount")),
+        }
+    )
+    rollups = (
+        frame.group_by(_ROLLUP_KEY_COLUMNS)
+        .agg(
+            pl.len().alias("invoice_count"),
+            pl.col("total_cents").sum(),
+            pl.col("tax_cents").sum(),
+        )
+        .sort(_ROLLUP_KEY_COLUMNS)
+    )
+    return (
+        *(rollups.get_column(column).to_list() for column in _ROLLUP_KEY_COLUMNS),
+        rollups.get_column("invoice_count").to_list(),
+        [Decimal(cents).scaleb(-2) for cents in rollups.get_column("total_cents").to_list()],
+        [Decimal(cents).scaleb(-2) for cents in rollups.get_column("tax_cents").to_list()],
+    )
+
+
+def _column_or_null(df: pl.DataFrame, column: str) -> pl.Series:
+    if column in df.columns:
+        return df.get_column(column)
+    return pl.Series(column, [None] * df.height, dtype=pl.Float64)
+
+
+def _text_or_empty(df: pl.DataFrame, column: str) -> pl.Series:
+    return _column_or_null(df, column).cast(pl.Utf8).fill_null("")
@@ -0,0 +1,86 @@
+import json
+from collections.abc import Sequence
+from typing import Any
+
+import asyncpg  # type: ignore[import-untyped]
+
+from app.invoicing.domain.entities.invoice_retry import InvoiceRetry
+
+_SCHEDULE_SQL = (
+    "INSERT INTO invoice_retry_queue "
+    "(batch_id, external_id, issued_at, invoice, factus_payload, due_at) "
+    "SELECT batch_id, external_id, issued_at, invoice::jsonb, factus_payload::jsonb, "
+    "now() + make_interval(secs => $6) "
+    "FROM unnest($1::text[], $2::text[], $3::timestamptz[], $4::text[], $5::text[]) "
+    "AS pending(batch_id, external_id, issued_at, invoice, factus_payload) "
+    "ON CONFLICT (external_id, issued_at) DO NOTHING"
+)
+# Claiming pushes due_at forward by the lease, so a worker that dies mid-retry hands the
+# item back once the lease expires instead of losing it.
+_CLAIM_DUE_SQL = (
+    "UPDATE invoice_retry_queue "
+    "SET attempts = attempts + 1, due_at = now() + make_interval(secs => $2) "
+    "WHERE id IN ("
+    "SELECT id FROM invoice_retry_queue WHERE due_at <= now() "
+    "ORDER BY due_at LIMIT $1 FOR UPDATE SKIP LOCKED"
+    ") "
+    "RETURNING id, batch_id, external_id, issued_at, invoice, factus_payload, attempts"
+)
+_RESCHEDULE_SQL = (
+    "UPDATE invoice_retry_queue "
+    "SET due_at = now() + make_interval(secs => $2), last_error = $3 "
+    "WHERE id = $1"
+)
+_COMPLETE_SQL = "DELETE FROM invoice_retry_queue WHERE id = ANY($1::bigint[])"
+
+
+class InvoiceRetryQueueAsyncpg:
+    def __init__(self, db_pool: asyncpg.Pool) -> None:
+        self._db_pool = db_pool
+
+    async def schedule(self, retries: Sequence[InvoiceRetry], delay_seconds: float) -> None:
+        if not retries:
+            return
+        async with self._db_pool.acquire() as connection:
+            await connection.execute(
+                _SCHEDULE_SQL,
+                [retry.batch_id for retry in retries],
+                [retry.external_id for retry in retries],
+                [retry.issued_at for retry in retries],
+                [json.dumps(retry.invoice, default=str) for retry in retries],
+                [json.dumps(retry.factus_payload, default=str) for retry in retries],
+                float(delay_seconds),
+            )
+
+    async def claim_due(self, limit: int, lease_seconds: float) -> list[InvoiceRetry]:
+        async with self._db_pool.acquire() as connection:
+            rows = await connection.fetch(_CLAIM_DUE_SQL, limit, float(lease_seconds))
+        return [
+            InvoiceRetry(
+                retry_id=row["id"],
+                batch_id=row["batch_id"],
+                external_id=row["external_id"],
+                issued_at=row["issued_at"],
+                invoice=_decode_json(row["invoice"]),
+                factus_payload=_decode_json(row["factus_payload"]),
+                attempts=row["attempts"],
+            )
+            for row in rows
+        ]
+
+    async def reschedule(self, retry_id: int, delay_seconds: float, error: str) -> None:
+        async with self._db_pool.acquire() as connection:
+            await connection.execute(_RESCHEDULE_SQL, retry_id, float(delay_seconds), error)
+
+    async def complete(self, retry_ids: Sequence[int]) -> None:
+        if not retry_ids:
+            return
+        async with self._db_pool.acquire() as connection:
+            await connection.execute(_COMPLETE_SQL, list(retry_ids))
+
+
+def _decode_json(value: Any) -> dict[str, Any]:
+    # asyncpg returns jsonb as text unless a type codec is registered on the pool.
+    if isinstance(value, str):
+        return json.loads(value)
+    return dict(value)
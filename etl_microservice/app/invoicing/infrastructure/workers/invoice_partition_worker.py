@@ -0,0 +1,46 @@
+import asyncio
+import contextlib
+import logging
+
+from app.invoicing.infrastructure.persistence.postgres.invoice_partition_manager import (
+    InvoicePartitionManagerAsyncpg,
+)
+from app.shared.infrastructure.metrics.prometheus_metrics import (
+    INVOICE_PARTITION_MAINTENANCE_RUNS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class InvoicePartitionWorker:
+    """Background loop running partition maintenance at startup and then periodically."""
+
+    def __init__(
+        self,
+        partition_manager: InvoicePartitionManagerAsyncpg,
+        interval_seconds: float = 3600.0,
+    ) -> None:
+        if interval_seconds <= 0:
+            raise ValueError("interval_seconds must be positive")
+        self._partition_manager = partition_manager
+        self._interval_seconds = interval_seconds
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._partition_manager.maintain()
+                INVOICE_PARTITION_MAINTENANCE_RUNS.labels("success").inc()
+            except Exception:
+                INVOICE_PARTITION_MAINTENANCE_RUNS.labels("error").inc()
+                logger.exception("invoice_partition_maintenance_failed")
+            await asyncio.sleep(self._interval_seconds)
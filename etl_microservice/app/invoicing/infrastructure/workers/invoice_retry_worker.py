@@ -0,0 +1,64 @@
+import asyncio
+import contextlib
+import logging
+
+from app.invoicing.application.use_cases.retry_failed_invoices import (
+    RetryFailedInvoicesUseCase,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class InvoiceRetryWorker:
+    """Background loop draining the retry queue in batches at a bounded rate.
+
+    A full batch is followed immediately by the next one, paced so that no more than
+    ``max_per_second`` retries are claimed per second; a short batch means the queue has
+    nothing else due, so the worker idles for ``poll_interval_seconds``.
+    """
+
+    def __init__(
+        self,
+        retry_failed_invoices_use_case: RetryFailedInvoicesUseCase,
+        batch_size: int = 100,
+        poll_interval_seconds: float = 5.0,
+        max_per_second: float | None = None,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if max_per_second is not None and max_per_second <= 0:
+            raise ValueError("max_per_second must be positive")
+        self._retry_failed_invoices_use_case = retry_failed_invoices_use_case
+        self._batch_size = batch_size
+        self._poll_interval_seconds = poll_interval_seconds
+        self._max_per_second = max_per_second
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started_at = loop.time()
+            try:
+                claimed = await self._retry_failed_invoices_use_case.execute(
+                    limit=self._batch_size
+                )
+            except Exception:
+                logger.exception("invoice_retry_worker_iteration_failed")
+                claimed = 0
+
+            if claimed < self._batch_size:
+                await asyncio.sleep(self._poll_interval_seconds)
+            elif self._max_per_second is not None:
+                elapsed = loop.time() - started_at
+                await asyncio.sleep(max(claimed / self._max_per_second - elapsed, 0.0))
+            else:
+                await asyncio.sleep(0)
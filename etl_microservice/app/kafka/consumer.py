@@ -4,34 +4,100 @@ import json
 import logging
 from typing import Any
 
-from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
+from aiokafka import (
+    AIOKafkaConsumer,
+    AIOKafkaProducer,
+    ConsumerRebalanceListener,
+    TopicPartition,
+)
+from aiokafka.errors import KafkaError
+from aiokafka.structs import OffsetAndMetadata
 
 from app.core.config import settings
 from app.invoicing.application.use_cases.process_invoice_batch import (
     ProcessInvoiceBatchUseCase,
 )
+from app.invoicing.infrastructure.etl.polars_decoder import (
+    DecodedInvoiceBatch,
+    decode_invoice_batch,
+)
+from app.kafka.offset_tracker import OffsetCommitTracker
+from app.kafka.partition_workers import PartitionWorkerPool
+from app.shared.infrastructure.metrics.prometheus_metrics import (
+    INVOICE_PIPELINE_STAGE_SECONDS,
+    KAFKA_CONSUMER_LAG,
+)
+from app.shared.infrastructure.resilience.circuit_breaker import CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
+CONSUMER_MODE_SEQUENTIAL = "sequential"
+CONSUMER_MODE_PARTITIONED = "partitioned"
+
+
+class _PartitionRevocationListener(ConsumerRebalanceListener):
+    def __init__(self, consumer: "InvoiceKafkaConsumer") -> None:
+        self._consumer = consumer
+
+    async def on_partitions_revoked(self, revoked: set[TopicPartition]) -> None:
+        await self._consumer._on_partitions_revoked(revoked)
+
+    async def on_partitions_assigned(self, assigned: set[TopicPartition]) -> None:
+        return None
+
 
 class InvoiceKafkaConsumer:
-    def __init__(self, process_invoice_batch_use_case: ProcessInvoiceBatchUseCase):
+    _SHUTDOWN_DRAIN_TIMEOUT_SECONDS = 30.0
+    # Well below the group's rebalance timeout, so a batch parked on an open circuit
+    # cannot hold up the rebalance until this member is evicted.
+    _REBALANCE_DRAIN_TIMEOUT_SECONDS = 10.0
+    _MIN_PARK_SECONDS = 1.0
+
+    def __init__(
+        self,
+        process_invoice_batch_use_case: ProcessInvoiceBatchUseCase,
+        mode: str = settings.kafka_consumer_mode,
+        max_in_flight_batches: int = settings.kafka_max_in_flight_batches,
+        max_buffered_per_partition: int = settings.kafka_max_buffered_per_partition,
+        commit_interval_ms: int = settings.kafka_commit_interval_ms,
+        commit_batch_size: int = settings.kafka_commit_batch_size,
+    ):
+        if mode not in (CONSUMER_MODE_SEQUENTIAL, CONSUMER_MODE_PARTITIONED):
+            raise ValueError(f"Unsupported Kafka consumer mode: {mode}")
         self._process_invoice_batch_use_case = process_invoice_batch_use_case
         self._consumer = AIOKafkaConsumer(
-            settings.kafka_topic,
             bootstrap_servers=settings.kafka_bootstrap_servers,
             group_id=settings.kafka_group_id,
-            enable_auto_commit=True,
+            enable_auto_commit=False,
         )
         self._producer = AIOKafkaProducer(
             bootstrap_servers=settings.kafka_bootstrap_servers,
         )
+        self._worker_pool: PartitionWorkerPool | None = None
+        if mode == CONSUMER_MODE_PARTITIONED:
+            self._worker_pool = PartitionWorkerPool(
+                handler=self._handle_message,
+                max_in_flight=max_in_flight_batches,
+                max_buffered_per_partition=max_buffered_per_partition,
+                pause_partition=self._pause_partition,
+                resume_partition=self._resume_partition,
+            )
+        self._offset_tracker = OffsetCommitTracker()
+        self._commit_interval_seconds = commit_interval_ms / 1000
+        self._commit_batch_size = commit_batch_size
+        self._commit_requested = asyncio.Event()
         self._task: asyncio.Task | None = None
+        self._commit_task: asyncio.Task | None = None
 
     async def start(self) -> None:
         await self._consumer.start()
         await self._producer.start()
+        self._consumer.subscribe(
+            topics=[settings.kafka_topic],
+            listener=_PartitionRevocationListener(self),
+        )
         self._task = asyncio.create_task(self._consume_loop())
+        self._commit_task = asyncio.create_task(self._commit_loop())
 
     async def stop(self) -> None:
         if self._task:
@@ -39,23 +105,154 @@ class InvoiceKafkaConsumer:
             with contextlib.suppress(asyncio.CancelledError):
                 await self._task
 
+        if self._worker_pool is not None:
+            if not await self._worker_pool.drain(
+                self._worker_pool.partitions, timeout=self._SHUTDOWN_DRAIN_TIMEOUT_SECONDS
+            ):
+                logger.warning("kafka_consumer_shutdown_drain_timed_out")
+            await self._worker_pool.close()
+
+        if self._commit_task:
+            self._commit_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._commit_task
+        await self._commit_offsets()
+
         await self._consumer.stop()
         await self._producer.stop()
 
     async def _consume_loop(self) -> None:
         async for message in self._consumer:
-            await self._handle_message(message)
+            self._offset_tracker.track(
+                TopicPartition(message.topic, message.partition), message.offset
+            )
+            if self._worker_pool is not None:
+                self._worker_pool.submit(message)
+            else:
+                await self._handle_message(message)
+
+    async def _commit_loop(self) -> None:
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(
+                    self._commit_requested.wait(), timeout=self._commit_interval_seconds
+                )
+            self._commit_requested.clear()
+            await self._commit_offsets()
+            self._update_lag()
+
+    async def _commit_offsets(
+        self, partitions: set[TopicPartition] | None = None
+    ) -> None:
+        commits = self._offset_tracker.committable(partitions)
+        if not commits:
+            return
+        try:
+            await self._consumer.commit(
+                {
+                    partition: OffsetAndMetadata(offset, "")
+                    for partition, offset in commits.items()
+                }
+            )
+        except KafkaError as exc:
+            logger.warning("kafka_offset_commit_failed error=%s", str(exc))
+            return
+        self._offset_tracker.mark_committed(commits)
+
+    def _update_lag(self) -> None:
+        """Publishes, per assigned partition, how far processing trails the high watermark.
+
+        The high watermark is the one seen by the last fetch, so a paused partition keeps
+        reporting the lag it had when it was paused.
+        """
+        for partition in self._consumer.assignment():
+            highwater = self._consumer.highwater(partition)
+            next_offset = self._offset_tracker.next_unprocessed(partition)
+            if highwater is None or next_offset is None:
+                continue
+            KAFKA_CONSUMER_LAG.labels(partition.topic, str(partition.partition)).set(
+                max(highwater - next_offset, 0)
+            )
+
+    async def _on_partitions_revoked(self, revoked: set[TopicPartition]) -> None:
+        if self._worker_pool is not None and not await self._worker_pool.drain(
+            revoked, timeout=self._REBALANCE_DRAIN_TIMEOUT_SECONDS
+        ):
+            logger.warning(
+                "kafka_rebalance_drain_timed_out partitions=%s",
+                sorted(f"{partition.topic}:{partition.partition}" for partition in revoked),
+            )
+        await self._commit_offsets(revoked)
+        self._offset_tracker.forget(revoked)
+        for partition in revoked:
+            with contextlib.suppress(KeyError):
+                KAFKA_CONSUMER_LAG.remove(partition.topic, str(partition.partition))
+
+    def _mark_message_done(self, message: Any) -> None:
+        self._offset_tracker.complete(
+            TopicPartition(message.topic, message.partition), message.offset
+        )
+        if self._offset_tracker.completed_since_commit >= self._commit_batch_size:
+            self._commit_requested.set()
+
+    def _pause_partition(self, partition: TopicPartition) -> None:
+        if partition in self._consumer.assignment():
+            self._consumer.pause(partition)
+
+    def _resume_partition(self, partition: TopicPartition) -> None:
+        if partition in self._consumer.assignment():
+            self._consumer.resume(partition)
 
     async def _handle_message(self, message: Any) -> None:
         batch_id = "unknown"
         try:
-            data: dict[str, Any] = json.loads(message.value.decode("utf-8"))
-            batch_id = str(data.get("batch_id") or "unknown")
-            await self._process_invoice_batch_use_case.execute(data)
+            with INVOICE_PIPELINE_STAGE_SECONDS.labels("decode").time():
+                batch = await asyncio.to_thread(decode_invoice_batch, message.value)
+            batch_id = batch.batch_id
+            await self._execute_parking_while_circuit_open(batch)
             logger.info("invoice_batch_processed", extra={"batch_id": batch_id})
         except Exception as exc:
-            await self._send_to_dlq(message=message, batch_id=batch_id, error=exc)
-            logger.exception("invoice_batch_failed_and_sent_to_dlq", extra={"batch_id": batch_id})
+            dead_lettered = await self._try_send_to_dlq(message=message, batch_id=batch_id, error=exc)
+            logger.exception(
+                "invoice_batch_failed_and_sent_to_dlq"
+                if dead_lettered
+                else "invoice_batch_failed_and_dlq_send_failed",
+                extra={"batch_id": batch_id},
+            )
+        self._mark_message_done(message)
+
+    async def _execute_parking_while_circuit_open(self, batch: DecodedInvoiceBatch) -> None:
+        """Holds the batch, and with it its partition, until Factus accepts calls again."""
+        while True:
+            try:
+                await self._process_invoice_batch_use_case.execute_decoded(batch)
+                return
+            except CircuitOpenError as exc:
+                logger.warning(
+                    "invoice_batch_parked_circuit_open retry_in=%.1fs",
+                    exc.retry_after,
+                    extra={"batch_id": batch.batch_id},
+                )
+                await asyncio.sleep(max(exc.retry_after, self._MIN_PARK_SECONDS))
+
+    async def _try_send_to_dlq(self, message: Any, batch_id: str, error: Exception) -> bool:
+        """Returns whether the message reached the DLQ.
+
+        The caller marks the message done either way: leaving its offset open would stall
+        the partition's commit watermark for good.
+        """
+        try:
+            await self._send_to_dlq(message=message, batch_id=batch_id, error=error)
+        except Exception:
+            logger.exception(
+                "invoice_dlq_send_failed topic=%s partition=%s offset=%s",
+                message.topic,
+                message.partition,
+                message.offset,
+                extra={"batch_id": batch_id},
+            )
+            return False
+        return True
 
     async def _send_to_dlq(self, message: Any, batch_id: str, error: Exception) -> None:
         dlq_payload = {
@@ -0,0 +1,77 @@
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from aiokafka import TopicPartition
+
+
+@dataclass(slots=True)
+class _PartitionOffsets:
+    in_progress: deque[int] = field(default_factory=deque)
+    completed: set[int] = field(default_factory=set)
+    watermark: int | None = None
+    committed: int | None = None
+
+
+class OffsetCommitTracker:
+    """Tracks finished offsets per partition and exposes the highest contiguous commit point.
+
+    Offsets must be tracked in the order they were fetched. The committable offset of a
+    partition only advances past an offset once it and every offset before it completed.
+    """
+
+    def __init__(self) -> None:
+        self._partitions: dict[TopicPartition, _PartitionOffsets] = {}
+        self._completed_since_commit = 0
+
+    @property
+    def completed_since_commit(self) -> int:
+        return self._completed_since_commit
+
+    def track(self, partition: TopicPartition, offset: int) -> None:
+        self._partitions.setdefault(partition, _PartitionOffsets()).in_progress.append(offset)
+
+    def complete(self, partition: TopicPartition, offset: int) -> None:
+        offsets = self._partitions.get(partition)
+        if offsets is None:
+            return
+        offsets.completed.add(offset)
+        self._completed_since_commit += 1
+        while offsets.in_progress and offsets.in_progress[0] in offsets.completed:
+            finished = offsets.in_progress.popleft()
+            offsets.completed.discard(finished)
+            offsets.watermark = finished + 1
+
+    def committable(
+        self, partitions: Iterable[TopicPartition] | None = None
+    ) -> dict[TopicPartition, int]:
+        """Returns the next offset to commit for every partition whose watermark moved."""
+        selected = self._partitions if partitions is None else partitions
+        commits: dict[TopicPartition, int] = {}
+        for partition in selected:
+            offsets = self._partitions.get(partition)
+            if offsets is None or offsets.watermark is None:
+                continue
+            if offsets.watermark != offsets.committed:
+                commits[partition] = offsets.watermark
+        return commits
+
+    def next_unprocessed(self, partition: TopicPartition) -> int | None:
+        """Returns the first offset of ``partition`` not processed yet, if one was tracked."""
+        offsets = self._partitions.get(partition)
+        if offsets is None:
+            return None
+        if offsets.in_progress:
+            return offsets.in_progress[0]
+        return offsets.watermark
+
+    def mark_committed(self, commits: dict[TopicPartition, int]) -> None:
+        for partition, offset in commits.items():
+            offsets = self._partitions.get(partition)
+            if offsets is not None:
+                offsets.committed = offset
+        self._completed_since_commit = 0
+
+    def forget(self, partitions: Iterable[TopicPartition]) -> None:
+        for partition in partitions:
+            self._partitions.pop(partition, None)
@@ -0,0 +1,126 @@
+import asyncio
+import contextlib
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from aiokafka import TopicPartition
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[Any], Awaitable[None]]
+PartitionCallback = Callable[[TopicPartition], None]
+
+
+@dataclass(slots=True)
+class _PartitionWorker:
+    queue: asyncio.Queue[Any]
+    task: asyncio.Task[None]
+
+
+class PartitionWorkerPool:
+    """Processes each Kafka partition in order on its own task, capping in-flight batches globally."""
+
+    def __init__(
+        self,
+        handler: MessageHandler,
+        max_in_flight: int,
+        max_buffered_per_partition: int,
+        pause_partition: PartitionCallback,
+        resume_partition: PartitionCallback,
+    ) -> None:
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        if max_buffered_per_partition < 1:
+            raise ValueError("max_buffered_per_partition must be at least 1")
+        self._handler = handler
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._max_buffered = max_buffered_per_partition
+        self._resume_threshold = max_buffered_per_partition // 2
+        self._pause_partition = pause_partition
+        self._resume_partition = resume_partition
+        self._workers: dict[TopicPartition, _PartitionWorker] = {}
+        self._paused: set[TopicPartition] = set()
+
+    @property
+    def partitions(self) -> list[TopicPartition]:
+        return list(self._workers)
+
+    def submit(self, message: Any) -> None:
+        partition = TopicPartition(message.topic, message.partition)
+        worker = self._workers.get(partition)
+        if worker is None:
+            worker = self._start_worker(partition)
+        worker.queue.put_nowait(message)
+        if worker.queue.qsize() >= self._max_buffered and partition not in self._paused:
+            self._paused.add(partition)
+            self._pause_partition(partition)
+
+    async def drain(
+        self, partitions: Iterable[TopicPartition], timeout: float | None = None
+    ) -> bool:
+        """Waits for buffered messages of ``partitions`` to finish, then stops their workers.
+
+        Workers still busy after ``timeout`` seconds are cancelled, leaving their unfinished
+        messages uncommitted for whoever consumes the partition next. Returns whether every
+        buffered message finished.
+        """
+        # Workers stay registered until they have stopped, so messages submitted meanwhile
+        # join their queue instead of starting a second, untracked worker.
+        workers = [
+            (partition, self._workers[partition])
+            for partition in partitions
+            if partition in self._workers
+        ]
+        drained = True
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(worker.queue.join() for _, worker in workers)), timeout
+            )
+        except TimeoutError:
+            drained = False
+        for partition, worker in workers:
+            worker.task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await worker.task
+            if self._workers.get(partition) is worker:
+                del self._workers[partition]
+            self._paused.discard(partition)
+        return drained
+
+    async def close(self) -> None:
+        workers = list(self._workers.values())
+        self._workers.clear()
+        self._paused.clear()
+        for worker in workers:
+            worker.task.cancel()
+        for worker in workers:
+            with contextlib.suppress(asyncio.CancelledError):
+                await worker.task
+
+    def _start_worker(self, partition: TopicPartition) -> _PartitionWorker:
+        queue: asyncio.Queue[Any] = asyncio.Queue()
+        task = asyncio.create_task(self._run_worker(partition, queue))
+        worker = _PartitionWorker(queue=queue, task=task)
+        self._workers[partition] = worker
+        return worker
+
+    async def _run_worker(self, partition: TopicPartition, queue: asyncio.Queue[Any]) -> None:
+        while True:
+            message = await queue.get()
+            try:
+                async with self._in_flight:
+                    await self._handler(message)
+            except Exception:
+                logger.exception(
+                    "partition_worker_message_failed topic=%s partition=%s offset=%s",
+                    partition.topic,
+                    partition.partition,
+                    getattr(message, "offset", None),
+                )
+            finally:
+                queue.task_done()
+            if partition in self._paused and queue.qsize() <= self._resume_threshold:
+                self._paused.discard(partition)
+                self._resume_partition(partition)
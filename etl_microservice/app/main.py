@@ -1,10 +1,12 @@
+import asyncio
+import contextlib
 from contextlib import asynccontextmanager
 from collections.abc import AsyncGenerator
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from typing import Any, AsyncIterator
 
-import asyncpg  # type: ignore[import-untyped]
+import polars as pl
 from fastapi import FastAPI
 from opentelemetry import trace
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
@@ -19,17 +21,51 @@ import strawberry
 from strawberry.fastapi import GraphQLRouter
 
 from app.core.config import settings
+from app.invoicing.application.ports.invoice_batch_tracker_port import InvoiceBatchTrackerPort
 from app.invoicing.application.ports.invoice_event_publisher_port import InvoiceEventPublisherPort
+from app.invoicing.application.ports.invoice_repository_port import InvoiceRepositoryPort
 from app.invoicing.application.use_cases.process_invoice_batch import (
+    INVOICE_STATUS_ERROR,
     ProcessInvoiceBatchUseCase,
+    is_factus_overload,
+)
+from app.invoicing.application.use_cases.retry_failed_invoices import (
+    RetryFailedInvoicesUseCase,
+)
+from app.invoicing.domain.entities.invoice import Invoice
+from app.invoicing.domain.entities.invoice_batch_status import (
+    BATCH_FINAL_STAGES,
+    InvoiceBatchStatus,
+)
+from app.invoicing.domain.entities.invoice_page import InvoiceCursor, InvoicePage
+from app.invoicing.domain.entities.invoice_stats import InvoiceStats
+from app.invoicing.infrastructure.etl.polars_transformer import INVOICE_COLUMNS
+from app.invoicing.infrastructure.persistence.cached_invoice_repository import (
+    CachedInvoiceRepository,
+)
+from app.invoicing.infrastructure.persistence.postgres.invoice_batch_tracker_asyncpg import (
+    InvoiceBatchTrackerAsyncpg,
+)
+from app.invoicing.infrastructure.persistence.postgres.invoice_partition_manager import (
+    InvoicePartitionManagerAsyncpg,
 )
 from app.invoicing.infrastructure.persistence.postgres.invoice_repository_asyncpg import (
     InvoiceRepositoryAsyncpg,
 )
+from app.invoicing.infrastructure.persistence.postgres.invoice_retry_queue_asyncpg import (
+    InvoiceRetryQueueAsyncpg,
+)
+from app.invoicing.infrastructure.workers.invoice_partition_worker import InvoicePartitionWorker
+from app.invoicing.infrastructure.workers.invoice_retry_worker import InvoiceRetryWorker
 from app.invoicing.infrastructure.api.factus.factus_async_client import FactusAsyncClient
 from app.kafka.consumer import InvoiceKafkaConsumer
+from app.shared.infrastructure.database.instrumented_pool import InstrumentedPool
 from app.shared.infrastructure.logging.structured_logger import configure_json_logging
 from app.shared.infrastructure.pubsub.broadcaster import InvoiceEventBroadcaster
+from app.shared.infrastructure.resilience.adaptive_concurrency_limiter import (
+    AdaptiveConcurrencyLimiter,
+)
+from app.shared.infrastructure.resilience.circuit_breaker import CircuitBreaker
 
 
 @strawberry.type
@@ -47,6 +83,56 @@ class InvoiceType:
     error_message: str | None
 
 
+@strawberry.type
+class PageInfo:
+    has_next_page: bool
+    end_cursor: str | None
+
+
+@strawberry.type
+class InvoiceEdge:
+    cursor: str
+    node: InvoiceType
+
+
+@strawberry.type
+class InvoiceConnection:
+    edges: list[InvoiceEdge]
+    page_info: PageInfo
+
+
+@strawberry.type
+class InvoiceStatusStatsType:
+    status: str | None
+    invoice_count: int
+    total: Decimal
+    tax_amount: Decimal
+
+
+@strawberry.type
+class InvoiceStatsType:
+    currency: str | None
+    invoice_count: int
+    error_count: int
+    total: Decimal
+    tax_amount: Decimal
+    by_status: list[InvoiceStatusStatsType]
+
+
+@strawberry.type
+class InvoiceBatchStatusType:
+    batch_id: str
+    stage: str
+    invoice_count: int
+    transformed_count: int | None
+    succeeded_count: int
+    failed_count: int
+    pending_retry_count: int
+    error_message: str | None
+    received_at: datetime
+    updated_at: datetime
+
+
 @strawberry.type
 class Query:
     @strawberry.field
@@ -54,27 +140,128 @@ class Query:
         self,
         info: strawberry.Info,
         customer_id: str | None = None,
+        issued_from: datetime | None = None,
+        issued_to: datetime | None = None,
+        first: int | None = None,
     ) -> list[InvoiceType]:
-        repository = info.context["request"].app.state.invoice_repository
-        invoices = await repository.fetch_invoices(customer_id=customer_id)
+        page = await _fetch_invoice_page(
+            info, customer_id, issued_from, issued_to, first=first, after=None
+        )
+        return [_invoice_to_type(invoice) for invoice in page.invoices]
 
+    @strawberry.field
+    async def invoices_connection(
+        self,
+        info: strawberry.Info,
+        customer_id: str | None = None,
+        issued_from: datetime | None = None,
+        issued_to: datetime | None = None,
+        first: int | None = None,
+        after: str | None = None,
+    ) -> InvoiceConnection:
+        page = await _fetch_invoice_page(
+            info, customer_id, issued_from, issued_to, first=first, after=after
+        )
+        edges = [
+            InvoiceEdge(
+                cursor=InvoiceCursor.from_invoice(invoice).encode(),
+                node=_invoice_to_type(invoice),
+            )
+            for invoice in page.invoices
+        ]
+        end_cursor = page.end_cursor
+        return InvoiceConnection(
+            edges=edges,
+            page_info=PageInfo(
+                has_next_page=page.has_next_page,
+                end_cursor=end_cursor.encode() if end_cursor is not None else None,
+            ),
+        )
+
+    @strawberry.field
+    async def invoice_stats(
+        self,
+        info: strawberry.Info,
+        customer_id: str | None = None,
+        issued_from: date | None = None,
+        issued_to: date | None = None,
+    ) -> list[InvoiceStatsType]:
+        repository = info.context["request"].app.state.invoice_repository
+        stats = await repository.fetch_invoice_stats(
+            customer_id=customer_id, issued_from=issued_from, issued_to=issued_to
+        )
+        by_currency: dict[str | None, list[InvoiceStats]] = {}
+        for row in stats:
+            by_currency.setdefault(row.currency, []).append(row)
         return [
-            InvoiceType(
-                external_id=invoice.external_id,
-                customer_id=invoice.customer_id,
-                issued_at=invoice.issued_at,
-                total=invoice.total,
-                currency=invoice.currency,
-                tax_amount=invoice.tax_amount,
-                factus_invoice_id=invoice.factus_invoice_id,
-                qr_url=invoice.qr_url,
-                pdf_url=invoice.pdf_url,
-                status=invoice.status,
-                error_message=invoice.error_message,
+            InvoiceStatsType(
+                currency=currency,
+                invoice_count=sum(row.invoice_count for row in rows),
+                error_count=sum(
+                    row.invoice_count for row in rows if row.status == INVOICE_STATUS_ERROR
+                ),
+                total=sum((row.total for row in rows), Decimal(0)),
+                tax_amount=sum((row.tax_amount for row in rows), Decimal(0)),
+                by_status=[
+                    InvoiceStatusStatsType(
+                        status=row.status,
+                        invoice_count=row.invoice_count,
+                        total=row.total,
+                        tax_amount=row.tax_amount,
+                    )
+                    for row in rows
+                ],
             )
-            for invoice in invoices
+            for currency, rows in by_currency.items()
         ]
 
+    @strawberry.field
+    async def batch_status(
+        self, info: strawberry.Info, batch_id: str
+    ) -> InvoiceBatchStatusType | None:
+        tracker = info.context["request"].app.state.batch_tracker
+        status = await tracker.fetch_batch_status(batch_id)
+        return _batch_status_to_type(status) if status is not None else None
+
+
+async def _fetch_invoice_page(
+    info: strawberry.Info,
+    customer_id: str | None,
+    issued_from: datetime | None,
+    issued_to: datetime | None,
+    first: int | None,
+    after: str | None,
+) -> InvoicePage:
+    page_size = settings.graphql_invoices_default_page_size if first is None else first
+    if not 1 <= page_size <= settings.graphql_invoices_max_page_size:
+        raise ValueError(
+            f"first must be between 1 and {settings.graphql_invoices_max_page_size}"
+        )
+    repository = info.context["request"].app.state.invoice_repository
+    return await repository.fetch_invoices(
+        customer_id=customer_id,
+        issued_from=issued_from,
+        issued_to=issued_to,
+        after=InvoiceCursor.decode(after) if after else None,
+        limit=page_size,
+    )
+
+
+def _invoice_to_type(invoice: Invoice) -> InvoiceType:
+    return InvoiceType(
+        external_id=invoice.external_id,
+        customer_id=invoice.customer_id,
+        issued_at=invoice.issued_at,
+        total=invoice.total,
+        currency=invoice.currency,
+        tax_amount=invoice.tax_amount,
+        factus_invoice_id=invoice.factus_invoice_id,
+        qr_url=invoice.qr_url,
+        pdf_url=invoice.pdf_url,
+        status=invoice.status,
+        error_message=invoice.error_message,
+    )
+
 
 @strawberry.type
 class Subscription:
@@ -88,6 +275,65 @@ class Subscription:
         async for event in broadcaster.subscribe():
             yield _invoice_dict_to_type(event)
 
+    @strawberry.subscription
+    async def batch_status(
+        self,
+        info: strawberry.Info,
+        batch_id: str,
+    ) -> AsyncGenerator[InvoiceBatchStatusType, None]:
+        """Streams a batch's status until it is persisted or failed.
+
+        The row is re-read every ``BATCH_STATUS_REFRESH_SECONDS`` without an event, so a
+        client never waits on an update it missed before its subscription was attached.
+        """
+        context_obj = info.context.get("ws") or info.context.get("request")
+        state = context_obj.app.state
+        events = state.batch_status_broadcaster.subscribe()
+        next_event: asyncio.Future[InvoiceBatchStatus] = asyncio.ensure_future(anext(events))
+        # Lets the subscription register before the first read, so no update falls between.
+        await asyncio.sleep(0)
+        last_seen: InvoiceBatchStatus | None = None
+        try:
+            status: InvoiceBatchStatus | None = await state.batch_tracker.fetch_batch_status(
+                batch_id
+            )
+            while True:
+                if status is not None and status.batch_id == batch_id and status != last_seen:
+                    last_seen = status
+                    yield _batch_status_to_type(status)
+                    if status.stage in BATCH_FINAL_STAGES:
+                        return
+                done, _ = await asyncio.wait(
+                    {next_event}, timeout=settings.batch_status_refresh_seconds
+                )
+                if done:
+                    status = next_event.result()
+                    next_event = asyncio.ensure_future(anext(events))
+                else:
+                    status = await state.batch_tracker.fetch_batch_status(batch_id)
+        except StopAsyncIteration:
+            return
+        finally:
+            next_event.cancel()
+            with contextlib.suppress(asyncio.CancelledError, StopAsyncIteration):
+                await next_event
+            await events.aclose()
+
+
+def _batch_status_to_type(status: InvoiceBatchStatus) -> InvoiceBatchStatusType:
+    return InvoiceBatchStatusType(
+        batch_id=status.batch_id,
+        stage=status.stage,
+        invoice_count=status.invoice_count,
+        transformed_count=status.transformed_count,
+        succeeded_count=status.succeeded_count,
+        failed_count=status.failed_count,
+        pending_retry_count=status.pending_retry_count,
+        error_message=status.error_message,
+        received_at=status.received_at,
+        updated_at=status.updated_at,
+    )
+
 
 def _invoice_dict_to_type(event: dict[str, Any]) -> InvoiceType:
     total = event.get("total")
@@ -114,6 +360,57 @@ class _BroadcasterEventPublisher:
     async def publish_invoice_processed(self, invoice_data: dict[str, Any]) -> None:
         await self._broadcaster.publish(invoice_data)
 
+    async def publish_invoices_processed(self, invoices: pl.DataFrame) -> None:
+        if not self._broadcaster.subscriber_count or invoices.is_empty():
+            return
+        event_columns = [column for column in INVOICE_COLUMNS if column in invoices.columns]
+        await self._broadcaster.publish_many(invoices.select(event_columns).to_dicts())
+
+
+class _PublishingBatchTracker:
+    """Batch tracker that also hands every updated status to the batchStatus subscribers."""
+
+    def __init__(
+        self, tracker: InvoiceBatchTrackerPort, broadcaster: InvoiceEventBroadcaster
+    ) -> None:
+        self._tracker = tracker
+        self._broadcaster = broadcaster
+
+    async def mark_stage(
+        self,
+        batch_id: str,
+        stage: str,
+        invoice_count: int | None = None,
+        transformed_count: int | None = None,
+        error: str | None = None,
+    ) -> InvoiceBatchStatus | None:
+        return await self._publish(
+            await self._tracker.mark_stage(
+                batch_id,
+                stage,
+                invoice_count=invoice_count,
+                transformed_count=transformed_count,
+                error=error,
+            )
+        )
+
+    async def record_results(
+        self, batch_id: str, succeeded: int, failed: int, pending_retry: int
+    ) -> InvoiceBatchStatus | None:
+        return await self._publish(
+            await self._tracker.record_results(
+                batch_id, succeeded=succeeded, failed=failed, pending_retry=pending_retry
+            )
+        )
+
+    async def fetch_batch_status(self, batch_id: str) -> InvoiceBatchStatus | None:
+        return await self._tracker.fetch_batch_status(batch_id)
+
+    async def _publish(self, status: InvoiceBatchStatus | None) -> InvoiceBatchStatus | None:
+        if status is not None and self._broadcaster.subscriber_count:
+            await self._broadcaster.publish(status)
+        return status
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
@@ -134,7 +431,20 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     asyncpg_instrumentor = AsyncPGInstrumentor()
     aiokafka_instrumentor.instrument()
     asyncpg_instrumentor.instrument()
-    app.state.db_pool = await asyncpg.create_pool(settings.database_url)
+    app.state.db_pool = await InstrumentedPool.create(
+        settings.database_url,
+        name="write",
+        min_size=settings.db_write_pool_min_size,
+        max_size=settings.db_write_pool_max_size,
+        acquire_timeout=settings.db_pool_acquire_timeout_seconds,
+    )
+    app.state.db_read_pool = await InstrumentedPool.create(
+        settings.database_read_url or settings.database_url,
+        name="read",
+        min_size=settings.db_read_pool_min_size,
+        max_size=settings.db_read_pool_max_size,
+        acquire_timeout=settings.db_pool_acquire_timeout_seconds,
+    )
     missing_factus_settings = [
         name
         for name, value in (
@@ -150,35 +460,138 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
             "Missing required Factus environment variables: "
             + ", ".join(missing_factus_settings)
         )
+    factus_circuit_breaker = CircuitBreaker(
+        failure_rate_threshold=settings.factus_circuit_failure_rate,
+        window_size=settings.factus_circuit_window_size,
+        minimum_calls=settings.factus_circuit_minimum_calls,
+        open_seconds=settings.factus_circuit_open_seconds,
+    )
     factus_client = FactusAsyncClient(
         base_url=settings.factus_base_url,
         email=settings.factus_email,
         password=settings.factus_password,
         client_id=settings.factus_client_id,
         client_secret=settings.factus_client_secret,
+        connect_timeout=settings.factus_http_connect_timeout_seconds,
+        read_timeout=settings.factus_http_read_timeout_seconds,
+        pool_timeout=settings.factus_http_pool_timeout_seconds,
+        max_connections=settings.factus_http_max_connections,
+        max_keepalive_connections=settings.factus_http_max_keepalive_connections,
+        keepalive_expiry=settings.factus_http_keepalive_expiry_seconds,
+        http2=settings.factus_http2,
+        requests_per_second=settings.factus_requests_per_second or None,
+        rate_limit_burst=settings.factus_rate_limit_burst or None,
+        numbering_range_ttl_seconds=settings.factus_numbering_range_ttl_seconds or None,
+        circuit_breaker=factus_circuit_breaker,
+    )
+    invoice_repository: InvoiceRepositoryPort = InvoiceRepositoryAsyncpg(
+        db_pool=app.state.db_pool,
+        write_mode=settings.invoice_write_mode,
+        read_pool=app.state.db_read_pool,
+    )
+    if settings.invoice_query_cache_ttl_seconds > 0:
+        invoice_repository = CachedInvoiceRepository(
+            invoice_repository,
+            max_entries=settings.invoice_query_cache_max_entries,
+            ttl_seconds=settings.invoice_query_cache_ttl_seconds,
+            replica_lag_seconds=(
+                settings.invoice_query_cache_replica_lag_seconds
+                if settings.database_read_url
+                else 0.0
+            ),
+        )
+    broadcaster = InvoiceEventBroadcaster(
+        max_queue_size=settings.pubsub_subscriber_queue_size,
+        overflow_policy=settings.pubsub_overflow_policy,
     )
-    invoice_repository = InvoiceRepositoryAsyncpg(db_pool=app.state.db_pool)
-    broadcaster = InvoiceEventBroadcaster()
     event_publisher = _BroadcasterEventPublisher(broadcaster)
+    batch_status_broadcaster = InvoiceEventBroadcaster(
+        max_queue_size=settings.pubsub_subscriber_queue_size,
+        overflow_policy=settings.pubsub_overflow_policy,
+        name="batch_status",
+    )
+    batch_tracker = _PublishingBatchTracker(
+        InvoiceBatchTrackerAsyncpg(
+            db_pool=app.state.db_pool, read_pool=app.state.db_read_pool
+        ),
+        batch_status_broadcaster,
+    )
+    factus_concurrency_limiter = AdaptiveConcurrencyLimiter(
+        initial_limit=settings.factus_concurrency_initial,
+        min_limit=settings.factus_concurrency_min,
+        max_limit=settings.factus_concurrency_max,
+        is_overload=is_factus_overload,
+    )
+    retry_queue = (
+        InvoiceRetryQueueAsyncpg(db_pool=app.state.db_pool)
+        if settings.invoice_retry_queue_enabled
+        else None
+    )
     process_invoice_batch_use_case = ProcessInvoiceBatchUseCase(
         invoice_repository=invoice_repository,
         factus_client=factus_client,
         event_publisher=event_publisher,
+        stream_flush_size=settings.factus_stream_flush_size or None,
+        stream_flush_interval_seconds=settings.factus_stream_flush_interval_seconds,
+        concurrency_limiter=factus_concurrency_limiter,
+        circuit_breaker=factus_circuit_breaker,
+        retry_queue=retry_queue,
+        retry_queue_delay_seconds=settings.invoice_retry_delay_seconds,
+        batch_tracker=batch_tracker if settings.invoice_batch_tracking_enabled else None,
     )
+    retry_worker: InvoiceRetryWorker | None = None
+    if retry_queue is not None:
+        retry_worker = InvoiceRetryWorker(
+            retry_failed_invoices_use_case=RetryFailedInvoicesUseCase(
+                retry_queue=retry_queue,
+                invoice_repository=invoice_repository,
+                factus_client=factus_client,
+                event_publisher=event_publisher,
+                concurrency_limiter=factus_concurrency_limiter,
+                circuit_breaker=factus_circuit_breaker,
+                max_attempts=settings.invoice_retry_max_attempts,
+                base_delay_seconds=settings.invoice_retry_delay_seconds,
+                max_delay_seconds=settings.invoice_retry_max_delay_seconds,
+                batch_tracker=batch_tracker if settings.invoice_batch_tracking_enabled else None,
+            ),
+            batch_size=settings.invoice_retry_batch_size,
+            poll_interval_seconds=settings.invoice_retry_poll_interval_seconds,
+            max_per_second=settings.invoice_retry_max_per_second or None,
+        )
+    partition_worker: InvoicePartitionWorker | None = None
+    if settings.invoice_partition_maintenance_enabled:
+        partition_worker = InvoicePartitionWorker(
+            partition_manager=InvoicePartitionManagerAsyncpg(
+                db_pool=app.state.db_pool,
+                months_ahead=settings.invoice_partition_months_ahead,
+            ),
+            interval_seconds=settings.invoice_partition_maintenance_interval_seconds,
+        )
     consumer = InvoiceKafkaConsumer(
         process_invoice_batch_use_case=process_invoice_batch_use_case
     )
     app.state.factus_client = factus_client
     app.state.invoice_repository = invoice_repository
     app.state.invoice_broadcaster = broadcaster
+    app.state.batch_tracker = batch_tracker
+    app.state.batch_status_broadcaster = batch_status_broadcaster
     await consumer.start()
     app.state.consumer = consumer
+    if retry_worker is not None:
+        await retry_worker.start()
+    if partition_worker is not None:
+        await partition_worker.start()
 
     try:
         yield
     finally:
+        if partition_worker is not None:
+            await partition_worker.stop()
+        if retry_worker is not None:
+            await retry_worker.stop()
         await consumer.stop()
         await factus_client.close()
+        await app.state.db_read_pool.close()
         await app.state.db_pool.close()
         asyncpg_instrumentor.uninstrument()
         aiokafka_instrumentor.uninstrument()
@@ -1,10 +1,16 @@
 import asyncio
 from time import perf_counter
+from typing import ClassVar
 
 import asyncpg
 import polars as pl
 
 from app.core.config import settings
+from app.invoicing.infrastructure.persistence.postgres.binary_copy import (
+    PgCopyType,
+    encode_binary_copy,
+    iter_copy_chunks,
+)
 
 TAX_RATE = 0.19
 
@@ -18,6 +24,14 @@ class InvoiceEtlService:
         "currency",
         "tax_amount",
     ]
+    INVOICE_COPY_TYPES: ClassVar[dict[str, PgCopyType]] = {
+        "external_id": "text",
+        "customer_id": "text",
+        "issued_at": "timestamptz",
+        "total": "numeric",
+        "currency": "text",
+        "tax_amount": "numeric",
+    }
 
     def __init__(self, db_pool: asyncpg.Pool | None = None) -> None:
         self._database_url = settings.database_url
@@ -60,23 +74,25 @@ class InvoiceEtlService:
         if df.is_empty():
             return
 
-        records = df.select(self.INVOICE_COLUMNS).rows()
+        copy_buffer = await asyncio.to_thread(encode_binary_copy, df, self.INVOICE_COPY_TYPES)
 
         if self._db_pool is not None:
             async with self._db_pool.acquire() as connection:
-                await connection.copy_records_to_table(
+                await connection.copy_to_table(
                     "invoices",
-                    records=records,
+                    source=iter_copy_chunks(copy_buffer),
                     columns=self.INVOICE_COLUMNS,
+                    format="binary",
                 )
             return
 
         connection = await asyncpg.connect(self._database_url)
         try:
-            await connection.copy_records_to_table(
+            await connection.copy_to_table(
                 "invoices",
-                records=records,
+                source=iter_copy_chunks(copy_buffer),
                 columns=self.INVOICE_COLUMNS,
+                format="binary",
             )
         finally:
             await connection.close()
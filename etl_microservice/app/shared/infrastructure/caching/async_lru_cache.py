@@ -0,0 +1,86 @@
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from time import monotonic
+from typing import Generic, TypeVar
+
+from app.shared.infrastructure.metrics.prometheus_metrics import (
+    CACHE_ENTRIES,
+    CACHE_INVALIDATIONS,
+    CACHE_REQUESTS,
+)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class AsyncLruTtlCache(Generic[K, V]):
+    """In-process LRU cache with a TTL that coalesces concurrent loads of one key.
+
+    The first caller for a missing key starts the load; callers arriving while it runs
+    await the same result. A failed load is not cached. ``invalidate`` drops matching
+    entries and detaches matching in-flight loads, so a load that started before a
+    write can still answer its own callers but never repopulates the cache.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, name: str = "cache") -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._name = name
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._in_flight: dict[K, asyncio.Task[V]] = {}
+        CACHE_ENTRIES.labels(name).set_function(lambda: len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_load(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if monotonic() < expires_at:
+                self._entries.move_to_end(key)
+                CACHE_REQUESTS.labels(self._name, "hit").inc()
+                return value
+            del self._entries[key]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            CACHE_REQUESTS.labels(self._name, "coalesced").inc()
+            return await asyncio.shield(task)
+
+        CACHE_REQUESTS.labels(self._name, "miss").inc()
+        task = asyncio.ensure_future(loader())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._on_loaded(key, done))
+        # Shielded so a cancelled first caller does not fail the callers coalesced onto it.
+        return await asyncio.shield(task)
+
+    def invalidate(self, predicate: Callable[[K], bool]) -> int:
+        """Drops cached entries and in-flight loads whose key matches ``predicate``."""
+        stale = [key for key in self._entries if predicate(key)]
+        for key in stale:
+            del self._entries[key]
+        for key in [key for key in self._in_flight if predicate(key)]:
+            del self._in_flight[key]
+        if stale:
+            CACHE_INVALIDATIONS.labels(self._name).inc(len(stale))
+        return len(stale)
+
+    def clear(self) -> None:
+        self.invalidate(lambda key: True)
+
+    def _on_loaded(self, key: K, task: asyncio.Task[V]) -> None:
+        if self._in_flight.get(key) is not task:
+            return
+        del self._in_flight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._entries[key] = (monotonic() + self._ttl_seconds, task.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
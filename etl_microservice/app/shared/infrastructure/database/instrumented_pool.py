@@ -0,0 +1,63 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import Any
+
+import asyncpg  # type: ignore[import-untyped]
+
+from app.shared.infrastructure.metrics.prometheus_metrics import (
+    DB_POOL_ACQUIRE_SECONDS,
+    DB_POOL_CONNECTIONS,
+    DB_POOL_MAX_CONNECTIONS,
+)
+
+
+class InstrumentedPool:
+    """Named asyncpg pool that records how long callers wait for a connection.
+
+    ``acquire`` has the same ``async with`` shape as ``asyncpg.Pool.acquire``, so the
+    repositories can take either one.
+    """
+
+    def __init__(self, pool: asyncpg.Pool, name: str, acquire_timeout: float | None = None) -> None:
+        self._pool = pool
+        self._name = name
+        self._acquire_timeout = acquire_timeout
+        self._acquire_seconds = DB_POOL_ACQUIRE_SECONDS.labels(name)
+        DB_POOL_CONNECTIONS.labels(name, "idle").set_function(pool.get_idle_size)
+        DB_POOL_CONNECTIONS.labels(name, "in_use").set_function(
+            lambda: pool.get_size() - pool.get_idle_size()
+        )
+        DB_POOL_MAX_CONNECTIONS.labels(name).set(pool.get_max_size())
+
+    @classmethod
+    async def create(
+        cls,
+        dsn: str,
+        name: str,
+        min_size: int,
+        max_size: int,
+        acquire_timeout: float | None = None,
+        **pool_kwargs: Any,
+    ) -> "InstrumentedPool":
+        pool = await asyncpg.create_pool(dsn, min_size=min_size, max_size=max_size, **pool_kwargs)
+        return cls(pool, name=name, acquire_timeout=acquire_timeout)
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+        started_at = perf_counter()
+        try:
+            connection = await self._pool.acquire(timeout=self._acquire_timeout)
+        finally:
+            self._acquire_seconds.observe(perf_counter() - started_at)
+        try:
+            yield connection
+        finally:
+            await self._pool.release(connection)
+
+    async def close(self) -> None:
+        await self._pool.close()
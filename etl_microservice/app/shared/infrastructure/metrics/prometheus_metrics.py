@@ -0,0 +1,156 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+CONCURRENCY_LIMIT = Gauge(
+    "adaptive_concurrency_limit",
+    "Current limit of an adaptive concurrency limiter.",
+    ["limiter"],
+)
+CONCURRENCY_IN_FLIGHT = Gauge(
+    "adaptive_concurrency_in_flight",
+    "Calls currently holding a slot of an adaptive concurrency limiter.",
+    ["limiter"],
+)
+CONCURRENCY_QUEUE_DEPTH = Gauge(
+    "adaptive_concurrency_queue_depth",
+    "Calls waiting for a slot of an adaptive concurrency limiter.",
+    ["limiter"],
+)
+CONCURRENCY_WAIT_SECONDS = Histogram(
+    "adaptive_concurrency_wait_seconds",
+    "Time spent waiting for a slot of an adaptive concurrency limiter.",
+    ["limiter"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+FACTUS_HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "factus_http_requests_in_flight",
+    "Factus HTTP requests currently awaiting a response.",
+)
+FACTUS_HTTP_REQUEST_SECONDS = Histogram(
+    "factus_http_request_seconds",
+    "Latency of single Factus HTTP requests by endpoint and outcome.",
+    ["endpoint", "outcome"],
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0, 10.0, 30.0),
+)
+FACTUS_RETRIES = Counter(
+    "factus_retries_total",
+    "Factus invoice requests sent again: after a 429, a timeout, or via the retry queue.",
+    ["reason"],
+)
+FACTUS_HTTP_POOL_MAX_CONNECTIONS = Gauge(
+    "factus_http_pool_max_connections",
+    "Configured connection limit of the Factus HTTP connection pool.",
+)
+
+CIRCUIT_BREAKER_STATE = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state: 0 closed, 1 half-open, 2 open.",
+    ["breaker"],
+)
+CIRCUIT_BREAKER_REJECTED_CALLS = Counter(
+    "circuit_breaker_rejected_calls_total",
+    "Calls rejected because the circuit was open.",
+    ["breaker"],
+)
+
+PUBSUB_SUBSCRIBERS = Gauge(
+    "pubsub_subscribers",
+    "Subscribers currently attached to an in-process broadcaster.",
+    ["broadcaster"],
+)
+PUBSUB_PUBLISHED_EVENTS = Counter(
+    "pubsub_published_events_total",
+    "Events handed to an in-process broadcaster while it had subscribers.",
+    ["broadcaster"],
+)
+PUBSUB_DROPPED_EVENTS = Counter(
+    "pubsub_dropped_events_total",
+    "Events not delivered because a subscriber queue was full.",
+    ["broadcaster", "policy"],
+)
+PUBSUB_DISCONNECTED_SUBSCRIBERS = Counter(
+    "pubsub_disconnected_subscribers_total",
+    "Subscribers disconnected for falling behind.",
+    ["broadcaster"],
+)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Lookups against an in-process cache: hit, miss or coalesced onto an in-flight load.",
+    ["cache", "result"],
+)
+CACHE_ENTRIES = Gauge(
+    "cache_entries",
+    "Entries currently held by an in-process cache.",
+    ["cache"],
+)
+CACHE_INVALIDATIONS = Counter(
+    "cache_invalidated_entries_total",
+    "Cache entries dropped because the data behind them changed.",
+    ["cache"],
+)
+
+DB_POOL_ACQUIRE_SECONDS = Histogram(
+    "db_pool_acquire_seconds",
+    "Time spent waiting for a connection from a database pool.",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Connections held by a database pool.",
+    ["pool", "state"],
+)
+DB_POOL_MAX_CONNECTIONS = Gauge(
+    "db_pool_max_connections",
+    "Configured connection limit of a database pool.",
+    ["pool"],
+)
+
+INVOICE_PARTITION_DEFAULT_ROWS = Gauge(
+    "invoice_partition_default_rows",
+    "Rows left in invoices_default after the last partition maintenance run.",
+)
+INVOICE_PARTITION_MONTHS_AHEAD = Gauge(
+    "invoice_partition_months_ahead",
+    "Future months with an invoices partition, counted contiguously from the current one.",
+)
+INVOICE_PARTITION_MAINTENANCE_RUNS = Counter(
+    "invoice_partition_maintenance_runs_total",
+    "Partition maintenance runs by outcome.",
+    ["result"],
+)
+
+INVOICE_PIPELINE_STAGE_SECONDS = Histogram(
+    "invoice_pipeline_stage_seconds",
+    "Time spent by one invoice batch in a stage of the Kafka to Postgres pipeline.",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+INVOICE_BATCH_SECONDS = Histogram(
+    "invoice_batch_seconds",
+    "End-to-end processing time of an invoice batch, from transform to persisted.",
+    ["result"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+INVOICE_BATCHES_IN_FLIGHT = Gauge(
+    "invoice_batches_in_flight",
+    "Invoice batches currently being processed.",
+)
+INVOICE_COPY_SECONDS = Histogram(
+    "invoice_copy_seconds",
+    "Time spent writing one invoice frame to Postgres, COPY and rollups included.",
+    ["mode"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+INVOICE_COPY_ROWS = Counter(
+    "invoice_copy_rows_total",
+    "Invoice rows written to Postgres through binary COPY.",
+    ["mode"],
+)
+
+KAFKA_CONSUMER_LAG = Gauge(
+    "kafka_consumer_lag",
+    "Messages of an assigned partition not processed yet, from the last fetched high watermark.",
+    ["topic", "partition"],
+)
@@ -1,28 +1,125 @@
 import asyncio
-from collections.abc import AsyncGenerator
+import logging
+from collections.abc import AsyncGenerator, Sequence
 from typing import Any
 
+from app.shared.infrastructure.metrics.prometheus_metrics import (
+    PUBSUB_DISCONNECTED_SUBSCRIBERS,
+    PUBSUB_DROPPED_EVENTS,
+    PUBSUB_PUBLISHED_EVENTS,
+    PUBSUB_SUBSCRIBERS,
+)
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_DISCONNECT = "disconnect"
+
+_OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_DISCONNECT)
+_DISCONNECTED = object()
+
+
+class _Subscription:
+    __slots__ = ("disconnected", "queue")
+
+    def __init__(self, max_queue_size: int) -> None:
+        # One extra slot so the disconnect marker always fits behind a full queue.
+        self.queue: asyncio.Queue[Any] = asyncio.Queue(maxsize=max_queue_size + 1)
+        self.disconnected = False
+
 
 class InvoiceEventBroadcaster:
-    """Thread-safe, in-process pub/sub broadcaster for invoice processing events."""
+    """In-process pub/sub broadcaster for invoice processing events.
 
-    def __init__(self) -> None:
-        self._subscribers: list[asyncio.Queue[Any]] = []
-        self._lock = asyncio.Lock()
+    Every subscriber gets a queue bounded by ``max_queue_size``, and ``publish`` never
+    waits on them. When a slow subscriber's queue is full, ``overflow_policy`` decides
+    whether its oldest event is dropped, the new event is dropped, or the subscriber is
+    disconnected, which ends its stream.
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = 1000,
+        overflow_policy: str = OVERFLOW_DROP_OLDEST,
+        name: str = "invoice_events",
+    ) -> None:
+        if max_queue_size < 1:
+            raise ValueError("max_queue_size must be at least 1")
+        if overflow_policy not in _OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy: {overflow_policy}")
+        self._max_queue_size = max_queue_size
+        self._overflow_policy = overflow_policy
+        self._name = name
+        self._subscribers: list[_Subscription] = []
+        PUBSUB_SUBSCRIBERS.labels(name).set_function(lambda: len(self._subscribers))
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
 
     async def publish(self, event: Any) -> None:
-        async with self._lock:
-            queues = list(self._subscribers)
-        for queue in queues:
-            await queue.put(event)
+        await self.publish_many((event,))
+
+    async def publish_many(self, events: Sequence[Any]) -> None:
+        """Hands a whole batch to every subscriber in one pass, without awaiting."""
+        if not events or not self._subscribers:
+            return
+        PUBSUB_PUBLISHED_EVENTS.labels(self._name).inc(len(events))
+        for subscription in tuple(self._subscribers):
+            self._offer(subscription, events)
 
     async def subscribe(self) -> AsyncGenerator[Any, None]:
-        queue: asyncio.Queue[Any] = asyncio.Queue()
-        async with self._lock:
-            self._subscribers.append(queue)
+        subscription = _Subscription(self._max_queue_size)
+        self._subscribers.append(subscription)
         try:
             while True:
-                yield await queue.get()
+                event = await subscription.queue.get()
+                if event is _DISCONNECTED:
+                    return
+                yield event
         finally:
-            async with self._lock:
-                self._subscribers.remove(queue)
+            self._unsubscribe(subscription)
+
+    def _offer(self, subscription: _Subscription, events: Sequence[Any]) -> None:
+        if subscription.disconnected:
+            return
+        queue = subscription.queue
+        if self._overflow_policy == OVERFLOW_DROP_OLDEST:
+            self._offer_dropping_oldest(queue, events)
+            return
+        free_slots = max(self._max_queue_size - queue.qsize(), 0)
+        for event in events[:free_slots]:
+            queue.put_nowait(event)
+        overflow = events[free_slots:]
+        if not overflow:
+            return
+
+        PUBSUB_DROPPED_EVENTS.labels(self._name, self._overflow_policy).inc(len(overflow))
+        if self._overflow_policy == OVERFLOW_DISCONNECT:
+            logger.warning(
+                "pubsub_slow_subscriber_disconnected broadcaster=%s queue_size=%s",
+                self._name,
+                self._max_queue_size,
+            )
+            PUBSUB_DISCONNECTED_SUBSCRIBERS.labels(self._name).inc()
+            self._unsubscribe(subscription)
+            subscription.disconnected = True
+            queue.put_nowait(_DISCONNECTED)
+
+    def _offer_dropping_oldest(self, queue: asyncio.Queue[Any], events: Sequence[Any]) -> None:
+        # Only the newest max_queue_size events can survive, so older incoming events are
+        # never queued and only as many queued events are evicted as the rest need.
+        kept = events[-self._max_queue_size :]
+        evicted = max(queue.qsize() + len(kept) - self._max_queue_size, 0)
+        for _ in range(evicted):
+            queue.get_nowait()
+        for event in kept:
+            queue.put_nowait(event)
+        dropped = len(events) - len(kept) + evicted
+        if dropped:
+            PUBSUB_DROPPED_EVENTS.labels(self._name, self._overflow_policy).inc(dropped)
+
+    def _unsubscribe(self, subscription: _Subscription) -> None:
+        if subscription in self._subscribers:
+            self._subscribers.remove(subscription)
@@ -0,0 +1,135 @@
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from time import monotonic
+
+from app.shared.infrastructure.metrics.prometheus_metrics import (
+    CONCURRENCY_IN_FLIGHT,
+    CONCURRENCY_LIMIT,
+    CONCURRENCY_QUEUE_DEPTH,
+    CONCURRENCY_WAIT_SECONDS,
+)
+
+
+def _never_overloaded(exc: BaseException) -> bool:
+    return False
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limiter shared by every caller of a downstream dependency.
+
+    The limit grows by roughly one slot per window of calls whose latency stays within
+    ``latency_tolerance`` times the observed baseline, and is multiplied by
+    ``backoff_ratio`` when a call fails with an error that ``is_overload`` classifies as
+    overload. Decreases are spaced by at least one baseline latency so a single burst of
+    failures only backs off once.
+    """
+
+    _BASELINE_DRIFT = 0.01
+
+    def __init__(
+        self,
+        initial_limit: int = 50,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        backoff_ratio: float = 0.5,
+        latency_tolerance: float = 2.0,
+        is_overload: Callable[[BaseException], bool] = _never_overloaded,
+        name: str = "factus",
+    ) -> None:
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0 < backoff_ratio < 1:
+            raise ValueError("backoff_ratio must be between 0 and 1")
+        self._limit = float(initial_limit)
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._backoff_ratio = backoff_ratio
+        self._latency_tolerance = latency_tolerance
+        self._is_overload = is_overload
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._baseline_latency: float | None = None
+        self._last_decrease_at = float("-inf")
+        self._wait_seconds = CONCURRENCY_WAIT_SECONDS.labels(name)
+        CONCURRENCY_LIMIT.labels(name).set_function(lambda: self.limit)
+        CONCURRENCY_IN_FLIGHT.labels(name).set_function(lambda: self.in_flight)
+        CONCURRENCY_QUEUE_DEPTH.labels(name).set_function(lambda: self.queue_depth)
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def max_limit(self) -> int:
+        return self._max_limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        requested_at = monotonic()
+        await self._acquire_slot()
+        started_at = monotonic()
+        self._wait_seconds.observe(started_at - requested_at)
+        try:
+            yield
+        except BaseException as exc:
+            self._release(overloaded=self._is_overload(exc), latency=None)
+            raise
+        self._release(overloaded=False, latency=monotonic() - started_at)
+
+    async def _acquire_slot(self) -> None:
+        if not self._waiters and self._in_flight < self.limit:
+            self._in_flight += 1
+            return
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._in_flight -= 1
+                self._wake_waiters()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def _release(self, overloaded: bool, latency: float | None) -> None:
+        self._in_flight -= 1
+        if overloaded:
+            self._on_overload()
+        elif latency is not None:
+            self._on_success(latency)
+        self._wake_waiters()
+
+    def _on_success(self, latency: float) -> None:
+        baseline = self._baseline_latency
+        if baseline is None or latency < baseline:
+            self._baseline_latency = latency
+        else:
+            self._baseline_latency = baseline + (latency - baseline) * self._BASELINE_DRIFT
+        if baseline is None or latency <= baseline * self._latency_tolerance:
+            self._limit = min(float(self._max_limit), self._limit + 1 / self._limit)
+
+    def _on_overload(self) -> None:
+        now = monotonic()
+        if now - self._last_decrease_at < (self._baseline_latency or 0.0):
+            return
+        self._last_decrease_at = now
+        self._limit = max(float(self._min_limit), self._limit * self._backoff_ratio)
+
+    def _wake_waiters(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
@@ -0,0 +1,134 @@
+import asyncio
+from collections import deque
+from time import monotonic
+
+from app.shared.infrastructure.metrics.prometheus_metrics import (
+    CIRCUIT_BREAKER_REJECTED_CALLS,
+    CIRCUIT_BREAKER_STATE,
+)
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_HALF_OPEN = "half_open"
+CIRCUIT_OPEN = "open"
+
+_STATE_GAUGE_VALUES = {CIRCUIT_CLOSED: 0, CIRCUIT_HALF_OPEN: 1, CIRCUIT_OPEN: 2}
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Count-based circuit breaker that fails fast while a dependency is unhealthy.
+
+    The circuit opens once at least ``minimum_calls`` of the last ``window_size`` calls
+    were recorded and the failure rate reaches ``failure_rate_threshold``. After
+    ``open_seconds`` it turns half-open and lets ``half_open_max_calls`` probes through;
+    other callers wait for the probes' verdict instead of being rejected. A failed probe
+    reopens the circuit, enough successful probes close it.
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        window_size: int = 20,
+        minimum_calls: int = 10,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+        name: str = "factus",
+    ) -> None:
+        if not 0 < failure_rate_threshold <= 1:
+            raise ValueError("failure_rate_threshold must be in (0, 1]")
+        if not 1 <= minimum_calls <= window_size:
+            raise ValueError("minimum_calls must be between 1 and window_size")
+        self._failure_rate_threshold = failure_rate_threshold
+        self._minimum_calls = minimum_calls
+        self._open_seconds = open_seconds
+        self._half_open_max_calls = half_open_max_calls
+        self._name = name
+        self._outcomes: deque[bool] = deque(maxlen=window_size)
+        self._state = CIRCUIT_CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._state_changed = asyncio.Event()
+        CIRCUIT_BREAKER_STATE.labels(name).set_function(
+            lambda: _STATE_GAUGE_VALUES[self.state]
+        )
+
+    @property
+    def state(self) -> str:
+        if self._state == CIRCUIT_OPEN and self.retry_after == 0:
+            self._transition(CIRCUIT_HALF_OPEN)
+        return self._state
+
+    @property
+    def retry_after(self) -> float:
+        if self._state != CIRCUIT_OPEN:
+            return 0.0
+        return max(self._opened_at + self._open_seconds - monotonic(), 0.0)
+
+    def raise_if_open(self) -> None:
+        """Raises ``CircuitOpenError`` while open, without taking a half-open probe slot."""
+        if self.state == CIRCUIT_OPEN:
+            CIRCUIT_BREAKER_REJECTED_CALLS.labels(self._name).inc()
+            raise CircuitOpenError(self._name, self.retry_after)
+
+    async def before_call(self) -> None:
+        while True:
+            state = self.state
+            if state == CIRCUIT_CLOSED:
+                return
+            if state == CIRCUIT_OPEN:
+                CIRCUIT_BREAKER_REJECTED_CALLS.labels(self._name).inc()
+                raise CircuitOpenError(self._name, self.retry_after)
+            if self._probes_in_flight < self._half_open_max_calls:
+                self._probes_in_flight += 1
+                return
+            await self._state_changed.wait()
+
+    def record_success(self) -> None:
+        if self._state == CIRCUIT_HALF_OPEN:
+            self._release_probe()
+            self._probe_successes += 1
+            if self._probe_successes >= self._half_open_max_calls:
+                self._transition(CIRCUIT_CLOSED)
+        elif self._state == CIRCUIT_CLOSED:
+            self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        if self._state == CIRCUIT_HALF_OPEN:
+            self._release_probe()
+            self._transition(CIRCUIT_OPEN)
+        elif self._state == CIRCUIT_CLOSED:
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if (
+                len(self._outcomes) >= self._minimum_calls
+                and failures / len(self._outcomes) >= self._failure_rate_threshold
+            ):
+                self._transition(CIRCUIT_OPEN)
+
+    def record_ignored(self) -> None:
+        """Frees a probe slot for a call that ended without a health signal."""
+        if self._state == CIRCUIT_HALF_OPEN:
+            self._release_probe()
+            self._notify_state_changed()
+
+    def _release_probe(self) -> None:
+        self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        self._outcomes.clear()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if state == CIRCUIT_OPEN:
+            self._opened_at = monotonic()
+        self._notify_state_changed()
+
+    def _notify_state_changed(self) -> None:
+        self._state_changed.set()
+        self._state_changed = asyncio.Event()
@@ -0,0 +1,53 @@
+import asyncio
+from time import monotonic
+
+
+class TokenBucketRateLimiter:
+    """Async token bucket with a global pause for honouring server back-off hints.
+
+    ``rate_per_second=None`` disables the bucket itself while keeping ``pause_for``
+    effective, so a 429 ``Retry-After`` is respected even without a configured rate.
+    Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate_per_second: float | None, burst: int | None = None) -> None:
+        if rate_per_second is not None and rate_per_second <= 0:
+            raise ValueError("rate_per_second must be positive")
+        self._rate = rate_per_second
+        self._capacity = float(burst or max(1, int(rate_per_second or 1)))
+        self._tokens = self._capacity
+        self._updated_at = monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def paused_for(self) -> float:
+        return max(self._paused_until - monotonic(), 0.0)
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                if self._rate is None:
+                    return
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    def pause_for(self, seconds: float) -> None:
+        """Blocks every caller for ``seconds`` and drops accumulated burst credit."""
+        now = monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+        self._updated_at = max(self._updated_at, self._paused_until)
+
+    def _refill(self, now: float) -> None:
+        if self._rate is None or now <= self._updated_at:
+            return
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
@@ -0,0 +1,274 @@
+"""Local stand-in for the Factus endpoints the ETL calls, with injectable latency and faults.
+
+In tests and benchmarks, plug it straight into the client::
+
+    stand_in = FactusStandIn(FactusStandInConfig(latency_median_ms=80, rate_limit_rate=0.05))
+    client = FactusAsyncClient(..., transport=stand_in.transport())
+
+Or run it as a server from ``etl_microservice`` and point ``FACTUS_BASE_URL`` at it::
+
+    python -m benchmarks.factus_stand_in --port 8090 --latency-median-ms 80 --error-rate 0.01
+
+Only ``/oauth/token``, ``/v1/numbering-ranges`` and ``/v1/bills/validate`` are served.
+Credentials are not checked. Every issued token expires after ``token_expires_in`` seconds.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import secrets
+import time
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import parse_qs
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+# Standard normal quantile for p99, used to derive the lognormal sigma from median and p99.
+_Z_P99 = 2.3263478740408408
+_BILLS_PATH = "/v1/bills/validate"
+
+
+@dataclass(frozen=True, slots=True)
+class FactusStandInConfig:
+    """Behaviour of the stand-in. Rates are per request probabilities in ``[0, 1]``."""
+
+    latency_distribution: str = "lognormal"
+    latency_median_ms: float = 0.0
+    latency_p99_ms: float | None = None
+    # 5xx answers, split evenly between 500 and 503.
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after_seconds: float = 1.0
+    # Concurrent bill requests above this limit are answered 429 as well. ``None`` disables it.
+    max_in_flight: int | None = None
+    token_expires_in: int = 3600
+    numbering_range_id: int = 1
+    # Only the bills endpoint gets latency and faults unless this is set.
+    faults_on_all_endpoints: bool = False
+    seed: int | None = None
+
+    def __post_init__(self) -> None:
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                "latency_distribution must be one of " + ", ".join(LATENCY_DISTRIBUTIONS)
+            )
+        if self.latency_median_ms < 0:
+            raise ValueError("latency_median_ms must not be negative")
+        if self.latency_p99_ms is not None and self.latency_p99_ms < self.latency_median_ms:
+            raise ValueError("latency_p99_ms must not be lower than latency_median_ms")
+        for name in ("error_rate", "rate_limit_rate"):
+            if not 0.0 <= getattr(self, name) <= 1.0:
+                raise ValueError(f"{name} must be between 0 and 1")
+        if self.error_rate + self.rate_limit_rate > 1.0:
+            raise ValueError("error_rate and rate_limit_rate must not add up to more than 1")
+        if self.max_in_flight is not None and self.max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+
+class FactusStandIn:
+    """FastAPI app emulating Factus, with request counters for assertions."""
+
+    def __init__(self, config: FactusStandInConfig | None = None) -> None:
+        self.config = config or FactusStandInConfig()
+        self.responses: Counter[tuple[str, int]] = Counter()
+        self.peak_in_flight = 0
+        self._random = random.Random(self.config.seed)
+        self._tokens: dict[str, float] = {}
+        self._bill_sequence = 0
+        self._in_flight = 0
+        self.app = self._build_app()
+
+    def transport(self) -> httpx.ASGITransport:
+        return httpx.ASGITransport(app=self.app)
+
+    def expire_tokens(self) -> None:
+        """Makes every issued token stale, as if Factus had revoked them."""
+        self._tokens.clear()
+
+    def sample_latency_seconds(self) -> float:
+        config = self.config
+        median = config.latency_median_ms / 1000
+        p99 = median if config.latency_p99_ms is None else config.latency_p99_ms / 1000
+        if median <= 0 or config.latency_distribution == "fixed" or p99 == median:
+            return median
+        if config.latency_distribution == "uniform":
+            # Symmetric around the median, so p99 sits just below the upper bound.
+            spread = (p99 - median) / 0.98
+            return self._random.uniform(max(median - spread, 0.0), median + spread)
+        sigma = math.log(p99 / median) / _Z_P99
+        return self._random.lognormvariate(math.log(median), sigma)
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="Factus stand-in", openapi_url=None)
+        app.add_api_route("/oauth/token", self._issue_token, methods=["POST"])
+        app.add_api_route("/v1/numbering-ranges", self._numbering_ranges, methods=["GET"])
+        app.add_api_route(_BILLS_PATH, self._validate_bill, methods=["POST"])
+        return app
+
+    async def _issue_token(self, request: Request) -> JSONResponse:
+        form = parse_qs((await request.body()).decode("utf-8"))
+        if not form.get("email") or not form.get("password"):
+            return self._respond(request, 400, {"message": "email and password are required"})
+        fault = await self._inject(request)
+        if fault is not None:
+            return fault
+        token = secrets.token_urlsafe(24)
+        self._tokens[token] = time.monotonic() + self.config.token_expires_in
+        return self._respond(
+            request,
+            200,
+            {
+                "token_type": "Bearer",
+                "expires_in": self.config.token_expires_in,
+                "access_token": token,
+                "refresh_token": secrets.token_urlsafe(24),
+            },
+        )
+
+    async def _numbering_ranges(self, request: Request) -> JSONResponse:
+        if not self._is_authorized(request):
+            return self._respond(request, 401, {"message": "Unauthenticated."})
+        fault = await self._inject(request)
+        if fault is not None:
+            return fault
+        return self._respond(
+            request,
+            200,
+            {
+                "data": [
+                    {
+                        "id": self.config.numbering_range_id,
+                        "document": "Factura de Venta",
+                        "prefix": "SETP",
+                        "is_active": 1,
+                    }
+                ]
+            },
+        )
+
+    async def _validate_bill(self, request: Request) -> JSONResponse:
+        if not self._is_authorized(request):
+            return self._respond(request, 401, {"message": "Unauthenticated."})
+        limit = self.config.max_in_flight
+        if limit is not None and self._in_flight >= limit:
+            return self._rate_limited(request)
+        self._in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+        try:
+            fault = await self._inject(request)
+            if fault is not None:
+                return fault
+            try:
+                body = json.loads(await request.body())
+            except ValueError:
+                return self._respond(request, 400, {"message": "Invalid JSON body"})
+            if not isinstance(body, dict):
+                return self._respond(request, 400, {"message": "Invalid JSON body"})
+            if body.get("numbering_range_id") != self.config.numbering_range_id:
+                return self._respond(
+                    request, 422, {"message": "El rango de numeración no existe o está inactivo"}
+                )
+            self._bill_sequence += 1
+            bill_id = self._bill_sequence
+            number = f"SETP{990000000 + bill_id}"
+            return self._respond(
+                request,
+                201,
+                {
+                    "status": "Created",
+                    "message": f"Documento con el número {number} ha sido validado según la DIAN.",
+                    "data": {
+                        "id": bill_id,
+                        "number": number,
+                        "reference_code": body.get("reference_code"),
+                        "qr": f"https://catalogo-vpfe-hab.dian.gov.co/document/searchqr?id={number}",
+                        "pdf": f"https://factus.stand-in/bills/{number}.pdf",
+                    },
+                },
+            )
+        finally:
+            self._in_flight -= 1
+
+    def _is_authorized(self, request: Request) -> bool:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        expires_at = self._tokens.get(token)
+        if scheme != "Bearer" or expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._tokens[token]
+            return False
+        return True
+
+    async def _inject(self, request: Request) -> JSONResponse | None:
+        """Sleeps for the sampled latency and returns the injected fault, if any."""
+        if not self.config.faults_on_all_endpoints and request.url.path != _BILLS_PATH:
+            return None
+        latency = self.sample_latency_seconds()
+        if latency > 0:
+            await asyncio.sleep(latency)
+        draw = self._random.random()
+        if draw < self.config.rate_limit_rate:
+            return self._rate_limited(request)
+        if draw < self.config.rate_limit_rate + self.config.error_rate:
+            status_code = 503 if self._random.random() < 0.5 else 500
+            return self._respond(request, status_code, {"message": "Injected server error"})
+        return None
+
+    def _rate_limited(self, request: Request) -> JSONResponse:
+        response = self._respond(request, 429, {"message": "Too Many Attempts."})
+        response.headers["Retry-After"] = f"{self.config.retry_after_seconds:g}"
+        return response
+
+    def _respond(self, request: Request, status_code: int, body: dict[str, Any]) -> JSONResponse:
+        self.responses[(request.url.path, status_code)] += 1
+        return JSONResponse(body, status_code=status_code)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency-median-ms", type=float, default=0.0)
+    parser.add_argument("--latency-p99-ms", type=float)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after-seconds", type=float, default=1.0)
+    parser.add_argument("--max-in-flight", type=int)
+    parser.add_argument("--token-expires-in", type=int, default=3600)
+    parser.add_argument("--numbering-range-id", type=int, default=1)
+    parser.add_argument("--faults-on-all-endpoints", action="store_true")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    stand_in = FactusStandIn(
+        FactusStandInConfig(
+            latency_distribution=args.latency_distribution,
+            latency_median_ms=args.latency_median_ms,
+            latency_p99_ms=args.latency_p99_ms,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            retry_after_seconds=args.retry_after_seconds,
+            max_in_flight=args.max_in_flight,
+            token_expires_in=args.token_expires_in,
+            numbering_range_id=args.numbering_range_id,
+            faults_on_all_endpoints=args.faults_on_all_endpoints,
+            seed=args.seed,
+        )
+    )
+    uvicorn.run(stand_in.app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,240 @@
+"""Micro-benchmarks for the per-batch ETL hot path.
+
+Run from ``etl_microservice``::
+
+    python -m benchmarks.hot_path --output benchmarks/results/local.json
+    python -m benchmarks.hot_path --compare benchmarks/results/local.json
+
+Every stage runs on synthetic batches of each ``--sizes`` value. Timings are the best
+and median of ``--repeat`` runs after one warm-up. Peak memory is measured in a separate
+run under ``tracemalloc``, which sees Python and numpy allocations but not the ones made
+inside Polars' Rust code.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tracemalloc
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import numpy as np
+import polars as pl
+
+from app.invoicing.application.use_cases.process_invoice_batch import (
+    FactusInvoiceResult,
+    ProcessInvoiceBatchUseCase,
+)
+from app.invoicing.domain.entities.invoice_batch import InvoiceBatch
+from app.invoicing.infrastructure.api.factus.factus_invoice_payloads import (
+    encode_factus_invoice_bodies,
+)
+from app.invoicing.infrastructure.etl.polars_decoder import decode_invoice_batch
+from app.invoicing.infrastructure.etl.polars_transformer import (
+    transform_invoice_frame,
+    transform_invoices,
+)
+from app.invoicing.infrastructure.persistence.postgres.binary_copy import (
+    encode_binary_copy,
+)
+from app.invoicing.infrastructure.persistence.postgres.invoice_repository_asyncpg import (
+    INVOICE_COPY_TYPES,
+    _rollup_deltas,
+)
+
+DEFAULT_SIZES = (100, 10_000, 100_000)
+_BATCH_ID = "benchmark-batch"
+_NUMBERING_RANGE_ID = 1
+# Default factor over the baseline's best time that counts as a regression.
+DEFAULT_REGRESSION_THRESHOLD = 1.25
+
+
+@dataclass(frozen=True, slots=True)
+class BenchmarkResult:
+    name: str
+    size: int
+    runs: int
+    best_seconds: float
+    median_seconds: float
+    rows_per_second: float
+    peak_memory_bytes: int
+
+
+def synthetic_message(size: int) -> dict[str, Any]:
+    started_at = datetime(2026, 2, 1, tzinfo=UTC)
+    return {
+        "batch_id": _BATCH_ID,
+        "payload": {
+            "invoices": [
+                {
+                    "external_id": f"INV-{index:08d}",
+                    "customer_id": f"CUST-{index % 997:04d}",
+                    "issued_at": (started_at + timedelta(seconds=index)).isoformat(),
+                    "total": round(1000 + (index * 37.31) % 250_000, 2),
+                    "currency": "COP",
+                }
+                for index in range(size)
+            ]
+        },
+    }
+
+
+def _factus_results(df: pl.DataFrame) -> list[FactusInvoiceResult]:
+    return [
+        FactusInvoiceResult(
+            external_id=external_id,
+            factus_invoice_id=str(index),
+            qr_url=f"https://factus.test/qr/{index}",
+            pdf_url=f"https://factus.test/pdf/{index}",
+            status="success" if index % 10 else "error",
+            error=None if index % 10 else "rejected",
+        )
+        for index, external_id in enumerate(df.get_column("external_id").to_list())
+    ]
+
+
+def build_stages(size: int) -> dict[str, Callable[[], object]]:
+    """Returns the benchmarked callables for one batch size, with inputs prepared."""
+    message = synthetic_message(size)
+    raw_message = json.dumps(message).encode("utf-8")
+    batch = InvoiceBatch.from_message(message)
+    decoded = decode_invoice_batch(raw_message)
+    transformed = transform_invoice_frame(decoded.invoices, _BATCH_ID)
+    results = _factus_results(transformed)
+    result_df = ProcessInvoiceBatchUseCase._attach_factus_results(transformed, results)
+
+    return {
+        "invoice_batch_from_message": lambda: InvoiceBatch.from_message(message),
+        "decode_invoice_batch": lambda: decode_invoice_batch(raw_message),
+        "transform_invoices": lambda: transform_invoices(batch.invoices, _BATCH_ID),
+        "transform_invoice_frame": lambda: transform_invoice_frame(decoded.invoices, _BATCH_ID),
+        "encode_factus_invoice_bodies": lambda: encode_factus_invoice_bodies(
+            transformed, _BATCH_ID, _NUMBERING_RANGE_ID
+        ),
+        "attach_factus_results": lambda: ProcessInvoiceBatchUseCase._attach_factus_results(
+            transformed, results
+        ),
+        "encode_binary_copy": lambda: encode_binary_copy(result_df, INVOICE_COPY_TYPES),
+        "rollup_deltas": lambda: _rollup_deltas(result_df),
+    }
+
+
+def measure(name: str, size: int, stage: Callable[[], object], repeat: int) -> BenchmarkResult:
+    stage()
+    timings: list[float] = []
+    for _ in range(repeat):
+        started_at = perf_counter()
+        stage()
+        timings.append(perf_counter() - started_at)
+
+    tracemalloc.start()
+    try:
+        stage()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(timings)
+    return BenchmarkResult(
+        name=name,
+        size=size,
+        runs=repeat,
+        best_seconds=best,
+        median_seconds=statistics.median(timings),
+        rows_per_second=size / best if best > 0 else float("inf"),
+        peak_memory_bytes=peak_memory,
+    )
+
+
+def run(sizes: Sequence[int], repeat: int, only: Sequence[str] = ()) -> list[BenchmarkResult]:
+    results: list[BenchmarkResult] = []
+    for size in sizes:
+        for name, stage in build_stages(size).items():
+            if only and name not in only:
+                continue
+            result = measure(name, size, stage, repeat)
+            results.append(result)
+            print(
+                f"{name:<30} size={size:>7} best={result.best_seconds * 1000:>10.3f}ms "
+                f"rows/s={result.rows_per_second:>14,.0f} "
+                f"peak={result.peak_memory_bytes / 1_048_576:>8.2f}MiB",
+                flush=True,
+            )
+    return results
+
+
+def report(results: Sequence[BenchmarkResult]) -> dict[str, Any]:
+    return {
+        "created_at": datetime.now(UTC).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "polars": pl.__version__,
+            "numpy": np.__version__,
+        },
+        "results": [asdict(result) for result in results],
+    }
+
+
+def compare(
+    results: Sequence[BenchmarkResult],
+    baseline: dict[str, Any],
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+) -> list[str]:
+    """Returns one line per benchmark that got slower than the baseline by ``threshold``."""
+    baseline_best = {
+        (entry["name"], entry["size"]): entry["best_seconds"] for entry in baseline["results"]
+    }
+    regressions: list[str] = []
+    for result in results:
+        previous = baseline_best.get((result.name, result.size))
+        if previous is None or previous <= 0:
+            continue
+        ratio = result.best_seconds / previous
+        print(f"{result.name:<30} size={result.size:>7} ratio={ratio:>6.2f}x", flush=True)
+        if ratio > threshold:
+            regressions.append(f"{result.name}[{result.size}] {ratio:.2f}x slower")
+    return regressions
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=list(DEFAULT_SIZES),
+        help="comma-separated batch sizes (default: 100,10000,100000)",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage")
+    parser.add_argument("--only", nargs="*", default=(), help="stage names to run")
+    parser.add_argument("--output", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="baseline JSON file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        help="slowdown factor reported as a regression (default: 1.25)",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, args.only)
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report(results), indent=2) + "\n")
+    if args.compare is not None:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.threshold)
+        if regressions:
+            print("Regressions: " + "; ".join(regressions), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+
+import httpx
+
+from app.invoicing.application.use_cases.process_invoice_batch import is_factus_overload
+from app.shared.infrastructure.resilience.adaptive_concurrency_limiter import (
+    AdaptiveConcurrencyLimiter,
+)
+
+
+class TestAdaptiveConcurrencyLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_grows_while_latency_is_stable(self) -> None:
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=10, name="test-grow")
+
+        for _ in range(40):
+            async with limiter.acquire():
+                pass
+
+        self.assertGreater(limiter.limit, 4)
+        self.assertLessEqual(limiter.limit, 10)
+
+    async def test_backs_off_on_overload_errors(self) -> None:
+        limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=16,
+            min_limit=2,
+            is_overload=is_factus_overload,
+            name="test-backoff",
+        )
+
+        with self.assertRaises(httpx.TimeoutException):
+            async with limiter.acquire():
+                raise httpx.TimeoutException("timeout")
+        self.assertEqual(limiter.limit, 8)
+
+        with self.assertRaises(ValueError):
+            async with limiter.acquire():
+                raise ValueError("not an overload")
+        self.assertEqual(limiter.limit, 8)
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_queues_callers_beyond_the_limit(self) -> None:
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2, name="test-queue")
+        release = asyncio.Event()
+        max_in_flight = 0
+
+        async def call() -> None:
+            nonlocal max_in_flight
+            async with limiter.acquire():
+                max_in_flight = max(max_in_flight, limiter.in_flight)
+                await release.wait()
+
+        tasks = [asyncio.create_task(call()) for _ in range(5)]
+        await asyncio.sleep(0)
+        self.assertEqual(limiter.in_flight, 2)
+        self.assertEqual(limiter.queue_depth, 3)
+
+        release.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(max_in_flight, 2)
+        self.assertEqual(limiter.queue_depth, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
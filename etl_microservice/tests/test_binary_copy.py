@@ -0,0 +1,109 @@
+import struct
+import unittest
+from datetime import UTC, datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+import polars as pl
+
+from app.invoicing.infrastructure.persistence.postgres.binary_copy import (
+    encode_binary_copy,
+    iter_copy_chunks,
+)
+
+_POSTGRES_EPOCH = datetime(2000, 1, 1, tzinfo=UTC)
+_COLUMN_TYPES = {"code": "text", "issued_at": "timestamptz", "amount": "numeric"}
+
+
+def _decode_binary_copy(buffer: bytes, pg_types: list[str]) -> list[tuple]:
+    """Reads the binary COPY format back the way PostgreSQL's receive functions do."""
+    assert buffer[:11] == b"PGCOPY\n\xff\r\n\x00"
+    position = 19
+    rows = []
+    while True:
+        (field_count,) = struct.unpack_from(">h", buffer, position)
+        position += 2
+        if field_count == -1:
+            break
+        row = []
+        for pg_type in pg_types[:field_count]:
+            (length,) = struct.unpack_from(">i", buffer, position)
+            position += 4
+            if length == -1:
+                row.append(None)
+                continue
+            data = buffer[position : position + length]
+            position += length
+            if pg_type == "text":
+                row.append(data.decode("utf-8"))
+            elif pg_type == "timestamptz":
+                (micros,) = struct.unpack(">q", data)
+                row.append(_POSTGRES_EPOCH + timedelta(microseconds=micros))
+            else:
+                ndigits, weight, sign, dscale = struct.unpack_from(">hhhh", data)
+                digits = struct.unpack_from(f">{ndigits}h", data, 8)
+                value = sum(
+                    Decimal(digit) * Decimal(10_000) ** (weight - index)
+                    for index, digit in enumerate(digits)
+                )
+                row.append((-value if sign == 0x4000 else value).quantize(Decimal(10) ** -dscale))
+        rows.append(tuple(row))
+    assert position == len(buffer)
+    return rows
+
+
+class TestBinaryCopy(unittest.IsolatedAsyncioTestCase):
+    def test_round_trips_text_timestamps_and_nulls(self) -> None:
+        issued_at = datetime(2026, 2, 20, 13, 45, 1, 123456, tzinfo=UTC)
+        df = pl.DataFrame(
+            {
+                "code": ["INV-1", None, "FACTURA-ñ"],
+                "issued_at": [issued_at, issued_at, None],
+                "amount": [100.0, None, -0.5],
+            },
+            schema={"code": pl.Utf8, "issued_at": pl.Datetime("us", "UTC"), "amount": pl.Float64},
+        )
+
+        rows = _decode_binary_copy(
+            encode_binary_copy(df, _COLUMN_TYPES).tobytes(), list(_COLUMN_TYPES.values())
+        )
+
+        self.assertEqual(
+            rows,
+            [
+                ("INV-1", issued_at, Decimal("100.00")),
+                (None, issued_at, None),
+                ("FACTURA-ñ", None, Decimal("-0.50")),
+            ],
+        )
+
+    def test_numeric_rounds_like_decimal_of_the_float(self) -> None:
+        amounts = [1.005, 2.675, 0.125, -1.005, -0.004, 19.000000000000004, 1e-300, 1234567890123.45]
+        df = pl.DataFrame({"amount": amounts})
+
+        rows = _decode_binary_copy(
+            encode_binary_copy(df, {"amount": "numeric"}).tobytes(), ["numeric"]
+        )
+
+        expected = [
+            Decimal(amount).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) for amount in amounts
+        ]
+        self.assertEqual([row[0] for row in rows], expected)
+
+    def test_rejects_values_outside_numeric_precision(self) -> None:
+        with self.assertRaises(AssertionError):
+            encode_binary_copy(pl.DataFrame({"amount": [1e17]}), {"amount": "numeric"})
+        with self.assertRaises(AssertionError):
+            encode_binary_copy(pl.DataFrame({"amount": [float("nan")]}), {"amount": "numeric"})
+
+    async def test_chunks_cover_the_whole_buffer(self) -> None:
+        df = pl.DataFrame({"code": [f"INV-{index}" for index in range(100)]})
+        buffer = encode_binary_copy(df, {"code": "text"})
+
+        chunks = [bytes(chunk) async for chunk in iter_copy_chunks(buffer, chunk_size=64)]
+
+        self.assertTrue(all(len(chunk) <= 64 for chunk in chunks))
+        self.assertEqual(b"".join(chunks), buffer.tobytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
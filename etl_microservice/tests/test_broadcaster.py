@@ -0,0 +1,106 @@
+import asyncio
+import unittest
+
+from app.shared.infrastructure.pubsub.broadcaster import (
+    OVERFLOW_DISCONNECT,
+    OVERFLOW_DROP_NEWEST,
+    OVERFLOW_DROP_OLDEST,
+    InvoiceEventBroadcaster,
+)
+
+
+async def _attach(broadcaster: InvoiceEventBroadcaster):
+    """Subscribes and waits until the subscriber is registered."""
+    stream = broadcaster.subscribe()
+    first_event = asyncio.ensure_future(anext(stream))
+    await asyncio.sleep(0)
+    return stream, first_event
+
+
+class TestInvoiceEventBroadcaster(unittest.IsolatedAsyncioTestCase):
+    async def test_drop_oldest_keeps_the_latest_events(self) -> None:
+        broadcaster = InvoiceEventBroadcaster(
+            max_queue_size=2, overflow_policy=OVERFLOW_DROP_OLDEST, name="test-oldest"
+        )
+        stream, first_event = await _attach(broadcaster)
+        # The pending read takes event 0 as soon as it is queued.
+        await broadcaster.publish(0)
+        self.assertEqual(await first_event, 0)
+
+        for event in range(1, 6):
+            await broadcaster.publish(event)
+
+        self.assertEqual([await anext(stream), await anext(stream)], [4, 5])
+        await stream.aclose()
+
+    async def test_drop_newest_keeps_the_queued_events(self) -> None:
+        broadcaster = InvoiceEventBroadcaster(
+            max_queue_size=2, overflow_policy=OVERFLOW_DROP_NEWEST, name="test-newest"
+        )
+        stream, first_event = await _attach(broadcaster)
+        await broadcaster.publish(0)
+        self.assertEqual(await first_event, 0)
+
+        for event in range(1, 6):
+            await broadcaster.publish(event)
+
+        self.assertEqual([await anext(stream), await anext(stream)], [1, 2])
+        await stream.aclose()
+
+    async def test_disconnect_ends_the_slow_subscriber_stream(self) -> None:
+        broadcaster = InvoiceEventBroadcaster(
+            max_queue_size=2, overflow_policy=OVERFLOW_DISCONNECT, name="test-disconnect"
+        )
+        slow_stream, slow_first = await _attach(broadcaster)
+        await broadcaster.publish(0)
+        self.assertEqual(await slow_first, 0)
+
+        for event in range(1, 4):
+            await broadcaster.publish(event)
+
+        self.assertEqual([await anext(slow_stream), await anext(slow_stream)], [1, 2])
+        with self.assertRaises(StopAsyncIteration):
+            await anext(slow_stream)
+
+        fresh_stream, fresh_first = await _attach(broadcaster)
+        await broadcaster.publish(4)
+        self.assertEqual(await fresh_first, 4)
+        await fresh_stream.aclose()
+
+    async def test_publish_many_applies_the_overflow_policy_to_the_batch(self) -> None:
+        broadcaster = InvoiceEventBroadcaster(
+            max_queue_size=3, overflow_policy=OVERFLOW_DROP_OLDEST, name="test-many"
+        )
+        stream, first_event = await _attach(broadcaster)
+        self.assertEqual(broadcaster.subscriber_count, 1)
+
+        await broadcaster.publish_many([])
+        await broadcaster.publish_many(list(range(6)))
+
+        # The whole batch lands before the reader runs, so only the last three survive.
+        self.assertEqual(await first_event, 3)
+        self.assertEqual([await anext(stream), await anext(stream)], [4, 5])
+        await stream.aclose()
+        self.assertEqual(broadcaster.subscriber_count, 0)
+
+    async def test_drop_oldest_queues_only_the_tail_of_a_large_batch(self) -> None:
+        broadcaster = InvoiceEventBroadcaster(
+            max_queue_size=3, overflow_policy=OVERFLOW_DROP_OLDEST, name="test-tail"
+        )
+        stream, first_event = await _attach(broadcaster)
+        await broadcaster.publish_many(["a", "b"])
+        subscription = broadcaster._subscribers[0]
+        puts: list[object] = []
+        put_nowait = subscription.queue.put_nowait
+        subscription.queue.put_nowait = lambda event: (puts.append(event), put_nowait(event))
+
+        await broadcaster.publish_many(list(range(10_000)))
+
+        self.assertEqual(puts, [9997, 9998, 9999])
+        self.assertEqual(await first_event, 9997)
+        self.assertEqual([await anext(stream), await anext(stream)], [9998, 9999])
+        await stream.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()
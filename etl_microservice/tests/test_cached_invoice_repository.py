@@ -0,0 +1,122 @@
+import asyncio
+import unittest
+
+import polars as pl
+
+from app.invoicing.domain.entities.invoice_page import InvoicePage
+from app.invoicing.infrastructure.persistence.cached_invoice_repository import (
+    CachedInvoiceRepository,
+)
+from app.shared.infrastructure.caching.async_lru_cache import AsyncLruTtlCache
+
+
+class _FakeRepository:
+    def __init__(self) -> None:
+        self.fetch_calls: list[str | None] = []
+        self.saved: list[pl.DataFrame] = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def save_dataframe(self, df: pl.DataFrame) -> None:
+        self.saved.append(df)
+
+    async def upsert_dataframe(self, df: pl.DataFrame) -> None:
+        self.saved.append(df)
+
+    async def fetch_invoices(self, customer_id=None, issued_from=None, issued_to=None,
+                             after=None, limit=50) -> InvoicePage:
+        self.fetch_calls.append(customer_id)
+        await self.release.wait()
+        return InvoicePage(invoices=(), has_next_page=False)
+
+
+class TestCachedInvoiceRepository(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_identical_queries_share_one_database_call(self) -> None:
+        inner = _FakeRepository()
+        inner.release.clear()
+        repository = CachedInvoiceRepository(inner)
+
+        pending = [asyncio.create_task(repository.fetch_invoices("CUST-1")) for _ in range(5)]
+        await asyncio.sleep(0)
+        inner.release.set()
+        pages = await asyncio.gather(*pending)
+        await repository.fetch_invoices("CUST-1")
+
+        self.assertEqual(inner.fetch_calls, ["CUST-1"])
+        self.assertTrue(all(page is pages[0] for page in pages))
+
+    async def test_writes_invalidate_only_the_affected_customers(self) -> None:
+        inner = _FakeRepository()
+        repository = CachedInvoiceRepository(inner)
+        for customer_id in ("CUST-1", "CUST-2", None):
+            await repository.fetch_invoices(customer_id)
+
+        await repository.save_dataframe(
+            pl.DataFrame({"external_id": ["INV-1"], "customer_id": ["CUST-1"]})
+        )
+        for customer_id in ("CUST-1", "CUST-2", None):
+            await repository.fetch_invoices(customer_id)
+
+        self.assertEqual(inner.fetch_calls, ["CUST-1", "CUST-2", None, "CUST-1", None])
+
+    async def test_load_racing_a_write_is_not_cached(self) -> None:
+        inner = _FakeRepository()
+        inner.release.clear()
+        repository = CachedInvoiceRepository(inner)
+
+        stale_read = asyncio.create_task(repository.fetch_invoices("CUST-1"))
+        await asyncio.sleep(0)
+        await repository.upsert_dataframe(
+            pl.DataFrame({"external_id": ["INV-1"], "customer_id": ["CUST-1"]})
+        )
+        inner.release.set()
+        await stale_read
+        await repository.fetch_invoices("CUST-1")
+
+        self.assertEqual(inner.fetch_calls, ["CUST-1", "CUST-1"])
+
+    async def test_pages_written_recently_bypass_the_cache_while_the_replica_catches_up(
+        self,
+    ) -> None:
+        inner = _FakeRepository()
+        repository = CachedInvoiceRepository(inner, replica_lag_seconds=60)
+        await repository.save_dataframe(
+            pl.DataFrame({"external_id": ["INV-1"], "customer_id": ["CUST-1"]})
+        )
+
+        for customer_id in ("CUST-1", "CUST-1", None, None, "CUST-2", "CUST-2"):
+            await repository.fetch_invoices(customer_id)
+
+        self.assertEqual(inner.fetch_calls, ["CUST-1", "CUST-1", None, None, "CUST-2"])
+
+
+class TestAsyncLruTtlCache(unittest.IsolatedAsyncioTestCase):
+    async def test_evicts_least_recently_used_and_skips_failed_loads(self) -> None:
+        cache: AsyncLruTtlCache[str, int] = AsyncLruTtlCache(
+            max_entries=2, ttl_seconds=60, name="test-lru"
+        )
+        loads: list[str] = []
+
+        async def load(key: str) -> int:
+            loads.append(key)
+            return len(loads)
+
+        await cache.get_or_load("a", lambda: load("a"))
+        await cache.get_or_load("b", lambda: load("b"))
+        await cache.get_or_load("a", lambda: load("a"))
+        await cache.get_or_load("c", lambda: load("c"))
+        await cache.get_or_load("a", lambda: load("a"))
+        await cache.get_or_load("b", lambda: load("b"))
+
+        async def fail() -> int:
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            await cache.get_or_load("d", fail)
+
+        self.assertEqual(loads, ["a", "b", "c", "b"])
+        self.assertEqual(len(cache), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import asyncio
+import unittest
+
+from app.shared.infrastructure.resilience.circuit_breaker import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+
+
+class TestCircuitBreaker(unittest.IsolatedAsyncioTestCase):
+    async def test_opens_once_failure_rate_crosses_threshold(self) -> None:
+        breaker = CircuitBreaker(
+            failure_rate_threshold=0.5, window_size=4, minimum_calls=4, name="test-open"
+        )
+        for outcome in (True, False, True):
+            await breaker.before_call()
+            if outcome:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+        self.assertEqual(breaker.state, CIRCUIT_CLOSED)
+
+        await breaker.before_call()
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, CIRCUIT_OPEN)
+        with self.assertRaises(CircuitOpenError) as raised:
+            await breaker.before_call()
+        self.assertGreater(raised.exception.retry_after, 0)
+        with self.assertRaises(CircuitOpenError):
+            breaker.raise_if_open()
+
+    async def test_half_open_probe_success_closes_and_releases_waiters(self) -> None:
+        breaker = CircuitBreaker(
+            window_size=1, minimum_calls=1, open_seconds=0.01, name="test-half-open"
+        )
+        await breaker.before_call()
+        breaker.record_failure()
+        await asyncio.sleep(0.02)
+        self.assertEqual(breaker.state, CIRCUIT_HALF_OPEN)
+
+        await breaker.before_call()
+        waiter = asyncio.create_task(breaker.before_call())
+        await asyncio.sleep(0)
+        self.assertFalse(waiter.done())
+
+        breaker.record_success()
+        await waiter
+        self.assertEqual(breaker.state, CIRCUIT_CLOSED)
+
+    async def test_failed_probe_reopens_and_rejects_waiters(self) -> None:
+        breaker = CircuitBreaker(
+            window_size=1, minimum_calls=1, open_seconds=0.01, name="test-reopen"
+        )
+        await breaker.before_call()
+        breaker.record_failure()
+        await asyncio.sleep(0.02)
+
+        await breaker.before_call()
+        waiter = asyncio.create_task(breaker.before_call())
+        await asyncio.sleep(0)
+        breaker.record_failure()
+
+        with self.assertRaises(CircuitOpenError):
+            await waiter
+        self.assertEqual(breaker.state, CIRCUIT_OPEN)
+
+
+if __name__ == "__main__":
+    unittest.main()
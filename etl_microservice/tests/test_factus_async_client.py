@@ -1,9 +1,18 @@
-import unittest
+import asyncio
 import json
+import time
+import unittest
 
 import httpx
+from prometheus_client import REGISTRY
+
+from app.invoicing.infrastructure.api.factus.factus_async_client import (
+    FactusAsyncClient,
+)
 
-from app.invoicing.infrastructure.api.factus.factus_async_client import FactusAsyncClient
+
+def _sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
 
 
 class TestFactusAsyncClient(unittest.IsolatedAsyncioTestCase):
@@ -97,3 +106,267 @@ class TestFactusAsyncClient(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(captured_payload["numbering_range_id"], 15)
         self.assertEqual(captured_payload["reference_code"], "INV-1")
         self.assertEqual(response["data"]["id"], 123)
+
+    async def test_create_encoded_invoice_sends_body_unchanged(self) -> None:
+        captured: list[httpx.Request] = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/oauth/token":
+                return httpx.Response(200, json={"access_token": "token-1", "expires_in": 3600})
+            if request.url.path == "/v1/bills/validate":
+                captured.append(request)
+                return httpx.Response(200, json={"data": {"id": 124}})
+            return httpx.Response(404)
+
+        client = FactusAsyncClient(
+            base_url="https://api-sandbox.factus.com.co",
+            email="email@example.com",
+            password="secret",
+            client_id="client-id",
+            client_secret="client-secret",
+            transport=httpx.MockTransport(handler),
+        )
+        body = b'{"reference_code":"INV-2","numbering_range_id":15}'
+
+        response = await client.create_encoded_invoice(body)
+        await client.close()
+
+        self.assertEqual(captured[0].content, body)
+        self.assertEqual(captured[0].headers["Content-Type"], "application/json")
+        self.assertEqual(captured[0].headers["Authorization"], "Bearer token-1")
+        self.assertEqual(response["data"]["id"], 124)
+
+    async def test_retries_after_429_honoring_retry_after(self) -> None:
+        calls = {"validate": 0}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/oauth/token":
+                return httpx.Response(200, json={"access_token": "token-1", "expires_in": 3600})
+            if request.url.path == "/v1/bills/validate":
+                calls["validate"] += 1
+                if calls["validate"] == 1:
+                    return httpx.Response(429, headers={"Retry-After": "0.05"})
+                return httpx.Response(200, json={"data": {"id": 7}})
+            return httpx.Response(404)
+
+        client = FactusAsyncClient(
+            base_url="https://api-sandbox.factus.com.co",
+            email="email@example.com",
+            password="secret",
+            client_id="client-id",
+            client_secret="client-secret",
+            transport=httpx.MockTransport(handler),
+        )
+
+        bills = "/v1/bills/validate"
+        rate_limited_before = _sample(
+            "factus_http_request_seconds_count", endpoint=bills, outcome="rate_limited"
+        )
+        succeeded_before = _sample(
+            "factus_http_request_seconds_count", endpoint=bills, outcome="success"
+        )
+        retries_before = _sample("factus_retries_total", reason="rate_limited")
+
+        started_at = time.monotonic()
+        response = await client.create_invoice({"reference_code": "INV-1"}, numbering_range_id=1)
+        elapsed = time.monotonic() - started_at
+        await client.close()
+
+        self.assertEqual(response["data"]["id"], 7)
+        self.assertEqual(calls["validate"], 2)
+        self.assertGreaterEqual(elapsed, 0.05)
+        self.assertEqual(
+            _sample("factus_http_request_seconds_count", endpoint=bills, outcome="rate_limited")
+            - rate_limited_before,
+            1,
+        )
+        self.assertEqual(
+            _sample("factus_http_request_seconds_count", endpoint=bills, outcome="success")
+            - succeeded_before,
+            1,
+        )
+        self.assertEqual(_sample("factus_retries_total", reason="rate_limited") - retries_before, 1)
+
+    async def test_gives_up_after_max_rate_limit_retries(self) -> None:
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/oauth/token":
+                return httpx.Response(200, json={"access_token": "token-1", "expires_in": 3600})
+            return httpx.Response(429, headers={"Retry-After": "0"})
+
+        client = FactusAsyncClient(
+            base_url="https://api-sandbox.factus.com.co",
+            email="email@example.com",
+            password="secret",
+            client_id="client-id",
+            client_secret="client-secret",
+            transport=httpx.MockTransport(handler),
+            max_rate_limit_retries=1,
+        )
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            await client.create_invoice({"reference_code": "INV-1"}, numbering_range_id=1)
+        await client.close()
+
+    async def test_caches_numbering_range_and_invalidates_on_range_rejection(self) -> None:
+        calls = {"ranges": 0}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/oauth/token":
+                return httpx.Response(200, json={"access_token": "token-1", "expires_in": 3600})
+            if request.url.path == "/v1/numbering-ranges":
+                calls["ranges"] += 1
+                return httpx.Response(200, json={"data": [{"id": 9, "is_active": True}]})
+            if request.url.path == "/v1/bills/validate":
+                return httpx.Response(
+                    422, json={"message": "El rango de numeración no está vigente"}
+                )
+            return httpx.Response(404)
+
+        client = FactusAsyncClient(
+            base_url="https://api-sandbox.factus.com.co",
+            email="email@example.com",
+            password="secret",
+            client_id="client-id",
+            client_secret="client-secret",
+            transport=httpx.MockTransport(handler),
+            numbering_range_ttl_seconds=300,
+        )
+
+        self.assertEqual(await client.get_active_numbering_range_id(), 9)
+        self.assertEqual(await client.get_active_numbering_range_id(), 9)
+        self.assertEqual(calls["ranges"], 1)
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            await client.create_invoice({"reference_code": "INV-1"}, numbering_range_id=9)
+        self.assertEqual(await client.get_active_numbering_range_id(), 9)
+        await client.close()
+
+        self.assertEqual(calls["ranges"], 2)
+
+    async def test_resends_once_with_the_new_range_after_a_range_rejection(self) -> None:
+        active_range = {"id": 9}
+        sent_ranges: list[int] = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/oauth/token":
+                return httpx.Response(200, json={"access_token": "token-1", "expires_in": 3600})
+            if request.url.path == "/v1/numbering-ranges":
+                return httpx.Response(
+                    200, json={"data": [{"id": active_range["id"], "is_active": True}]}
+                )
+            if request.url.path == "/v1/bills/validate":
+                range_id = json.loads(request.content)["numbering_range_id"]
+                sent_ranges.append(range_id)
+                if range_id != active_range["id"]:
+                    return httpx.Response(
+                        422, json={"message": "El rango de numeración no está vigente"}
+                    )
+                return httpx.Response(200, json={"data": {"id": 7}})
+            return httpx.Response(404)
+
+        client = FactusAsyncClient(
+            base_url="https://api-sandbox.factus.com.co",
+            email="email@example.com",
+            password="secret",
+            client_id="client-id",
+            client_secret="client-secret",
+            transport=httpx.MockTransport(handler),
+            numbering_range_ttl_seconds=300,
+        )
+        stale_range_id = await client.get_active_numbering_range_id()
+        active_range["id"] = 10
+
+        response = await client.create_invoice(
+            {"reference_code": "INV-1"}, numbering_range_id=stale_range_id
+        )
+        await client.close()
+
+        self.assertEqual(response["data"]["id"], 7)
+        self.assertEqual(sent_ranges, [9, 10])
+
+    async def test_concurrent_401s_share_a_single_token_refresh(self) -> None:
+        calls = {"token": 0}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/oauth/token":
+                calls["token"] += 1
+                await asyncio.sleep(0.01)
+                return httpx.Response(
+                    200,
+                    json={"access_token": f"token-{calls['token']}", "expires_in": 3600},
+                )
+            if request.url.path == "/v1/bills/validate":
+                if request.headers.get("Authorization") == "Bearer token-1":
+                    return httpx.Response(401, json={"message": "Unauthorized"})
+                return httpx.Response(200, json={"data": {"id": 1}})
+            return httpx.Response(404)
+
+        client = FactusAsyncClient(
+            base_url="https://api-sandbox.factus.com.co",
+            email="email@example.com",
+            password="secret",
+            client_id="client-id",
+            client_secret="client-secret",
+            transport=httpx.MockTransport(handler),
+        )
+
+        responses = await asyncio.gather(
+            *[
+                client.create_invoice({"reference_code": f"INV-{index}"}, numbering_range_id=1)
+                for index in range(20)
+            ]
+        )
+        await client.close()
+
+        self.assertEqual(len(responses), 20)
+        self.assertEqual(calls["token"], 2)
+
+    async def test_refreshes_token_in_background_before_expiry(self) -> None:
+        calls = {"token": 0}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/oauth/token":
+                calls["token"] += 1
+                return httpx.Response(
+                    200,
+                    json={"access_token": f"token-{calls['token']}", "expires_in": 100},
+                )
+            return httpx.Response(404)
+
+        client = FactusAsyncClient(
+            base_url="https://api-sandbox.factus.com.co",
+            email="email@example.com",
+            password="secret",
+            client_id="client-id",
+            client_secret="client-secret",
+            transport=httpx.MockTransport(handler),
+        )
+
+        self.assertEqual(await client.authenticate(), "token-1")
+        # Still valid, but inside the proactive window: served immediately, renewed behind.
+        self.assertEqual(await client.authenticate(), "token-1")
+        assert client._token_refresh is not None
+        await client._token_refresh
+        self.assertEqual(await client.authenticate(), "token-2")
+        await client.close()
+
+    async def test_applies_pool_limits_and_split_timeouts(self) -> None:
+        client = FactusAsyncClient(
+            base_url="https://api-sandbox.factus.com.co",
+            email="email@example.com",
+            password="secret",
+            client_id="client-id",
+            client_secret="client-secret",
+            connect_timeout=2.0,
+            pool_timeout=1.0,
+            max_connections=50,
+            max_keepalive_connections=50,
+            http2=True,
+        )
+
+        timeout = client._http_client.timeout
+        self.assertEqual(timeout.connect, 2.0)
+        self.assertEqual(timeout.read, 10.0)
+        self.assertEqual(timeout.pool, 1.0)
+        self.assertEqual(_sample("factus_http_pool_max_connections"), 50)
+        await client.close()
@@ -0,0 +1,69 @@
+import json
+import unittest
+from datetime import UTC, datetime
+
+import polars as pl
+
+from app.invoicing.infrastructure.api.factus.factus_invoice_payloads import (
+    build_factus_invoice_payloads,
+    encode_factus_invoice_bodies,
+)
+
+
+def _invoice_frame() -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "external_id": ["INV-1", "INV-\"2\""],
+            "customer_id": ["CUST-1", None],
+            "issued_at": [datetime(2026, 2, 20, 23, 30, tzinfo=UTC), None],
+            "total": [100.0, None],
+            "currency": ["COP", "COP"],
+        },
+        schema_overrides={"issued_at": pl.Datetime("us", "UTC")},
+    )
+
+
+class TestFactusInvoicePayloads(unittest.TestCase):
+    def test_encodes_bodies_with_numbering_range(self) -> None:
+        bodies = encode_factus_invoice_bodies(_invoice_frame(), "batch-1", numbering_range_id=15)
+
+        self.assertEqual(
+            [json.loads(body) for body in bodies],
+            [
+                {
+                    "reference_code": "INV-1",
+                    "observation": "batch:batch-1",
+                    "issue_date": "2026-02-20",
+                    "customer": {"identification": "CUST-1"},
+                    "items": [
+                        {"code": "INV-1", "description": "Invoice INV-1", "quantity": 1, "price": 100.0}
+                    ],
+                    "numbering_range_id": 15,
+                },
+                {
+                    "reference_code": 'INV-"2"',
+                    "observation": "batch:batch-1",
+                    "issue_date": None,
+                    "customer": {"identification": "UNKNOWN"},
+                    "items": [
+                        {
+                            "code": 'INV-"2"',
+                            "description": 'Invoice INV-"2"',
+                            "quantity": 1,
+                            "price": 0.0,
+                        }
+                    ],
+                    "numbering_range_id": 15,
+                },
+            ],
+        )
+
+    def test_builds_payload_dicts_without_numbering_range(self) -> None:
+        payloads = build_factus_invoice_payloads(_invoice_frame().head(1), "batch-1")
+
+        self.assertEqual(payloads[0]["reference_code"], "INV-1")
+        self.assertNotIn("numbering_range_id", payloads[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
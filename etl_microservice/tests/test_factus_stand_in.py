@@ -0,0 +1,73 @@
+import unittest
+
+import httpx
+
+from app.invoicing.infrastructure.api.factus.factus_async_client import (
+    FactusAsyncClient,
+)
+from benchmarks.factus_stand_in import FactusStandIn, FactusStandInConfig
+
+
+def _client(stand_in: FactusStandIn, **kwargs) -> FactusAsyncClient:
+    return FactusAsyncClient(
+        base_url="http://factus.stand-in",
+        email="email@example.com",
+        password="secret",
+        client_id="client-id",
+        client_secret="client-secret",
+        transport=stand_in.transport(),
+        **kwargs,
+    )
+
+
+class TestFactusStandIn(unittest.IsolatedAsyncioTestCase):
+    async def test_serves_the_client_and_reauthenticates_after_tokens_expire(self) -> None:
+        stand_in = FactusStandIn(FactusStandInConfig(numbering_range_id=4))
+        client = _client(stand_in)
+
+        range_id = await client.get_active_numbering_range_id()
+        first = await client.create_invoice({"reference_code": "INV-1"}, range_id)
+        stand_in.expire_tokens()
+        second = await client.create_invoice({"reference_code": "INV-2"}, range_id)
+        await client.close()
+
+        self.assertEqual(range_id, 4)
+        self.assertEqual((first["data"]["id"], second["data"]["id"]), (1, 2))
+        self.assertEqual(stand_in.responses[("/v1/bills/validate", 401)], 1)
+        self.assertEqual(stand_in.responses[("/oauth/token", 200)], 2)
+
+    async def test_rate_limits_with_retry_after_and_injects_server_errors(self) -> None:
+        stand_in = FactusStandIn(
+            FactusStandInConfig(rate_limit_rate=1.0, retry_after_seconds=0.01, seed=1)
+        )
+        client = _client(stand_in, max_rate_limit_retries=1)
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            await client.create_invoice({"reference_code": "INV-1"}, 1)
+        await client.close()
+
+        self.assertEqual(stand_in.responses[("/v1/bills/validate", 429)], 2)
+
+        failing = FactusStandIn(FactusStandInConfig(error_rate=1.0, seed=1))
+        client = _client(failing)
+        with self.assertRaises(httpx.HTTPStatusError):
+            await client.create_invoice({"reference_code": "INV-1"}, 1)
+        await client.close()
+
+        self.assertEqual(
+            sum(count for (_, status), count in failing.responses.items() if status >= 500), 1
+        )
+
+    def test_lognormal_latency_matches_the_configured_median_and_p99(self) -> None:
+        stand_in = FactusStandIn(
+            FactusStandInConfig(latency_median_ms=50, latency_p99_ms=400, seed=7)
+        )
+
+        samples = sorted(stand_in.sample_latency_seconds() for _ in range(20_000))
+
+        self.assertAlmostEqual(samples[len(samples) // 2], 0.050, delta=0.005)
+        self.assertAlmostEqual(samples[int(len(samples) * 0.99)], 0.400, delta=0.06)
+
+
+if __name__ == "__main__":
+    unittest.main()
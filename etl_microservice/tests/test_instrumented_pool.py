@@ -0,0 +1,55 @@
+import asyncio
+import unittest
+
+from app.shared.infrastructure.database.instrumented_pool import InstrumentedPool
+from app.shared.infrastructure.metrics.prometheus_metrics import DB_POOL_ACQUIRE_SECONDS
+
+
+class _FakeAsyncpgPool:
+    def __init__(self) -> None:
+        self.free = asyncio.Queue()
+        self.free.put_nowait("connection")
+        self.released: list[str] = []
+
+    def get_size(self) -> int:
+        return 1
+
+    def get_idle_size(self) -> int:
+        return self.free.qsize()
+
+    def get_max_size(self) -> int:
+        return 1
+
+    async def acquire(self, timeout=None) -> str:
+        return await asyncio.wait_for(self.free.get(), timeout)
+
+    async def release(self, connection: str) -> None:
+        self.released.append(connection)
+        self.free.put_nowait(connection)
+
+
+def _observed_count(pool_name: str) -> float:
+    for metric in DB_POOL_ACQUIRE_SECONDS.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_count") and sample.labels["pool"] == pool_name:
+                return sample.value
+    return 0.0
+
+
+class TestInstrumentedPool(unittest.IsolatedAsyncioTestCase):
+    async def test_records_acquire_waits_including_timeouts(self) -> None:
+        raw_pool = _FakeAsyncpgPool()
+        pool = InstrumentedPool(raw_pool, name="test-pool", acquire_timeout=0.01)
+
+        async with pool.acquire() as connection:
+            self.assertEqual(connection, "connection")
+            with self.assertRaises(TimeoutError):
+                async with pool.acquire():
+                    pass
+
+        self.assertEqual(raw_pool.released, ["connection"])
+        self.assertEqual(_observed_count("test-pool"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
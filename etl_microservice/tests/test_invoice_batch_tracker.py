@@ -0,0 +1,141 @@
+import unittest
+from contextlib import asynccontextmanager
+
+from app.invoicing.application.use_cases.process_invoice_batch import (
+    ProcessInvoiceBatchUseCase,
+)
+from app.invoicing.infrastructure.persistence.postgres.invoice_batch_tracker_asyncpg import (
+    InvoiceBatchTrackerAsyncpg,
+)
+from app.shared.infrastructure.resilience.circuit_breaker import CircuitOpenError
+
+
+class _FakeRepository:
+    async def save_dataframe(self, df) -> None:
+        return None
+
+    async def fetch_succeeded_external_ids(self, df) -> set[str]:
+        return set()
+
+
+class _FakeFactusClient:
+    async def get_active_numbering_range_id(self) -> int:
+        return 1
+
+    async def create_encoded_invoice(self, body: bytes) -> dict:
+        return {"data": {"id": 7, "qr": "qr", "pdf": "pdf"}}
+
+
+class _OpenCircuitFactusClient(_FakeFactusClient):
+    async def get_active_numbering_range_id(self) -> int:
+        raise CircuitOpenError("factus", retry_after=30.0)
+
+
+class _FakeBatchTracker:
+    def __init__(self) -> None:
+        self.updates: list[tuple] = []
+
+    async def mark_stage(
+        self, batch_id, stage, invoice_count=None, transformed_count=None, error=None
+    ):
+        self.updates.append((batch_id, stage, invoice_count, transformed_count))
+
+    async def record_results(self, batch_id, succeeded, failed, pending_retry):
+        self.updates.append((batch_id, "results", succeeded, failed, pending_retry))
+
+
+class _FakeConnection:
+    def __init__(self) -> None:
+        self.fetched: list[tuple[str, tuple]] = []
+
+    async def fetchrow(self, query: str, *args):
+        self.fetched.append((query, args))
+
+
+class _FakePool:
+    def __init__(self) -> None:
+        self.connection = _FakeConnection()
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.connection
+
+
+_PAYLOAD = {
+    "batch_id": "tracked-batch",
+    "payload": {
+        "invoices": [
+            {
+                "external_id": f"INV-{index}",
+                "customer_id": "CUST-1",
+                "issued_at": "2026-02-20T00:00:00Z",
+                "total": 100,
+                "currency": "COP",
+            }
+            for index in range(2)
+        ]
+    },
+}
+
+
+class TestInvoiceBatchTracking(unittest.IsolatedAsyncioTestCase):
+    async def test_use_case_records_each_stage_and_the_result_counts(self) -> None:
+        tracker = _FakeBatchTracker()
+        use_case = ProcessInvoiceBatchUseCase(
+            invoice_repository=_FakeRepository(),
+            factus_client=_FakeFactusClient(),
+            batch_tracker=tracker,
+        )
+
+        await use_case.execute(_PAYLOAD)
+
+        self.assertEqual(
+            tracker.updates,
+            [
+                ("tracked-batch", "received", 2, None),
+                ("tracked-batch", "transformed", None, 2),
+                ("tracked-batch", "sent", None, None),
+                ("tracked-batch", "results", 2, 0, 0),
+                ("tracked-batch", "persisted", None, 2),
+            ],
+        )
+
+    async def test_open_circuit_leaves_the_batch_unfinished_for_the_consumer_to_park(
+        self,
+    ) -> None:
+        tracker = _FakeBatchTracker()
+        use_case = ProcessInvoiceBatchUseCase(
+            invoice_repository=_FakeRepository(),
+            factus_client=_OpenCircuitFactusClient(),
+            batch_tracker=tracker,
+        )
+
+        with self.assertRaises(CircuitOpenError):
+            await use_case.execute(_PAYLOAD)
+
+        self.assertEqual(tracker.updates, [("tracked-batch", "received", 2, None)])
+
+    async def test_received_resets_a_redelivered_batch(self) -> None:
+        pool = _FakePool()
+        tracker = InvoiceBatchTrackerAsyncpg(db_pool=pool)
+
+        self.assertIsNone(await tracker.mark_stage("batch-1", "received", invoice_count=3))
+
+        query, args = pool.connection.fetched[0]
+        self.assertIn("ON CONFLICT (batch_id) DO UPDATE", query)
+        self.assertIn("succeeded_count = 0", query)
+        self.assertEqual(args, ("batch-1", "received", 3))
+
+    async def test_final_stage_stores_the_transformed_count_and_error(self) -> None:
+        pool = _FakePool()
+        tracker = InvoiceBatchTrackerAsyncpg(db_pool=pool)
+
+        await tracker.mark_stage("batch-1", "failed", transformed_count=2, error="boom")
+
+        query, args = pool.connection.fetched[0]
+        self.assertIn("transformed_count = COALESCE($3, transformed_count)", query)
+        self.assertEqual(args, ("batch-1", "failed", 2, "boom"))
+
+
+if __name__ == "__main__":
+    unittest.main()
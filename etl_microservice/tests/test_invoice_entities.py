@@ -1,3 +1,5 @@
+import asyncio
+import json
 import unittest
 
 import httpx
@@ -9,12 +11,29 @@ from app.invoicing.domain.entities.invoice_batch import InvoiceBatch
 
 
 class _FakeRepository:
-    def __init__(self) -> None:
+    def __init__(self, succeeded: set[str] | None = None) -> None:
         self.saved_df = None
+        self.succeeded = succeeded or set()
 
     async def save_dataframe(self, df) -> None:
         self.saved_df = df
 
+    async def fetch_succeeded_external_ids(self, df) -> set[str]:
+        return self.succeeded & set(df["external_id"].to_list())
+
+
+class _CollectingRepository:
+    def __init__(self) -> None:
+        self.saved_heights: list[int] = []
+        self.saved_ids: list[str] = []
+
+    async def save_dataframe(self, df) -> None:
+        self.saved_heights.append(df.height)
+        self.saved_ids.extend(df["external_id"].to_list())
+
+    async def fetch_succeeded_external_ids(self, df) -> set[str]:
+        return set()
+
 
 class _FakeFactusClient:
     def __init__(self, fail_external_id: str | None = None) -> None:
@@ -26,9 +45,13 @@ class _FakeFactusClient:
         self.numbering_range_calls += 1
         return 99
 
-    async def create_invoice(self, invoice_data: dict, numbering_range_id: int) -> dict:
+    async def create_encoded_invoice(self, body: bytes) -> dict:
+        invoice_data = json.loads(body)
         self.created_payloads.append(
-            {"invoice_data": invoice_data, "numbering_range_id": numbering_range_id}
+            {
+                "invoice_data": invoice_data,
+                "numbering_range_id": invoice_data.pop("numbering_range_id"),
+            }
         )
         if invoice_data.get("reference_code") == self.fail_external_id:
             raise httpx.TimeoutException("timeout")
@@ -63,8 +86,6 @@ class TestInvoiceEntities(unittest.TestCase):
             InvoiceBatch.from_message(payload)
 
     def test_process_invoice_batch_use_case_transforms_and_persists(self) -> None:
-        import asyncio
-
         repository = _FakeRepository()
         factus_client = _FakeFactusClient()
         use_case = ProcessInvoiceBatchUseCase(
@@ -102,9 +123,37 @@ class TestInvoiceEntities(unittest.TestCase):
             99,
         )
 
-    def test_process_invoice_batch_use_case_survives_factus_timeout(self) -> None:
-        import asyncio
+    def test_redelivered_batch_leaves_already_succeeded_invoices_untouched(self) -> None:
+        repository = _FakeRepository(succeeded={"INV-done"})
+        factus_client = _FakeFactusClient()
+        use_case = ProcessInvoiceBatchUseCase(
+            invoice_repository=repository, factus_client=factus_client
+        )
+        payload = {
+            "batch_id": "batch-redelivered",
+            "payload": {
+                "invoices": [
+                    {
+                        "external_id": external_id,
+                        "customer_id": "CUST-R",
+                        "issued_at": "2026-02-20T00:00:00Z",
+                        "total": 100,
+                        "currency": "COP",
+                    }
+                    for external_id in ("INV-done", "INV-new")
+                ]
+            },
+        }
+
+        asyncio.run(use_case.execute(payload))
+
+        self.assertEqual(
+            [call["invoice_data"]["reference_code"] for call in factus_client.created_payloads],
+            ["INV-new"],
+        )
+        self.assertEqual(repository.saved_df["external_id"].to_list(), ["INV-new"])
 
+    def test_process_invoice_batch_use_case_survives_factus_timeout(self) -> None:
         repository = _FakeRepository()
         factus_client = _FakeFactusClient(fail_external_id="INV-timeout")
         use_case = ProcessInvoiceBatchUseCase(
@@ -136,6 +185,35 @@ class TestInvoiceEntities(unittest.TestCase):
         self.assertEqual(saved_row["error_message"], "timeout")
         self.assertIsNone(saved_row["factus_invoice_id"])
 
+    def test_process_invoice_batch_use_case_streams_results_in_micro_batches(self) -> None:
+        repository = _CollectingRepository()
+        use_case = ProcessInvoiceBatchUseCase(
+            invoice_repository=repository,
+            factus_client=_FakeFactusClient(),
+            stream_flush_size=2,
+        )
+        payload = {
+            "batch_id": "batch-stream",
+            "payload": {
+                "invoices": [
+                    {
+                        "external_id": f"INV-S{index}",
+                        "customer_id": "CUST-S",
+                        "issued_at": "2026-02-20T00:00:00Z",
+                        "total": 100 + index,
+                        "currency": "COP",
+                    }
+                    for index in range(5)
+                ]
+            },
+        }
+
+        batch_id = asyncio.run(use_case.execute(payload))
+        self.assertEqual(batch_id, "batch-stream")
+        self.assertTrue(all(height <= 2 for height in repository.saved_heights))
+        self.assertEqual(sum(repository.saved_heights), 5)
+        self.assertEqual(sorted(repository.saved_ids), [f"INV-S{index}" for index in range(5)])
+
 
 if __name__ == "__main__":
     unittest.main()
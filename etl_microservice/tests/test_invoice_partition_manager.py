@@ -0,0 +1,84 @@
+import unittest
+from contextlib import asynccontextmanager
+from datetime import date
+
+from app.invoicing.infrastructure.persistence.postgres.invoice_partition_manager import (
+    InvoicePartitionManagerAsyncpg,
+)
+
+
+class _FakeConnection:
+    def __init__(self, partitions: list[str], default_months: list[date]) -> None:
+        self.partitions = partitions
+        self.default_months = default_months
+        self.lock_available = True
+        self.statements: list[str] = []
+        self.transactions = 0
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.transactions += 1
+        yield
+
+    async def fetch(self, query: str, *args) -> list[dict]:
+        if "pg_inherits" in query:
+            return [{"relname": name} for name in self.partitions]
+        return [{"month": month} for month in self.default_months]
+
+    async def fetchval(self, query: str, *args):
+        if "pg_try_advisory_lock" in query:
+            return self.lock_available
+        return 0
+
+    async def execute(self, query: str, *args) -> str:
+        self.statements.append(query)
+        return "INSERT 0 7" if query.startswith("WITH moved") else "OK"
+
+
+class _FakePool:
+    def __init__(self, connection: _FakeConnection) -> None:
+        self.connection = connection
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.connection
+
+
+class TestInvoicePartitionManager(unittest.IsolatedAsyncioTestCase):
+    async def test_creates_missing_months_ahead_and_backfills_default_rows(self) -> None:
+        connection = _FakeConnection(
+            partitions=["invoices_2026_11", "invoices_default"],
+            default_months=[date(2026, 8, 1)],
+        )
+        manager = InvoicePartitionManagerAsyncpg(_FakePool(connection), months_ahead=2)
+
+        created = await manager.maintain(today=date(2026, 11, 17))
+
+        self.assertEqual(created, ["invoices_2026_08", "invoices_2026_12", "invoices_2027_01"])
+        self.assertEqual(connection.transactions, 1)
+        move = [statement for statement in connection.statements if "invoices_2026_08" in statement]
+        self.assertIn("LIKE invoices", move[0])
+        self.assertTrue(any("DELETE FROM invoices_default" in statement for statement in move))
+        self.assertIn(
+            "ATTACH PARTITION invoices_2026_08 FOR VALUES FROM "
+            "('2026-08-01 00:00:00+00') TO ('2026-09-01 00:00:00+00')",
+            "\n".join(move),
+        )
+        self.assertIn(
+            "CREATE TABLE IF NOT EXISTS invoices_2027_01 PARTITION OF invoices "
+            "FOR VALUES FROM ('2027-01-01 00:00:00+00') TO ('2027-02-01 00:00:00+00')",
+            connection.statements,
+        )
+        self.assertIn("pg_advisory_unlock", connection.statements[-1])
+
+    async def test_skips_the_run_when_another_replica_holds_the_lock(self) -> None:
+        connection = _FakeConnection(partitions=[], default_months=[])
+        connection.lock_available = False
+        manager = InvoicePartitionManagerAsyncpg(_FakePool(connection))
+
+        self.assertEqual(await manager.maintain(today=date(2026, 11, 17)), [])
+        self.assertEqual(connection.statements, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
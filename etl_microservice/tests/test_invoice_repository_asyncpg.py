@@ -0,0 +1,174 @@
+import unittest
+from contextlib import asynccontextmanager
+from datetime import UTC, date, datetime
+from decimal import Decimal
+
+import polars as pl
+
+from app.invoicing.domain.entities.invoice_page import InvoiceCursor
+from app.invoicing.infrastructure.etl.polars_transformer import INVOICE_COLUMNS
+from app.invoicing.infrastructure.persistence.postgres.invoice_repository_asyncpg import (
+    WRITE_MODE_COPY,
+    InvoiceRepositoryAsyncpg,
+)
+
+
+class _FakeConnection:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+        self.copies: list[tuple[str, bytes]] = []
+        self.transactions = 0
+        self.executed_args: list[tuple] = []
+        self.fetched: list[tuple[str, tuple]] = []
+        self.rows: list[dict] = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.transactions += 1
+        yield
+
+    async def execute(self, query: str, *args) -> str:
+        self.statements.append(query)
+        self.executed_args.append(args)
+        return "OK"
+
+    async def fetch(self, query: str, *args) -> list[dict]:
+        self.fetched.append((query, args))
+        return self.rows
+
+    async def copy_to_table(self, table_name: str, source, columns, format) -> None:
+        self.copies.append((table_name, b"".join([bytes(chunk) async for chunk in source])))
+
+
+class _FakePool:
+    def __init__(self) -> None:
+        self.connection = _FakeConnection()
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.connection
+
+
+def _invoice_frame() -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "external_id": ["INV-1"],
+            "customer_id": ["CUST-1"],
+            "issued_at": [datetime(2026, 2, 20, tzinfo=UTC)],
+            "total": [100.0],
+            "currency": ["COP"],
+            "tax_amount": [19.0],
+            "status": ["success"],
+        }
+    )
+
+
+class TestInvoiceRepositoryAsyncpg(unittest.IsolatedAsyncioTestCase):
+    async def test_upsert_copies_into_staging_and_merges_in_one_transaction(self) -> None:
+        pool = _FakePool()
+        repository = InvoiceRepositoryAsyncpg(db_pool=pool)
+
+        await repository.save_dataframe(_invoice_frame())
+
+        connection = pool.connection
+        self.assertEqual(connection.transactions, 1)
+        self.assertEqual(connection.copies[0][0], "invoices_staging")
+        self.assertTrue(connection.copies[0][1].startswith(b"PGCOPY\n\xff\r\n\x00"))
+        self.assertIn("CREATE TEMP TABLE IF NOT EXISTS invoices_staging", connection.statements[0])
+        lock = connection.statements[1]
+        self.assertIn("pg_advisory_xact_lock", lock)
+        self.assertIn("hashtext(external_id) & 1023 AS bucket", lock)
+        self.assertIn("FROM invoices_staging ORDER BY bucket", lock)
+        rollup = connection.statements[2]
+        self.assertIn("FOR UPDATE OF invoices", rollup)
+        self.assertIn("INSERT INTO invoice_daily_rollups", rollup)
+        self.assertIn("previous.status = 'success'", rollup)
+        merge = connection.statements[3]
+        self.assertIn("ON CONFLICT (external_id, issued_at) DO UPDATE", merge)
+        self.assertTrue(merge.endswith("AND invoices.status IS DISTINCT FROM 'success'"))
+
+    async def test_fetch_succeeded_external_ids_looks_up_the_frame_keys(self) -> None:
+        pool = _FakePool()
+        pool.connection.rows = [{"external_id": "INV-1"}]
+        repository = InvoiceRepositoryAsyncpg(db_pool=pool, read_pool=_FakePool())
+
+        succeeded = await repository.fetch_succeeded_external_ids(_invoice_frame())
+
+        query, args = pool.connection.fetched[0]
+        self.assertIn("status = 'success'", query)
+        self.assertIn("unnest($1::text[], $2::timestamptz[])", query)
+        self.assertEqual(args, (["INV-1"], [datetime(2026, 2, 20, tzinfo=UTC)]))
+        self.assertEqual(succeeded, {"INV-1"})
+
+    async def test_copy_mode_writes_straight_into_invoices(self) -> None:
+        pool = _FakePool()
+        repository = InvoiceRepositoryAsyncpg(db_pool=pool, write_mode=WRITE_MODE_COPY)
+
+        await repository.save_dataframe(_invoice_frame())
+
+        connection = pool.connection
+        self.assertEqual(connection.copies[0][0], "invoices")
+        self.assertEqual(connection.transactions, 1)
+        self.assertEqual(len(connection.statements), 1)
+        self.assertIn("INSERT INTO invoice_daily_rollups", connection.statements[0])
+        self.assertEqual(
+            connection.executed_args[0],
+            (["CUST-1"], [date(2026, 2, 20)], ["COP"], ["success"], [1],
+             [Decimal("100.00")], [Decimal("19.00")]),
+        )
+
+    async def test_fetch_invoices_pages_by_keyset_within_the_date_range(self) -> None:
+        pool = _FakePool()
+        issued_at = datetime(2026, 2, 20, tzinfo=UTC)
+        pool.connection.rows = [
+            {**dict.fromkeys(INVOICE_COLUMNS), "external_id": f"INV-{i}", "issued_at": issued_at}
+            for i in (3, 2, 1)
+        ]
+        repository = InvoiceRepositoryAsyncpg(db_pool=_FakePool(), read_pool=pool)
+        after = InvoiceCursor(issued_at=issued_at, external_id="INV-4")
+
+        page = await repository.fetch_invoices(
+            customer_id="CUST-1",
+            issued_from=datetime(2026, 2, 1, tzinfo=UTC),
+            issued_to=datetime(2026, 3, 1, tzinfo=UTC),
+            after=after,
+            limit=2,
+        )
+
+        query, args = pool.connection.fetched[0]
+        self.assertIn("issued_at >= $2 AND issued_at < $3", query)
+        self.assertIn("issued_at <= $4 AND (issued_at < $4 OR external_id < $5)", query)
+        self.assertTrue(query.endswith("ORDER BY issued_at DESC, external_id DESC LIMIT $6"))
+        self.assertEqual(args[-1], 3)
+        self.assertEqual([invoice.external_id for invoice in page.invoices], ["INV-3", "INV-2"])
+        self.assertTrue(page.has_next_page)
+        self.assertEqual(InvoiceCursor.decode(page.end_cursor.encode()), page.end_cursor)
+        self.assertEqual(page.end_cursor.external_id, "INV-2")
+
+    async def test_fetch_invoice_stats_reads_the_rollups_for_the_day_range(self) -> None:
+        pool = _FakePool()
+        pool.connection.rows = [
+            {"currency": "COP", "status": "error", "invoice_count": 2,
+             "total": Decimal("10.00"), "tax_amount": Decimal("1.90")},
+        ]
+        repository = InvoiceRepositoryAsyncpg(db_pool=pool)
+
+        stats = await repository.fetch_invoice_stats(
+            customer_id="CUST-1", issued_from=date(2026, 2, 1), issued_to=date(2026, 3, 1)
+        )
+
+        query, args = pool.connection.fetched[0]
+        self.assertIn("FROM invoice_daily_rollups WHERE customer_id = $1", query)
+        self.assertIn("day >= $2 AND day < $3", query)
+        self.assertEqual(args, ("CUST-1", date(2026, 2, 1), date(2026, 3, 1)))
+        self.assertEqual(stats[0].invoice_count, 2)
+        self.assertEqual(stats[0].status, "error")
+
+    def test_invoice_cursor_rejects_tampered_values(self) -> None:
+        for cursor in ("not-base64!", "W10=", "WyIyMDI2LTAyLTIwVDAwOjAwOjAwIiwiSU5WIl0="):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                InvoiceCursor.decode(cursor)
+
+
+if __name__ == "__main__":
+    unittest.main()
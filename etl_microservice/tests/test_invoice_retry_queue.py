@@ -0,0 +1,298 @@
+import json
+import unittest
+from datetime import UTC, datetime
+
+import httpx
+
+from app.invoicing.application.use_cases.process_invoice_batch import (
+    INVOICE_STATUS_PENDING_RETRY,
+    ProcessInvoiceBatchUseCase,
+)
+from app.invoicing.application.use_cases.retry_failed_invoices import (
+    RetryFailedInvoicesUseCase,
+)
+from app.invoicing.domain.entities.invoice_retry import InvoiceRetry
+
+
+class _FakeRepository:
+    def __init__(self) -> None:
+        self.saved_df = None
+        self.upserted_df = None
+
+    async def save_dataframe(self, df) -> None:
+        self.saved_df = df
+
+    async def fetch_succeeded_external_ids(self, df) -> set[str]:
+        return set()
+
+    async def upsert_dataframe(self, df) -> None:
+        self.upserted_df = df
+
+
+class _FailingSaveRepository(_FakeRepository):
+    async def save_dataframe(self, df) -> None:
+        raise ConnectionError("database unavailable")
+
+
+class _FakeRetryQueue:
+    def __init__(self, due: list[InvoiceRetry] | None = None) -> None:
+        self.scheduled: list[tuple[InvoiceRetry, float]] = []
+        self.rescheduled: list[tuple[int, float, str]] = []
+        self.completed: list[int] = []
+        self._due = due or []
+
+    async def schedule(self, retries, delay_seconds: float) -> None:
+        self.scheduled.extend((retry, delay_seconds) for retry in retries)
+
+    async def claim_due(self, limit: int, lease_seconds: float) -> list[InvoiceRetry]:
+        claimed, self._due = self._due[:limit], self._due[limit:]
+        return claimed
+
+    async def reschedule(self, retry_id: int, delay_seconds: float, error: str) -> None:
+        self.rescheduled.append((retry_id, delay_seconds, error))
+
+    async def complete(self, retry_ids) -> None:
+        self.completed.extend(retry_ids)
+
+
+class _ScriptedFactusClient:
+    """Answers each invoice by reference code: an exception to raise or a success."""
+
+    def __init__(
+        self, failures: dict[str, Exception], range_error: Exception | None = None
+    ) -> None:
+        self.failures = failures
+        self.range_error = range_error
+        self.call_count = 0
+
+    async def get_active_numbering_range_id(self) -> int:
+        if self.range_error is not None:
+            raise self.range_error
+        return 1
+
+    async def create_invoice(self, invoice_data: dict, numbering_range_id: int) -> dict:
+        return await self.create_encoded_invoice(
+            json.dumps({**invoice_data, "numbering_range_id": numbering_range_id}).encode()
+        )
+
+    async def create_encoded_invoice(self, body: bytes) -> dict:
+        invoice_data = json.loads(body)
+        self.call_count += 1
+        failure = self.failures.get(invoice_data["reference_code"])
+        if failure is not None:
+            raise failure
+        return {"data": {"id": 7, "qr": "qr-url", "pdf": "pdf-url"}}
+
+
+def _status_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://factus.test/v1/bills/validate")
+    return httpx.HTTPStatusError(
+        "factus error",
+        request=request,
+        response=httpx.Response(status_code, request=request),
+    )
+
+
+def _retry(external_id: str, attempts: int) -> InvoiceRetry:
+    return InvoiceRetry(
+        retry_id=attempts * 100 + int(external_id[-1]),
+        external_id=external_id,
+        issued_at=datetime(2026, 2, 20, tzinfo=UTC),
+        batch_id="retry-batch",
+        invoice={"customer_id": "CUST-R", "total": 100.0, "currency": "COP", "tax_amount": 0.0},
+        factus_payload={"reference_code": external_id},
+        attempts=attempts,
+    )
+
+
+class TestBatchSchedulesRetries(unittest.IsolatedAsyncioTestCase):
+    async def test_transient_failures_are_queued_without_retrying_in_batch(self) -> None:
+        repository = _FakeRepository()
+        retry_queue = _FakeRetryQueue()
+        client = _ScriptedFactusClient(
+            {
+                "INV-1": httpx.ReadTimeout("timeout"),
+                "INV-2": _status_error(503),
+                "INV-3": _status_error(422),
+            }
+        )
+        use_case = ProcessInvoiceBatchUseCase(
+            invoice_repository=repository,
+            factus_client=client,
+            retry_queue=retry_queue,
+            retry_queue_delay_seconds=15.0,
+        )
+
+        await use_case.execute(
+            {
+                "batch_id": "retry-batch",
+                "payload": {
+                    "invoices": [
+                        {
+                            "external_id": f"INV-{index}",
+                            "customer_id": "CUST-R",
+                            "issued_at": "2026-02-20T00:00:00Z",
+                            "total": 100,
+                            "currency": "COP",
+                        }
+                        for index in range(1, 5)
+                    ]
+                },
+            }
+        )
+
+        self.assertEqual(client.call_count, 4)
+        statuses = dict(
+            zip(
+                repository.saved_df["external_id"].to_list(),
+                repository.saved_df["status"].to_list(),
+                strict=True,
+            )
+        )
+        self.assertEqual(
+            statuses,
+            {
+                "INV-1": INVOICE_STATUS_PENDING_RETRY,
+                "INV-2": INVOICE_STATUS_PENDING_RETRY,
+                "INV-3": "error",
+                "INV-4": "success",
+            },
+        )
+        self.assertEqual(
+            sorted(retry.external_id for retry, _ in retry_queue.scheduled), ["INV-1", "INV-2"]
+        )
+        retry, delay = retry_queue.scheduled[0]
+        self.assertEqual(delay, 15.0)
+        self.assertEqual(retry.batch_id, "retry-batch")
+        self.assertEqual(retry.factus_payload["reference_code"], retry.external_id)
+        self.assertEqual(retry.invoice["customer_id"], "CUST-R")
+
+    async def test_retries_are_not_scheduled_when_the_save_fails(self) -> None:
+        retry_queue = _FakeRetryQueue()
+        use_case = ProcessInvoiceBatchUseCase(
+            invoice_repository=_FailingSaveRepository(),
+            factus_client=_ScriptedFactusClient({"INV-1": httpx.ReadTimeout("timeout")}),
+            retry_queue=retry_queue,
+        )
+        payload = {
+            "batch_id": "retry-batch",
+            "payload": {
+                "invoices": [
+                    {
+                        "external_id": "INV-1",
+                        "customer_id": "CUST-R",
+                        "issued_at": "2026-02-20T00:00:00Z",
+                        "total": 100,
+                        "currency": "COP",
+                    }
+                ]
+            },
+        }
+
+        with self.assertRaises(ConnectionError):
+            await use_case.execute(payload)
+
+        self.assertEqual(retry_queue.scheduled, [])
+
+
+class TestRetryFailedInvoicesUseCase(unittest.IsolatedAsyncioTestCase):
+    async def test_reschedules_transient_failures_and_finishes_the_rest(self) -> None:
+        repository = _FakeRepository()
+        retry_queue = _FakeRetryQueue(
+            due=[
+                _retry("INV-1", attempts=1),
+                _retry("INV-2", attempts=2),
+                _retry("INV-3", attempts=5),
+                _retry("INV-4", attempts=1),
+            ]
+        )
+        client = _ScriptedFactusClient(
+            {
+                "INV-2": httpx.ConnectError("refused"),
+                "INV-3": _status_error(503),
+                "INV-4": _status_error(400),
+            }
+        )
+        use_case = RetryFailedInvoicesUseCase(
+            retry_queue=retry_queue,
+            invoice_repository=repository,
+            factus_client=client,
+            max_attempts=5,
+            base_delay_seconds=10.0,
+        )
+
+        claimed = await use_case.execute(limit=10)
+
+        self.assertEqual(claimed, 4)
+        self.assertEqual(
+            [(retry_id, delay) for retry_id, delay, _ in retry_queue.rescheduled], [(202, 20.0)]
+        )
+        self.assertEqual(sorted(retry_queue.completed), [101, 104, 503])
+        statuses = dict(
+            zip(
+                repository.upserted_df["external_id"].to_list(),
+                repository.upserted_df["status"].to_list(),
+                strict=True,
+            )
+        )
+        self.assertEqual(statuses, {"INV-1": "success", "INV-3": "error", "INV-4": "error"})
+        self.assertEqual(repository.upserted_df["customer_id"].to_list(), ["CUST-R"] * 3)
+
+    async def test_settles_unexpected_errors_and_exhausted_items_one_by_one(self) -> None:
+        repository = _FakeRepository()
+        retry_queue = _FakeRetryQueue(
+            due=[
+                _retry("INV-1", attempts=1),
+                _retry("INV-2", attempts=1),
+                _retry("INV-3", attempts=6),
+            ]
+        )
+        client = _ScriptedFactusClient({"INV-1": RuntimeError("invalid Factus response")})
+        use_case = RetryFailedInvoicesUseCase(
+            retry_queue=retry_queue,
+            invoice_repository=repository,
+            factus_client=client,
+            max_attempts=5,
+        )
+
+        with self.assertLogs(
+            "app.invoicing.application.use_cases.retry_failed_invoices", level="ERROR"
+        ):
+            await use_case.execute(limit=10)
+
+        self.assertEqual(client.call_count, 2)
+        self.assertEqual(sorted(retry_queue.completed), [101, 102, 603])
+        statuses = dict(
+            zip(
+                repository.upserted_df["external_id"].to_list(),
+                repository.upserted_df["status"].to_list(),
+                strict=True,
+            )
+        )
+        self.assertEqual(statuses, {"INV-1": "error", "INV-2": "success", "INV-3": "error"})
+
+    async def test_reschedules_every_item_when_the_numbering_range_is_unavailable(self) -> None:
+        retry_queue = _FakeRetryQueue(
+            due=[_retry("INV-1", attempts=1), _retry("INV-2", attempts=5)]
+        )
+        repository = _FakeRepository()
+        use_case = RetryFailedInvoicesUseCase(
+            retry_queue=retry_queue,
+            invoice_repository=repository,
+            factus_client=_ScriptedFactusClient({}, range_error=RuntimeError("no active range")),
+            max_attempts=5,
+            base_delay_seconds=10.0,
+        )
+
+        with self.assertLogs(
+            "app.invoicing.application.use_cases.retry_failed_invoices", level="ERROR"
+        ):
+            await use_case.execute(limit=10)
+
+        self.assertEqual([retry_id for retry_id, _, _ in retry_queue.rescheduled], [101])
+        self.assertEqual(retry_queue.completed, [502])
+        self.assertEqual(repository.upserted_df["status"].to_list(), ["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
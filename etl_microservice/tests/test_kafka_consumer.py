@@ -0,0 +1,41 @@
+import unittest
+from dataclasses import dataclass
+
+from aiokafka import TopicPartition
+
+from app.kafka.consumer import CONSUMER_MODE_SEQUENTIAL, InvoiceKafkaConsumer
+
+
+@dataclass
+class _FakeMessage:
+    topic: str
+    partition: int
+    offset: int
+    value: bytes
+    timestamp: int = 0
+
+
+class _FailingProducer:
+    async def send_and_wait(self, topic: str, value: bytes) -> None:
+        raise ConnectionError("broker unavailable")
+
+
+class TestInvoiceKafkaConsumer(unittest.IsolatedAsyncioTestCase):
+    async def test_marks_the_message_done_when_the_dlq_send_fails(self) -> None:
+        consumer = InvoiceKafkaConsumer(
+            process_invoice_batch_use_case=None,
+            mode=CONSUMER_MODE_SEQUENTIAL,
+        )
+        consumer._producer = _FailingProducer()
+        partition = TopicPartition("invoices", 0)
+        message = _FakeMessage("invoices", 0, 7, b"not json")
+        consumer._offset_tracker.track(partition, message.offset)
+
+        with self.assertLogs("app.kafka.consumer", level="ERROR"):
+            await consumer._handle_message(message)
+
+        self.assertEqual(consumer._offset_tracker.committable(), {partition: 8})
+
+
+if __name__ == "__main__":
+    unittest.main()
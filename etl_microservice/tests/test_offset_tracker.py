@@ -0,0 +1,64 @@
+import unittest
+
+from aiokafka import TopicPartition
+
+from app.kafka.offset_tracker import OffsetCommitTracker
+
+_PARTITION = TopicPartition("invoice.ingest.v1", 0)
+
+
+class TestOffsetCommitTracker(unittest.TestCase):
+    def test_commits_only_highest_contiguous_completed_offset(self) -> None:
+        tracker = OffsetCommitTracker()
+        for offset in (10, 11, 12, 13):
+            tracker.track(_PARTITION, offset)
+
+        tracker.complete(_PARTITION, 11)
+        tracker.complete(_PARTITION, 13)
+        self.assertEqual(tracker.committable(), {})
+
+        tracker.complete(_PARTITION, 10)
+        self.assertEqual(tracker.committable(), {_PARTITION: 12})
+
+        tracker.complete(_PARTITION, 12)
+        self.assertEqual(tracker.committable(), {_PARTITION: 14})
+
+    def test_skips_partitions_already_committed(self) -> None:
+        other = TopicPartition("invoice.ingest.v1", 1)
+        tracker = OffsetCommitTracker()
+        tracker.track(_PARTITION, 0)
+        tracker.track(other, 5)
+        tracker.complete(_PARTITION, 0)
+        tracker.complete(other, 5)
+        self.assertEqual(tracker.completed_since_commit, 2)
+
+        tracker.mark_committed({_PARTITION: 1, other: 6})
+
+        self.assertEqual(tracker.committable(), {})
+        self.assertEqual(tracker.completed_since_commit, 0)
+
+    def test_forgotten_partition_ignores_late_completions(self) -> None:
+        tracker = OffsetCommitTracker()
+        tracker.track(_PARTITION, 3)
+        tracker.forget([_PARTITION])
+
+        tracker.complete(_PARTITION, 3)
+
+        self.assertEqual(tracker.committable(), {})
+
+    def test_next_unprocessed_is_the_oldest_offset_still_in_progress(self) -> None:
+        tracker = OffsetCommitTracker()
+        self.assertIsNone(tracker.next_unprocessed(_PARTITION))
+        for offset in (4, 5, 6):
+            tracker.track(_PARTITION, offset)
+
+        tracker.complete(_PARTITION, 5)
+        self.assertEqual(tracker.next_unprocessed(_PARTITION), 4)
+
+        tracker.complete(_PARTITION, 4)
+        tracker.complete(_PARTITION, 6)
+        self.assertEqual(tracker.next_unprocessed(_PARTITION), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
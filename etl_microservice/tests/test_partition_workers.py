@@ -0,0 +1,150 @@
+import asyncio
+import unittest
+from dataclasses import dataclass
+
+from aiokafka import TopicPartition
+
+from app.kafka.partition_workers import PartitionWorkerPool
+
+
+@dataclass
+class _FakeMessage:
+    topic: str
+    partition: int
+    offset: int
+
+
+class TestPartitionWorkerPool(unittest.IsolatedAsyncioTestCase):
+    async def test_preserves_order_within_each_partition(self) -> None:
+        processed: list[tuple[int, int]] = []
+
+        async def handler(message: _FakeMessage) -> None:
+            await asyncio.sleep(0.001 * (3 - message.offset % 3))
+            processed.append((message.partition, message.offset))
+
+        pool = PartitionWorkerPool(
+            handler=handler,
+            max_in_flight=4,
+            max_buffered_per_partition=100,
+            pause_partition=lambda partition: None,
+            resume_partition=lambda partition: None,
+        )
+        for offset in range(6):
+            for partition in (0, 1):
+                pool.submit(_FakeMessage("invoices", partition, offset))
+
+        await pool.drain(pool.partitions)
+        await pool.close()
+
+        for partition in (0, 1):
+            offsets = [offset for p, offset in processed if p == partition]
+            self.assertEqual(offsets, list(range(6)))
+
+    async def test_caps_in_flight_batches_across_partitions(self) -> None:
+        in_flight = 0
+        max_seen = 0
+
+        async def handler(message: _FakeMessage) -> None:
+            nonlocal in_flight, max_seen
+            in_flight += 1
+            max_seen = max(max_seen, in_flight)
+            await asyncio.sleep(0.005)
+            in_flight -= 1
+
+        pool = PartitionWorkerPool(
+            handler=handler,
+            max_in_flight=2,
+            max_buffered_per_partition=100,
+            pause_partition=lambda partition: None,
+            resume_partition=lambda partition: None,
+        )
+        for partition in range(5):
+            pool.submit(_FakeMessage("invoices", partition, 0))
+
+        await pool.drain(pool.partitions)
+        await pool.close()
+
+        self.assertEqual(max_seen, 2)
+
+    async def test_pauses_full_partition_and_resumes_after_draining(self) -> None:
+        release = asyncio.Event()
+        paused: list[TopicPartition] = []
+        resumed: list[TopicPartition] = []
+
+        async def handler(message: _FakeMessage) -> None:
+            await release.wait()
+
+        pool = PartitionWorkerPool(
+            handler=handler,
+            max_in_flight=1,
+            max_buffered_per_partition=2,
+            pause_partition=paused.append,
+            resume_partition=resumed.append,
+        )
+        for offset in range(3):
+            pool.submit(_FakeMessage("invoices", 0, offset))
+
+        self.assertEqual(paused, [TopicPartition("invoices", 0)])
+        release.set()
+        await pool.drain(pool.partitions)
+        await pool.close()
+
+        self.assertEqual(resumed, [TopicPartition("invoices", 0)])
+
+    async def test_messages_submitted_while_draining_join_the_same_worker(self) -> None:
+        processed: list[int] = []
+        first_started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def handler(message: _FakeMessage) -> None:
+            first_started.set()
+            await release.wait()
+            processed.append(message.offset)
+
+        pool = PartitionWorkerPool(
+            handler=handler,
+            max_in_flight=4,
+            max_buffered_per_partition=100,
+            pause_partition=lambda partition: None,
+            resume_partition=lambda partition: None,
+        )
+        pool.submit(_FakeMessage("invoices", 0, 0))
+        await first_started.wait()
+        drain = asyncio.create_task(pool.drain([TopicPartition("invoices", 0)]))
+        await asyncio.sleep(0)
+        pool.submit(_FakeMessage("invoices", 0, 1))
+        release.set()
+        await drain
+        await pool.close()
+
+        self.assertEqual(processed, [0, 1])
+        self.assertEqual(pool.partitions, [])
+
+    async def test_drain_cancels_workers_still_busy_after_the_timeout(self) -> None:
+        finished: list[int] = []
+
+        async def handler(message: _FakeMessage) -> None:
+            if message.partition == 1:
+                await asyncio.sleep(60)
+            finished.append(message.partition)
+
+        pool = PartitionWorkerPool(
+            handler=handler,
+            max_in_flight=4,
+            max_buffered_per_partition=100,
+            pause_partition=lambda partition: None,
+            resume_partition=lambda partition: None,
+        )
+        for partition in (0, 1):
+            pool.submit(_FakeMessage("invoices", partition, 0))
+
+        drained = await pool.drain(pool.partitions, timeout=0.05)
+        await pool.close()
+
+        self.assertFalse(drained)
+        self.assertEqual(finished, [0])
+        self.assertEqual(pool.partitions, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
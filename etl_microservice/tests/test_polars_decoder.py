@@ -0,0 +1,118 @@
+import json
+import unittest
+
+from polars.testing import assert_frame_equal
+
+from app.invoicing.domain.entities.invoice_batch import InvoiceBatch
+from app.invoicing.infrastructure.etl.polars_decoder import decode_invoice_batch
+from app.invoicing.infrastructure.etl.polars_transformer import (
+    transform_invoice_frame,
+    transform_invoices,
+)
+
+
+def _encode(message: object) -> bytes:
+    return json.dumps(message).encode("utf-8")
+
+
+class TestPolarsDecoder(unittest.TestCase):
+    def test_matches_the_entity_path(self) -> None:
+        message = {
+            "batch_id": "batch-1",
+            "payload": {
+                "invoices": [
+                    {
+                        "external_id": "INV-1",
+                        "customer_id": "CUST-1",
+                        "issued_at": "2026-02-20T00:00:00Z",
+                        "total": 100,
+                        "currency": "COP",
+                    },
+                    {
+                        "external_id": "INV-2",
+                        "issued_at": "2026-02-20T01:00:00.250-05:00",
+                        "total": "12.5",
+                        "extra": {"ignored": True},
+                    },
+                    {"external_id": "INV-3", "total": 1.005},
+                    {"external_id": "INV-4", "total": "not-a-number"},
+                ]
+            },
+        }
+
+        decoded = decode_invoice_batch(_encode(message))
+        batch = InvoiceBatch.from_message(message)
+
+        self.assertEqual(decoded.batch_id, "batch-1")
+        expected = transform_invoices(batch.invoices, batch.batch_id)
+        actual = transform_invoice_frame(decoded.invoices, decoded.batch_id)
+        self.assertEqual(actual["external_id"].to_list(), ["INV-1", "INV-2", "INV-3"])
+        assert_frame_equal(actual.select(expected.columns), expected, check_dtypes=False)
+
+    def test_accepts_legacy_list_payload_and_empty_batches(self) -> None:
+        legacy = decode_invoice_batch(
+            _encode({"batch_id": "legacy", "payload": [{"external_id": "INV-1", "total": 5}]})
+        )
+        empty = decode_invoice_batch(_encode({"payload": {"invoices": []}}))
+
+        self.assertEqual(legacy.invoices["external_id"].to_list(), ["INV-1"])
+        self.assertTrue(empty.invoices.is_empty())
+        self.assertTrue(empty.batch_id)
+
+    def test_keeps_the_entity_path_for_values_that_depend_on_json_types(self) -> None:
+        message = {
+            "batch_id": "batch-1",
+            "payload": {
+                "invoices": [
+                    {"external_id": "INV-1", "issued_at": 1771545600, "total": 10},
+                    {"external_id": None, "issued_at": "2026-02-20T00:00:00Z", "total": 20},
+                    {"issued_at": "2026-02-20T00:00Z", "total": 30},
+                ]
+            },
+        }
+
+        decoded = decode_invoice_batch(_encode(message))
+        batch = InvoiceBatch.from_message(message)
+
+        self.assertEqual(decoded.invoices["external_id"].to_list(), ["INV-1", "None", ""])
+        self.assertIsNone(decoded.invoices["issued_at"][0])
+        assert_frame_equal(
+            transform_invoice_frame(decoded.invoices, decoded.batch_id),
+            transform_invoices(batch.invoices, batch.batch_id),
+        )
+
+    def test_drops_totals_that_cannot_be_stored(self) -> None:
+        totals = ["NaN", "inf", "-inf", "1e17", "-1e16", "9999999999999.99"]
+        message = {
+            "batch_id": "batch-1",
+            "payload": {
+                "invoices": [
+                    {"external_id": f"INV-{index}", "total": total}
+                    for index, total in enumerate(totals)
+                ]
+            },
+        }
+
+        decoded = decode_invoice_batch(_encode(message))
+        transformed = transform_invoice_frame(decoded.invoices, decoded.batch_id)
+
+        self.assertEqual(transformed["external_id"].to_list(), ["INV-5"])
+        self.assertEqual(transformed["total"].to_list(), [9999999999999.99])
+
+    def test_enforces_entity_validation(self) -> None:
+        invalid_messages = [
+            {"payload": {"invoices": "not-a-list"}},
+            {"payload": {"invoices": None}},
+            {"payload": {"invoices": [1, 2]}},
+            {"payload": {"invoices": [None]}},
+            {"payload": {"invoices": [{"external_id": "INV-1", "issued_at": "yesterday"}]}},
+        ]
+        for message in invalid_messages:
+            with self.subTest(message=message), self.assertRaises(ValueError):
+                decode_invoice_batch(_encode(message))
+        with self.assertRaises(ValueError):
+            decode_invoice_batch(b'{"payload": ')
+
+
+if __name__ == "__main__":
+    unittest.main()
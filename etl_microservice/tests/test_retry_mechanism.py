@@ -2,10 +2,15 @@ import asyncio
 import unittest
 
 import httpx
+from prometheus_client import REGISTRY
 
 from app.invoicing.application.use_cases.process_invoice_batch import (
     ProcessInvoiceBatchUseCase,
 )
+from app.shared.infrastructure.resilience.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+)
 
 
 class _FakeRepository:
@@ -15,6 +20,9 @@ class _FakeRepository:
     async def save_dataframe(self, df) -> None:
         self.saved_df = df
 
+    async def fetch_succeeded_external_ids(self, df) -> set[str]:
+        return set()
+
 
 class _AlwaysTimeoutClient:
     def __init__(self) -> None:
@@ -23,7 +31,7 @@ class _AlwaysTimeoutClient:
     async def get_active_numbering_range_id(self) -> int:
         return 1
 
-    async def create_invoice(self, invoice_data: dict, numbering_range_id: int) -> dict:
+    async def create_encoded_invoice(self, body: bytes) -> dict:
         self.call_count += 1
         raise httpx.TimeoutException("simulated timeout")
 
@@ -38,7 +46,7 @@ class _TransientTimeoutClient:
     async def get_active_numbering_range_id(self) -> int:
         return 1
 
-    async def create_invoice(self, invoice_data: dict, numbering_range_id: int) -> dict:
+    async def create_encoded_invoice(self, body: bytes) -> dict:
         self.call_count += 1
         if self.call_count <= self.fail_attempts:
             raise httpx.TimeoutException("transient timeout")
@@ -61,6 +69,10 @@ _BATCH_PAYLOAD = {
 }
 
 
+def _sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
 class TestRetryMechanism(unittest.IsolatedAsyncioTestCase):
     async def test_exhausted_retries_result_in_error_status(self) -> None:
         repository = _FakeRepository()
@@ -100,12 +112,40 @@ class TestRetryMechanism(unittest.IsolatedAsyncioTestCase):
         # 1 failure + 1 success = 2 total calls
         self.assertEqual(client.call_count, 2)
 
+    async def test_records_stage_timings_and_timeout_retries(self) -> None:
+        stages = ("decode", "transform", "factus_payloads", "factus", "persist")
+        before = {
+            stage: _sample("invoice_pipeline_stage_seconds_count", stage=stage)
+            for stage in stages
+        }
+        retries_before = _sample("factus_retries_total", reason="timeout")
+        batches_before = _sample("invoice_batch_seconds_count", result="success")
+        use_case = ProcessInvoiceBatchUseCase(
+            invoice_repository=_FakeRepository(),
+            factus_client=_TransientTimeoutClient(fail_attempts=1),
+            retry_base_delay_seconds=0.0,
+        )
+
+        await use_case.execute(_BATCH_PAYLOAD)
+
+        for stage in stages:
+            self.assertEqual(
+                _sample("invoice_pipeline_stage_seconds_count", stage=stage) - before[stage],
+                1,
+                stage,
+            )
+        self.assertEqual(_sample("factus_retries_total", reason="timeout") - retries_before, 1)
+        self.assertEqual(
+            _sample("invoice_batch_seconds_count", result="success") - batches_before, 1
+        )
+        self.assertEqual(_sample("invoice_batches_in_flight"), 0)
+
     async def test_event_publisher_receives_invoice_after_save(self) -> None:
         published: list[dict] = []
 
         class _FakePublisher:
-            async def publish_invoice_processed(self, invoice_data: dict) -> None:
-                published.append(invoice_data)
+            async def publish_invoices_processed(self, invoices) -> None:
+                published.extend(invoices.to_dicts())
 
         repository = _FakeRepository()
         client = _TransientTimeoutClient(fail_attempts=0)
@@ -122,6 +162,49 @@ class TestRetryMechanism(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(published[0]["external_id"], "INV-R1")
         self.assertEqual(published[0]["status"], "success")
 
+    async def test_open_circuit_fails_invoices_fast_without_retries(self) -> None:
+        class _CircuitOpenClient:
+            def __init__(self) -> None:
+                self.call_count = 0
+
+            async def get_active_numbering_range_id(self) -> int:
+                return 1
+
+            async def create_encoded_invoice(self, body: bytes) -> dict:
+                self.call_count += 1
+                raise CircuitOpenError("factus", retry_after=30.0)
+
+        repository = _FakeRepository()
+        client = _CircuitOpenClient()
+        use_case = ProcessInvoiceBatchUseCase(
+            invoice_repository=repository,
+            factus_client=client,
+            retry_base_delay_seconds=0.0,
+        )
+
+        await use_case.execute(_BATCH_PAYLOAD)
+
+        row = repository.saved_df.to_dicts()[0]
+        self.assertEqual(row["status"], "error")
+        self.assertEqual(client.call_count, 1)
+
+    async def test_open_circuit_parks_batch_before_processing(self) -> None:
+        breaker = CircuitBreaker(window_size=1, minimum_calls=1, name="test-park")
+        await breaker.before_call()
+        breaker.record_failure()
+        repository = _FakeRepository()
+        client = _TransientTimeoutClient(fail_attempts=0)
+        use_case = ProcessInvoiceBatchUseCase(
+            invoice_repository=repository,
+            factus_client=client,
+            circuit_breaker=breaker,
+        )
+
+        with self.assertRaises(CircuitOpenError):
+            await use_case.execute(_BATCH_PAYLOAD)
+        self.assertIsNone(repository.saved_df)
+        self.assertEqual(client.call_count, 0)
+
 
 if __name__ == "__main__":
     unittest.main()
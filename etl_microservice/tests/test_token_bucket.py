@@ -0,0 +1,30 @@
+import time
+import unittest
+
+from app.shared.infrastructure.resilience.token_bucket import TokenBucketRateLimiter
+
+
+class TestTokenBucketRateLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_limits_requests_to_configured_rate_after_burst(self) -> None:
+        bucket = TokenBucketRateLimiter(rate_per_second=100, burst=2)
+
+        started_at = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        elapsed = time.monotonic() - started_at
+
+        # 2 burst tokens, then 4 more at 100/s.
+        self.assertGreaterEqual(elapsed, 0.035)
+
+    async def test_pause_blocks_unlimited_bucket(self) -> None:
+        bucket = TokenBucketRateLimiter(rate_per_second=None)
+        bucket.pause_for(0.05)
+
+        started_at = time.monotonic()
+        await bucket.acquire()
+
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.045)
+
+
+if __name__ == "__main__":
+    unittest.main()